@@ -1,92 +1,407 @@
 # apps/patients/api_views.py
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Max, QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import extend_schema
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from django.utils.timezone import is_naive, make_aware
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Patient
+from .async_views import AsyncAPIView, aget_object_or_404
+from .bundle import BundleError, BundleProcessor
+from .cache import (
+    cache_resource,
+    etag_matches,
+    get_cached_resource,
+    not_modified,
+    unmodified_since,
+    validator_headers,
+    version_etag,
+)
+from .counting import TOTAL_MODES, estimated_search_count, exact_count, search_total
+from .fast_serializer import serialize_patient
+from .models import Patient, PatientHistory
+from .pagination import PatientBundlePagination, PatientHistoryPagination
+from .projection import Projection, parse_projection
+from .renderers import FastJSONRenderer, FHIRJSONRenderer, NDJSONRenderer
+from .search import PatientSearch, SearchError, SearchPlan, conditional_search
 from .serializers import PatientFHIRSerializer
 
+# Paramètres de projection communs à la recherche et à la lecture
+PROJECTION_PARAMETERS = [
+    OpenApiParameter(
+        "_elements",
+        str,
+        description="Éléments FHIR à renvoyer, séparés par des virgules (seules les colonnes utiles sont lues)",
+    ),
+    OpenApiParameter(
+        "_summary", str, enum=["true", "false", "data", "text", "count"], description="Résumé FHIR de la ressource"
+    ),
+]
+
+
+class PatientListCreateAPIView(AsyncAPIView):
+    """Endpoint pour la création et la liste des patients (sans ID dans l'URL).
 
-class PatientListCreateAPIView(APIView):
-    """Endpoint pour la création et la liste des patients (sans ID dans l'URL)."""
+    La recherche est asynchrone ; la création, transactionnelle, s'exécute dans le thread des appels ORM.
+    """
 
     serializer_class = PatientFHIRSerializer
+    pagination_class = PatientBundlePagination
 
     @extend_schema(
-        operation_id="patient_api_patient_create", description="Créer un nouveau patient selon le standard FHIR"
+        operation_id="patient_api_patient_create",
+        description=(
+            "Créer un nouveau patient selon le standard FHIR. L'unicité de l'IPP est garantie par la base : un "
+            "IPP déjà présent, y compris créé par une requête concurrente, renvoie 409. `If-None-Exist` "
+            "(ex. `identifier=urn:oid:1.2.250.1.213.1.4.8|12345`) est évalué comme une recherche sur les "
+            "paramètres indexés : le patient correspondant est renvoyé (200), plusieurs correspondances "
+            "renvoient 412."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "If-None-Exist",
+                str,
+                location=OpenApiParameter.HEADER,
+                description="Critères de recherche (création conditionnelle), paramètres indexés uniquement",
+            ),
+        ],
     )
     def post(self, request: Request) -> Response:
-        """Créer un nouveau patient selon le standard FHIR."""
-        # Vérification du resourceType
-        if not request.data.get("resourceType") == "Patient":
+        """Créer un patient par un seul INSERT, sans vérification préalable de l'IPP.
+
+        La contrainte d'unicité de l'IPP tranche entre requêtes concurrentes : l'`IntegrityError`
+        est traduite en 409, ou en résultat de la création conditionnelle avec `If-None-Exist`
+        (recherche évaluée avant l'écriture, puis de nouveau après un conflit).
+
+        Args:
+            request: Requête DRF contenant la ressource et les en-têtes `If-None-Exist` et `Prefer`
+
+        Returns
+        -------
+        Response
+            201 si le patient est créé, 200 si `If-None-Exist` désigne un patient existant, 400, 409 ou 412
+        """
+        if request.data.get("resourceType") != "Patient":
             return Response({"error": "resourceType must be 'Patient'"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Gestion de If-None-Exist
-        ipp = next(
-            (
-                id["value"]
-                for id in request.data.get("identifier", [])
-                if id.get("system") == "urn:oid:1.2.250.1.213.1.4.8"
-            ),
-            None,
-        )
-        if ipp and Patient.objects.filter(ipp=ipp).exists():
-            if_none_exist = request.headers.get("If-None-Exist")
-            if if_none_exist:
-                return Response(
-                    {"error": "Patient already exists with this IPP"}, status=status.HTTP_412_PRECONDITION_FAILED
-                )
-            else:
-                return Response({"error": "A patient with this IPP already exists"}, status=status.HTTP_409_CONFLICT)
+        criteria = request.headers.get("If-None-Exist")
+        existing: Optional[QuerySet] = None
+        if criteria is not None:
+            try:
+                existing = conditional_search(criteria)
+            except SearchError as exc:
+                return Response({"error": f"If-None-Exist: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+            matches = list(existing[:2])
+            if matches:
+                return self.existing_response(request, matches)
 
         serializer = self.serializer_class(data=request.data)
-        if serializer.is_valid():
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.validated_data.get("ipp"):
+            return Response({"error": "Patient identifier (IPP) is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # `Patient.save` écrit dans son propre bloc atomique : le conflit n'annule que cette création
             patient = serializer.save()
+        except IntegrityError:
+            # L'IPP existe déjà, ou vient d'être créé par une requête concurrente
+            if existing is not None:
+                matches = list(existing[:2])
+                if matches:
+                    return self.existing_response(request, matches)
+            return Response({"error": "A patient with this IPP already exists"}, status=status.HTTP_409_CONFLICT)
 
-            # Gestion de Prefer header
-            prefer = request.headers.get("Prefer", "return=minimal")
-            if prefer == "return=representation":
-                response_data = self.serializer_class(patient).data
-                return Response(
-                    response_data, status=status.HTTP_201_CREATED, headers={"Location": f"/patient/{patient.id}/"}
-                )
-            else:
-                return Response(status=status.HTTP_201_CREATED, headers={"Location": f"/patient/{patient.id}/"})
+        return self.patient_response(request, patient, status.HTTP_201_CREATED)
+
+    def existing_response(self, request: Request, matches: List[Patient]) -> Response:
+        """Réponse d'une création conditionnelle dont les critères désignent des patients existants.
+
+        Args:
+            request: Requête DRF
+            matches: Patients correspondant à `If-None-Exist` (deux au plus)
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        Returns
+        -------
+        Response
+            200 avec le patient existant s'il est unique, 412 sinon
+        """
+        if len(matches) > 1:
+            return Response(
+                {"error": "If-None-Exist matches several patients"}, status=status.HTTP_412_PRECONDITION_FAILED
+            )
+        return self.patient_response(request, matches[0], status.HTTP_200_OK)
 
-    @extend_schema(operation_id="patient_api_patient_list", description="Lister tous les patients")
-    def get(self, request: Request) -> Response:
-        """Lister tous les patients."""
-        patients = Patient.objects.all()
-        serializer = self.serializer_class(patients, many=True)
-        return Response(serializer.data)
+    def patient_response(self, request: Request, patient: Patient, status_code: int) -> Response:
+        """Réponse désignant un patient créé ou existant, avec son contenu si `Prefer: return=representation`.
 
+        Args:
+            request: Requête DRF
+            patient: Patient créé ou existant
+            status_code: Statut HTTP de la réponse
 
-class PatientRetrieveUpdateDestroyAPIView(APIView):
-    """Endpoint pour la récupération, mise à jour et suppression d'un patient spécifique (avec ID dans l'URL)."""
+        Returns
+        -------
+        Response
+            Réponse avec `Location`, `ETag` et `Last-Modified`
+        """
+        headers = {
+            "Location": f"/patient/{patient.id}/",
+            **validator_headers(version_etag(patient.version_id), patient.update_date),
+        }
+
+        # Gestion de Prefer header
+        prefer = request.headers.get("Prefer", "return=minimal")
+        if prefer == "return=representation":
+            return Response(serialize_patient(patient), status=status_code, headers=headers)
+        return Response(status=status_code, headers=headers)
+
+    @extend_schema(
+        operation_id="patient_api_patient_list",
+        description=(
+            "Rechercher les patients et les renvoyer sous forme de Bundle FHIR `searchset` paginé par curseur. "
+            "Les paramètres de type `string` acceptent les modificateurs `:exact` et `:contains`, les "
+            "paramètres de nom le modificateur `:phonetic` (résultats classés par score) ; `near` classe les "
+            "résultats par distance (extension `location-distance`). Plusieurs "
+            "valeurs séparées par des virgules sont combinées en OU. Avec `Prefer: handling=strict`, les "
+            "paramètres inconnus et les recherches sans critère indexé sont refusés (400). `If-Modified-Since` "
+            "renvoie `304` si aucun patient n'a été créé, modifié ou supprimé depuis."
+        ),
+        parameters=[
+            OpenApiParameter("_count", int, description="Nombre de patients par page (20 par défaut, 1000 maximum)"),
+            OpenApiParameter("_cursor", str, description="Curseur opaque fourni par les liens `next` / `previous`"),
+            OpenApiParameter("family", str, description="Nom de famille (préfixe, insensible à la casse)"),
+            OpenApiParameter("given", str, description="Prénom (préfixe, insensible à la casse)"),
+            OpenApiParameter("name", str, description="Nom de famille, prénom ou nom de naissance (préfixe)"),
+            OpenApiParameter(
+                "phonetic", str, description="Nom proche phonétiquement (Soundex2), résultats classés par score"
+            ),
+            OpenApiParameter("identifier", str, description="IPP sous la forme `system|value` ou `value`"),
+            OpenApiParameter("gender", str, description="`male`, `female`, `other` ou `unknown`"),
+            OpenApiParameter("address-city", str, description="Ville de résidence (préfixe)"),
+            OpenApiParameter("address-postalcode", str, description="Code postal de résidence (préfixe)"),
+            OpenApiParameter(
+                "birthdate",
+                str,
+                description=(
+                    "Date de naissance (`1956`, `1956-03`, `1956-03-04`...) précédée d'un préfixe facultatif "
+                    "`eq`, `ne`, `lt`, `gt`, `le`, `ge`, `sa`, `eb` ou `ap` ; répétable pour un intervalle"
+                ),
+            ),
+            OpenApiParameter("death-date", str, description="Date de décès, mêmes précisions et préfixes"),
+            OpenApiParameter("_lastUpdated", str, description="Date de dernière modification, mêmes préfixes"),
+            OpenApiParameter(
+                "near",
+                str,
+                description=(
+                    "Adresses à proximité : `latitude|longitude|distance|unité` (10 km par défaut, unités `km`, "
+                    "`m` ou `[mi_i]`), résultats classés par distance"
+                ),
+            ),
+            *PROJECTION_PARAMETERS,
+            OpenApiParameter(
+                "_total",
+                str,
+                enum=list(TOTAL_MODES),
+                description=(
+                    "Total du Bundle : `none` (par défaut, aucun décompte), `estimate` (statistiques de table "
+                    "ou décompte borné) ou `accurate` (COUNT exact, en cache jusqu'à la prochaine écriture)"
+                ),
+            ),
+        ],
+    )
+    async def get(self, request: Request) -> Response:
+        """Rechercher les patients et les renvoyer sous forme de Bundle FHIR `searchset` paginé."""
+        strict = request.headers.get("Prefer", "").replace(" ", "") == "handling=strict"
+        try:
+            search = PatientSearch(request.query_params, strict=strict).plan()
+            projection = parse_projection(request.query_params, strict=strict)
+        except SearchError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        total_mode = request.query_params.get("_total", "none")
+        if total_mode not in TOTAL_MODES:
+            return Response(
+                {"error": f"_total must be one of: {', '.join(TOTAL_MODES)}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        last_modified = await self.last_modified()
+        if unmodified_since(request.headers.get("If-Modified-Since"), last_modified):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+
+        paginator = self.pagination_class()
+        warnings = search.warnings + projection.warnings
+        if projection.count_only:
+            # `_summary=count` : un COUNT(*) sur le plan de recherche (en cache jusqu'à la prochaine écriture)
+            count = estimated_search_count if total_mode == "estimate" else exact_count
+            total = await sync_to_async(count)(search.queryset, last_modified)
+            response = paginator.get_count_response(total, request, warnings)
+        else:
+            total, data = await sync_to_async(self.search_page)(
+                paginator, search, projection, request, total_mode, last_modified
+            )
+            response = paginator.get_paginated_response(data, warnings, total)
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+    async def last_modified(self) -> Optional[datetime]:
+        """Date de la dernière écriture sur la table (création, modification ou suppression).
+
+        Returns
+        -------
+        Optional[datetime]
+            Date la plus récente, lue par deux agrégats MAX servis par les index de date
+        """
+        patients = await Patient.objects.aaggregate(last=Max("update_date"))
+        history = await PatientHistory.objects.aaggregate(last=Max("recorded_at"))
+        return max(filter(None, (patients["last"], history["last"])), default=None)
+
+    def search_page(
+        self,
+        paginator: PatientBundlePagination,
+        search: SearchPlan,
+        projection: Projection,
+        request: Request,
+        total_mode: str,
+        last_modified: Optional[datetime],
+    ) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """Compte les résultats selon `_total` et lit la page courante (dans le thread des appels ORM).
+
+        Args:
+            paginator: Pagination du Bundle
+            search: Plan de recherche
+            projection: Projection `_elements` / `_summary`
+            request: Requête DRF
+            total_mode: Mode `_total`
+            last_modified: Date de la dernière écriture sur la table
+
+        Returns
+        -------
+        Tuple[Optional[int], List[Dict[str, Any]]]
+            Total du Bundle (None s'il est omis) et ressources projetées de la page
+        """
+        total = search_total(search.queryset, total_mode, last_modified)
+        # Seules les colonnes des éléments demandés sont lues
+        search = search._replace(queryset=projection.apply(search.queryset))
+        if search.ranking:
+            page = paginator.paginate_ranked(search, request)
+        elif search.near:
+            page = paginator.paginate_near(search.queryset, search.near, request)
+        else:
+            page = paginator.paginate_queryset(search.queryset, request, view=self) or []
+        return total, [projection.serialize(patient) for patient in page]
+
+
+class PatientRetrieveUpdateDestroyAPIView(AsyncAPIView):
+    """Endpoint pour la récupération, mise à jour et suppression d'un patient spécifique (avec ID dans l'URL).
+
+    La lecture est asynchrone ; la mise à jour et la suppression s'exécutent dans le thread des appels ORM.
+    """
 
     serializer_class = PatientFHIRSerializer
 
-    @extend_schema(operation_id="patient_api_patient_retrieve", description="Récupérer un patient spécifique")
-    def get(self, request: Request, pk: int) -> Response:
-        """Récupérer un patient spécifique."""
-        patient = get_object_or_404(Patient, pk=pk)
-        serializer = self.serializer_class(patient)
-        return Response(serializer.data)
+    @extend_schema(
+        operation_id="patient_api_patient_retrieve",
+        description=(
+            'Récupérer un patient spécifique. La réponse porte `ETag: W/"<versionId>"` et `Last-Modified` ; '
+            "`If-None-Match` et `If-Modified-Since` renvoient `304 Not Modified` sans sérialisation."
+        ),
+        parameters=PROJECTION_PARAMETERS,
+    )
+    async def get(self, request: Request, pk: int) -> Any:
+        """Récupérer un patient spécifique, depuis le cache de ressources rendues si possible."""
+        try:
+            projection = parse_projection(request.query_params)
+        except SearchError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if projection.count_only:
+            return Response(
+                {"error": "_summary=count is only supported on searches"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Version courante lue en base (clé primaire, deux colonnes) : le cache de ressources est local
+        # au processus (LocMemCache) et indexé par version, une écriture faite par un autre worker n'y
+        # est donc jamais servie. Les lectures conditionnelles sont tranchées sans charger le patient.
+        version_id, update_date = await aget_object_or_404(
+            Patient.objects.values_list("version_id", "update_date"), pk=pk
+        )
+        if not_modified(request.headers, version_etag(version_id), update_date):
+            return HttpResponse(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(version_etag(version_id), update_date)
+            )
+        # Cache et sérialisation dans le thread des appels ORM (métriques de cache, sérialiseur synchrone)
+        resource = await sync_to_async(get_cached_resource)(pk, version_id)
+        if resource is None:
+            if projection.elements is not None:
+                # Projection hors cache : seules les colonnes des éléments demandés sont lues
+                patient = await aget_object_or_404(projection.apply(Patient.objects.all()), pk=pk)
+                headers = validator_headers(version_etag(patient.version_id), patient.update_date)
+                return Response(await sync_to_async(projection.serialize)(patient), headers=headers)
+            resource = await sync_to_async(cache_resource)(await aget_object_or_404(Patient, pk=pk))
+
+        if not_modified(request.headers, resource.etag, resource.last_modified):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=resource.headers())
+        if projection.elements is not None:
+            return Response(projection.project(resource.data), headers=resource.headers())
+
+        # Le JSON déjà rendu est renvoyé tel quel ; les autres formats (API navigable, JSON indenté) passent par DRF
+        renderer = request.accepted_renderer
+        if isinstance(renderer, FastJSONRenderer) and not renderer.get_indent(request.accepted_media_type, {}):
+            return HttpResponse(
+                resource.body,
+                content_type=renderer.media_type,
+                headers={**resource.headers(), "Vary": "Accept"},
+            )
+        return Response(resource.data, headers=resource.headers())
 
-    @extend_schema(operation_id="patient_api_patient_update", description="Mettre à jour complètement un patient")
+    @extend_schema(
+        operation_id="patient_api_patient_update",
+        description=(
+            'Mettre à jour complètement un patient. Avec `If-Match: W/"<versionId>"`, la mise à jour est '
+            "refusée (412) si la version courante a changé (verrouillage optimiste)."
+        ),
+    )
     def put(self, request: Request, pk: int) -> Response:
-        """Mettre à jour complètement un patient."""
-        patient = get_object_or_404(Patient, pk=pk)
-        serializer = self.serializer_class(patient, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        """Mettre à jour complètement un patient (verrou de ligne), sous réserve de la version attendue (`If-Match`).
+
+        Args:
+            request: Requête DRF contenant la ressource et l'en-tête `If-Match`
+            pk: Clé primaire du patient
+
+        Returns
+        -------
+        Response
+            Ressource mise à jour, 400 si elle est invalide, 404 ou 412
+        """
+        with transaction.atomic():
+            # Le verrou de ligne rend la vérification de version et l'écriture indissociables
+            patient = get_object_or_404(Patient.objects.select_for_update(), pk=pk)
+            if_match = request.headers.get("If-Match")
+            if if_match and not etag_matches(if_match, version_etag(patient.version_id)):
+                return Response(
+                    {"error": f"Version mismatch: current version is {patient.version_id}"},
+                    status=status.HTTP_412_PRECONDITION_FAILED,
+                )
+            serializer = self.serializer_class(patient, data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            patient = serializer.save()
+
+        # Mise en cache après le commit, une fois l'invalidation des signaux passée
+        resource = cache_resource(patient)
+        return Response(resource.data, headers=resource.headers())
 
     @extend_schema(operation_id="patient_api_patient_delete", description="Supprimer un patient")
     def delete(self, request: Request, pk: int) -> Response:
@@ -94,3 +409,207 @@ class PatientRetrieveUpdateDestroyAPIView(APIView):
         patient = get_object_or_404(Patient, pk=pk)
         patient.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PatientHistoryAPIView(AsyncAPIView):
+    """Endpoint de l'historique des versions d'un patient (`Patient/{id}/_history`)."""
+
+    pagination_class = PatientHistoryPagination
+
+    @extend_schema(
+        operation_id="patient_api_patient_history",
+        description="Lister les versions d'un patient (Bundle FHIR `history`, de la plus récente à la plus ancienne)",
+        parameters=[
+            OpenApiParameter("_count", int, description="Nombre de versions par page (20 par défaut, 1000 maximum)"),
+            OpenApiParameter("_cursor", str, description="Curseur opaque fourni par les liens `next` / `previous`"),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    async def get(self, request: Request, pk: int) -> Response:
+        """Lister les versions archivées d'un patient, y compris sa suppression éventuelle."""
+        queryset = PatientHistory.objects.filter(patient_id=pk)
+        patient = await Patient.objects.filter(pk=pk).afirst()
+        if patient is None and not await queryset.aexists():
+            return Response({"error": "Patient not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        paginator = self.pagination_class()
+        # Pagination par curseur de DRF, sans API asynchrone : dans le thread des appels ORM
+        versions = await sync_to_async(paginator.paginate_queryset)(queryset, request)
+        entries = [paginator.get_history_entry(version) for version in versions or []]
+
+        # Patient antérieur à l'historisation : sa version courante n'est pas archivée
+        first_page = paginator.cursor_query_param not in request.query_params
+        if first_page and patient is not None and not await queryset.filter(version_id=patient.version_id).aexists():
+            current = PatientHistory(
+                patient_id=pk,
+                version_id=patient.version_id,
+                method="POST" if patient.version_id == 1 else "PUT",
+                recorded_at=patient.update_date or timezone.now(),
+                resource=await sync_to_async(serialize_patient)(patient),
+            )
+            entries.insert(0, paginator.get_history_entry(current))
+        return paginator.get_paginated_response(entries)
+
+
+class PatientVersionAPIView(AsyncAPIView):
+    """Endpoint de lecture d'une version précise d'un patient (vread, `Patient/{id}/_history/{vid}`)."""
+
+    serializer_class = PatientFHIRSerializer
+
+    @extend_schema(
+        operation_id="patient_api_patient_vread",
+        description="Lire une version précise d'un patient (410 si cette version correspond à une suppression)",
+    )
+    async def get(self, request: Request, pk: int, vid: int) -> Any:
+        """Lire une version archivée d'un patient."""
+        version = await PatientHistory.objects.filter(patient_id=pk, version_id=vid).afirst()
+        if version is None:
+            # Version courante d'un patient antérieur à l'historisation
+            patient = await aget_object_or_404(Patient, pk=pk, version_id=vid)
+            version = PatientHistory(
+                patient_id=pk,
+                version_id=vid,
+                method="POST" if vid == 1 else "PUT",
+                recorded_at=patient.update_date,
+                resource=await sync_to_async(serialize_patient)(patient),
+            )
+
+        headers = validator_headers(version_etag(version.version_id), version.recorded_at)
+        if version.resource is None:
+            return Response(
+                {"error": f"Patient {pk} was deleted in version {vid}"}, status=status.HTTP_410_GONE, headers=headers
+            )
+        if not_modified(request.headers, headers["ETag"], version.recorded_at):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(version.resource, headers=headers)
+
+
+class PatientExportAPIView(AsyncAPIView):
+    """Endpoint d'export en masse des patients au format FHIR NDJSON (`Patient/$export`)."""
+
+    renderer_classes = [NDJSONRenderer, FHIRJSONRenderer, FastJSONRenderer]
+    chunk_size = 2000
+    # Sous ASGI, blocs plus courts : le thread des appels ORM est partagé par toutes les requêtes
+    # et chaque bloc envoyé reste en mémoire tant que le client ne l'a pas lu
+    async_chunk_size = 100
+    supported_types = {"Patient"}
+
+    @extend_schema(
+        operation_id="patient_api_patient_export",
+        description="Exporter tous les patients au format `application/fhir+ndjson` (une ressource par ligne)",
+        parameters=[
+            OpenApiParameter("_since", str, description="N'exporter que les patients modifiés après cet instant"),
+            OpenApiParameter("_type", str, description="Types de ressources à exporter (seul `Patient` est supporté)"),
+        ],
+        responses={(200, "application/fhir+ndjson"): PatientFHIRSerializer},
+    )
+    async def get(self, request: Request) -> Any:
+        """Exporter les patients en flux NDJSON, ligne par ligne."""
+        requested_types = {t.strip() for t in request.query_params.get("_type", "Patient").split(",") if t.strip()}
+        unsupported_types = requested_types - self.supported_types
+        if unsupported_types:
+            return Response(
+                {"error": f"Unsupported _type: {', '.join(sorted(unsupported_types))}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = Patient.objects.order_by("id")
+
+        since_param = request.query_params.get("_since")
+        if since_param:
+            since = self.parse_since(since_param)
+            if since is None:
+                return Response({"error": "_since must be a valid FHIR instant"}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(update_date__gt=since)
+
+        # Flux asynchrone sous ASGI, synchrone sous WSGI : dans le cas contraire, Django lirait tout l'export en mémoire
+        content = self.astream(queryset) if isinstance(request._request, ASGIRequest) else self.stream(queryset)
+        response = StreamingHttpResponse(content, content_type=NDJSONRenderer.media_type)
+        response["Content-Disposition"] = 'attachment; filename="Patient.ndjson"'
+        return response
+
+    def stream(self, queryset: Any) -> Iterator[bytes]:
+        """Itère sur la table par blocs côté serveur et sérialise chaque patient à la volée.
+
+        Args:
+            queryset: Queryset des patients à exporter
+
+        Yields
+        ------
+        bytes
+            Une ligne NDJSON par patient
+        """
+        resources = (serialize_patient(patient) for patient in queryset.iterator(self.chunk_size))
+        yield from NDJSONRenderer().iter_lines(resources)
+
+    async def astream(self, queryset: QuerySet) -> AsyncIterator[bytes]:
+        """Itère sur la table par blocs lus par clé (`id > dernier id`) avec l'ORM asynchrone.
+
+        Chaque bloc est une requête autonome : aucun curseur ne reste ouvert pendant l'envoi
+        à un client lent, la connexion en base étant partagée par les requêtes sous ASGI.
+
+        Args:
+            queryset: Queryset des patients à exporter, trié par `id`
+
+        Yields
+        ------
+        bytes
+            Lignes NDJSON d'un bloc de patients
+        """
+        renderer = NDJSONRenderer()
+        last_pk = 0
+        while True:
+            patients = [patient async for patient in queryset.filter(pk__gt=last_pk)[: self.async_chunk_size]]
+            if patients:
+                yield b"".join(renderer.iter_lines(serialize_patient(patient) for patient in patients))
+            if len(patients) < self.async_chunk_size:
+                return
+            last_pk = patients[-1].pk
+
+    def parse_since(self, value: str) -> Optional[datetime]:
+        """Convertit le paramètre `_since` en datetime avec fuseau horaire.
+
+        Args:
+            value: Instant FHIR (`YYYY-MM-DD` ou `YYYY-MM-DDThh:mm:ss[+zz:zz]`)
+
+        Returns
+        -------
+        Optional[datetime]
+            Datetime aware ou None si le format est invalide
+        """
+        # Un `+` non encodé dans l'URL est décodé en espace
+        value = value.strip().replace(" ", "+")
+        try:
+            since = parse_datetime(value)
+            if since is None:
+                since_date = parse_date(value)
+                if since_date is None:
+                    return None
+                since = datetime.combine(since_date, datetime.min.time())
+        except ValueError:
+            return None
+        return make_aware(since) if is_naive(since) else since
+
+
+class BundleAPIView(APIView):
+    """Endpoint de traitement des Bundles FHIR `batch` et `transaction` (`POST /api/`)."""
+
+    @extend_schema(
+        operation_id="fhir_bundle_process",
+        description=(
+            "Créer des patients en masse à partir d'un Bundle FHIR `batch` (entrées indépendantes) ou "
+            "`transaction` (tout ou rien). Seules les entrées `POST Patient` sont acceptées. `ifNoneExist` "
+            "est évalué comme une recherche, comme `If-None-Exist` sur `/api/patient/` : l'entrée renvoie le "
+            "patient correspondant (200), ou 412 si plusieurs correspondent ; un IPP existant renvoie 409."
+        ),
+        request=OpenApiTypes.OBJECT,
+        responses=OpenApiTypes.OBJECT,
+    )
+    def post(self, request: Request) -> Response:
+        """Traiter un Bundle `batch` ou `transaction` et renvoyer le Bundle de réponse."""
+        representation = request.headers.get("Prefer") == "return=representation"
+        try:
+            bundle = BundleProcessor(request.data, representation).process()
+        except BundleError as exc:
+            return Response({"error": str(exc)}, status=exc.status_code)
+        return Response(bundle)
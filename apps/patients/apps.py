@@ -6,3 +6,7 @@ class PatientsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.patients"
+
+    def ready(self) -> None:
+        """Connect the model signals (patient version history)."""
+        from apps.patients import signals  # noqa: F401
@@ -0,0 +1,88 @@
+# apps/patients/async_views.py
+from typing import Any, Callable, Type, TypeVar, Union
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db import models
+from django.http import Http404, HttpRequest
+from django.utils.functional import classproperty
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+ModelT = TypeVar("ModelT", bound=models.Model)
+
+
+class AsyncAPIView(APIView):
+    """APIView dont les handlers peuvent être des coroutines (`async def get(...)`).
+
+    DRF n'exécute que des handlers synchrones : `dispatch` est ici une coroutine, reconnue
+    par Django comme vue asynchrone. Sous ASGI, la vue s'exécute dans la boucle d'événements
+    sans occuper de thread ; sous WSGI, Django l'exécute via `async_to_sync`. Les handlers
+    restés synchrones (écritures transactionnelles, `options`) s'exécutent dans le thread
+    des appels ORM.
+
+    L'authentification, les permissions et la limitation de débit de DRF restent synchrones
+    (la session peut être lue en base) et s'exécutent dans le thread des appels ORM.
+    """
+
+    @classproperty
+    def view_is_async(cls) -> bool:
+        """Les vues de cette classe sont toujours asynchrones (`options` compris)."""
+        return True
+
+    async def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> Response:  # type: ignore[override]
+        """Équivalent asynchrone de `APIView.dispatch`.
+
+        Args:
+            request: Requête Django
+            *args: Arguments positionnels de l'URL
+            **kwargs: Arguments nommés de l'URL
+
+        Returns
+        -------
+        Response
+            Réponse finalisée (rendue ensuite par Django)
+        """
+        self.args = args
+        self.kwargs = kwargs
+        drf_request = self.initialize_request(request, *args, **kwargs)
+        self.request = drf_request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(drf_request, *args, **kwargs)
+            method = drf_request.method.lower()
+            handler: Callable[..., Any] = getattr(self, method, self.http_method_not_allowed)
+            if method not in self.http_method_names:
+                handler = self.http_method_not_allowed
+            if not iscoroutinefunction(handler):
+                handler = sync_to_async(handler)
+            response = await handler(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(drf_request, response, *args, **kwargs)
+        return self.response
+
+
+async def aget_object_or_404(klass: Union[Type[ModelT], "models.QuerySet[ModelT]"], **kwargs: Any) -> Any:
+    """Équivalent asynchrone de `get_object_or_404` (ORM asynchrone `aget`).
+
+    Args:
+        klass: Modèle ou queryset interrogé
+        **kwargs: Critères de recherche
+
+    Returns
+    -------
+    Any
+        Objet (ou ligne `values_list`) trouvé
+
+    Raises
+    ------
+    Http404
+        Si aucun objet ne correspond
+    """
+    queryset = klass._default_manager.all() if isinstance(klass, type) else klass
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
@@ -0,0 +1,192 @@
+# apps/patients/bulk.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from .fast_serializer import serialize_patient
+from .geo import location_cell
+from .models import LOCATION_FIELDS, NAME_FIELDS, Patient, PatientHistory, PatientNameToken
+
+
+def insert_rows(model: Type[models.Model], objs: Sequence[models.Model], batch_size: Optional[int] = None) -> None:
+    """Insère des instances par requêtes `INSERT` multi-lignes, sans relire les clés primaires.
+
+    Équivalent de `bulk_create` sans sa compilation SQL ligne par ligne et champ par champ,
+    qui représente l'essentiel du coût d'une insertion en masse : la requête est construite
+    une fois par taille de lot et seules les valeurs sont converties (`get_db_prep_save`).
+
+    Args:
+        model: Modèle des instances
+        objs: Instances à insérer (la clé primaire auto-incrémentée est ignorée)
+        batch_size: Nombre maximal de lignes par requête (borné par la limite de paramètres de la base)
+
+    Returns
+    -------
+    None
+        Les instances ne reçoivent pas leur clé primaire
+    """
+    if not objs:
+        return
+    connection = connections[router.db_for_write(model)]
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    rows = [tuple(field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields) for obj in objs]
+    insert_values(model, fields, rows, batch_size)
+
+
+def insert_values(
+    model: Type[models.Model],
+    fields: List[models.Field],
+    rows: Sequence[Tuple[Any, ...]],
+    batch_size: Optional[int] = None,
+) -> None:
+    """Insère des lignes de valeurs déjà converties pour la base, par requêtes `INSERT` multi-lignes.
+
+    Args:
+        model: Modèle de la table
+        fields: Champs des colonnes insérées, dans l'ordre des valeurs
+        rows: Valeurs de chaque ligne, prêtes pour la base (`get_db_prep_save`)
+        batch_size: Nombre maximal de lignes par requête (borné par la limite de paramètres de la base)
+
+    Returns
+    -------
+    None
+        Les clés primaires des lignes ne sont pas relues
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    size = connection.ops.bulk_batch_size(fields, rows)
+    size = min(size, batch_size) if batch_size else size
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    row = f"({', '.join(['%s'] * len(fields))})"
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            batch = rows[start : start + size]
+            params = [value for values in batch for value in values]
+            cursor.execute(f"INSERT INTO {table} ({columns}) VALUES {', '.join([row] * len(batch))}", params)
+
+
+def bulk_create_patients(patients: List[Patient], batch_size: Optional[int] = None) -> List[Patient]:
+    """Insère des patients en masse en maintenant les tables dérivées de `Patient.save`.
+
+    L'insertion en masse ne passe ni par `Patient.save` ni par les signaux : la version
+    initiale, la date de mise à jour, la cellule geohash, les clés de rapprochement des
+    noms et la première version de l'historique sont donc écrites ici, dans la même transaction. Les clés
+    primaires sont relues en une requête sur l'IPP, unique.
+
+    Args:
+        patients: Patients non enregistrés à insérer
+        batch_size: Nombre de lignes par requête INSERT (calculé par Django si absent)
+
+    Returns
+    -------
+    List[Patient]
+        Patients insérés, avec leur clé primaire
+    """
+    now = timezone.now()
+    for patient in patients:
+        patient.version_id = 1
+        patient.update_date = now
+        patient.residence_geohash = location_cell(patient.residence_latitude, patient.residence_longitude)
+
+    with transaction.atomic():
+        insert_rows(Patient, patients, batch_size)
+        pks = dict(Patient.objects.filter(ipp__in=[patient.ipp for patient in patients]).values_list("ipp", "pk"))
+        for patient in patients:
+            patient.pk = pks[patient.ipp]
+            patient._state.adding = False
+
+        insert_rows(
+            PatientNameToken,
+            [token for patient in patients for token in PatientNameToken.for_patient(patient)],
+            batch_size,
+        )
+        insert_rows(
+            PatientHistory,
+            [
+                PatientHistory(
+                    patient_id=patient.pk,
+                    version_id=1,
+                    method="POST",
+                    recorded_at=now,
+                    resource=serialize_patient(patient),
+                )
+                for patient in patients
+            ],
+            batch_size,
+        )
+    return patients
+
+
+def bulk_update_patients(changes: List[Tuple[Patient, Dict[str, Any]]], batch_size: Optional[int] = None) -> None:
+    """Applique des modifications à des patients en masse, avec les mêmes effets que `Patient.save`.
+
+    Chaque patient modifié change de version ; la version remplacée est archivée si elle
+    ne l'a jamais été, les clés de noms sont recalculées si un nom change, la cellule
+    geohash si les coordonnées changent ; les ressources rendues en cache, indexées par
+    version, ne sont plus servies.
+
+    Args
+    ----
+    changes : List[Tuple[Patient, Dict[str, Any]]]
+        Patients lus par `select_for_update` dans la transaction de l'appelant (la version
+        écrite part de la version lue), avec les valeurs à leur appliquer
+    batch_size : Optional[int]
+        Nombre de lignes par requête UPDATE (calculé par Django si absent)
+    """
+    if not changes:
+        return
+    now = timezone.now()
+    pks = [patient.pk for patient, _ in changes]
+    recorded = set(
+        PatientHistory.objects.filter(patient_id__in=pks, version_id__in={patient.version_id for patient, _ in changes})
+        .values_list("patient_id", "version_id")
+        .iterator()
+    )
+    history = [
+        PatientHistory(
+            patient_id=patient.pk,
+            version_id=patient.version_id,
+            method="POST" if patient.version_id == 1 else "PUT",
+            recorded_at=patient.update_date or now,
+            resource=serialize_patient(patient),
+        )
+        for patient, _ in changes
+        if (patient.pk, patient.version_id) not in recorded
+    ]
+
+    fields = {"version_id", "update_date"}
+    renamed = []
+    for patient, values in changes:
+        for field, value in values.items():
+            setattr(patient, field, value)
+        fields.update(values)
+        if values.keys() & NAME_FIELDS.keys():
+            renamed.append(patient)
+        if values.keys() & LOCATION_FIELDS:
+            patient.residence_geohash = location_cell(patient.residence_latitude, patient.residence_longitude)
+            fields.add("residence_geohash")
+        patient.version_id += 1
+        patient.update_date = now
+        history.append(
+            PatientHistory(
+                patient_id=patient.pk,
+                version_id=patient.version_id,
+                method="PUT",
+                recorded_at=now,
+                resource=serialize_patient(patient),
+            )
+        )
+
+    with transaction.atomic():
+        Patient.objects.bulk_update([patient for patient, _ in changes], sorted(fields), batch_size=batch_size)
+        PatientNameToken.objects.filter(patient_id__in=[patient.pk for patient in renamed]).delete()
+        insert_rows(
+            PatientNameToken,
+            [token for patient in renamed for token in PatientNameToken.for_patient(patient)],
+            batch_size,
+        )
+        insert_rows(PatientHistory, history, batch_size)
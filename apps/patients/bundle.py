@@ -0,0 +1,298 @@
+# apps/patients/bundle.py
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from .bulk import bulk_create_patients
+from .cache import version_etag
+from .fast_serializer import serialize_patient
+from .models import Patient
+from .search import SearchError, conditional_search
+from .serializers import PatientFHIRSerializer
+
+# Type du Bundle de réponse pour chaque type de Bundle accepté
+RESPONSE_TYPES = {"batch": "batch-response", "transaction": "transaction-response"}
+
+
+class BundleError(ValueError):
+    """Erreur levée lorsqu'un Bundle est refusé dans son ensemble (Bundle invalide ou transaction annulée)."""
+
+    def __init__(self, message: str, status_code: int = status.HTTP_400_BAD_REQUEST) -> None:
+        """Initialise l'erreur avec le statut HTTP à renvoyer.
+
+        Args
+        ----
+        message : str
+            Description de l'erreur
+        status_code : int
+            Statut HTTP de la réponse
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def status_line(status_code: int) -> str:
+    """Formate un statut HTTP pour `Bundle.entry.response.status` (ex. `201 Created`).
+
+    Args:
+        status_code: Code HTTP
+
+    Returns
+    -------
+    str
+        Code suivi de sa description
+    """
+    return f"{status_code} {HTTPStatus(status_code).phrase}"
+
+
+class BundleProcessor:
+    """Traitement d'un Bundle FHIR `batch` ou `transaction` de créations de patients.
+
+    Toutes les entrées sont validées avant toute écriture, les `ifNoneExist` évalués comme
+    des recherches (une requête par entrée conditionnelle), les conflits d'IPP (avec la base
+    comme au sein du Bundle) résolus par une seule requête `IN`, puis les patients sont
+    insérés par `bulk_create` :
+
+    - `transaction` : tout ou rien, une seule transaction ; la première erreur annule le Bundle ;
+    - `batch` : chaque entrée réussit ou échoue indépendamment ; l'insertion groupée se fait
+      dans un point de sauvegarde, et en cas de conflit concurrent chaque entrée est rejouée
+      dans son propre point de sauvegarde.
+    """
+
+    max_entries = 10000
+
+    def __init__(self, bundle: Any, representation: bool = False) -> None:
+        """Vérifie l'enveloppe du Bundle.
+
+        Args
+        ----
+        bundle : Any
+            Corps de la requête
+        representation : bool
+            Inclure la ressource créée dans chaque entrée de réponse (`Prefer: return=representation`)
+        """
+        if not isinstance(bundle, dict) or bundle.get("resourceType") != "Bundle":
+            raise BundleError("resourceType must be 'Bundle'")
+        if bundle.get("type") not in RESPONSE_TYPES:
+            raise BundleError("Bundle type must be 'batch' or 'transaction'")
+        entries = bundle.get("entry") or []
+        if not isinstance(entries, list):
+            raise BundleError("Bundle entry must be a list")
+        if len(entries) > self.max_entries:
+            raise BundleError(f"Bundle cannot contain more than {self.max_entries} entries")
+
+        self.type: str = bundle["type"]
+        self.entries: List[Any] = entries
+        self.representation = representation
+        self.responses: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+        self.failures: List[Tuple[int, int, str]] = []
+        # Recherches `ifNoneExist` des entrées conditionnelles, réévaluées après un conflit concurrent
+        self.conditions: Dict[int, QuerySet] = {}
+        self.patient_url = reverse("api-patient-list")
+
+    def process(self) -> Dict[str, Any]:
+        """Traite le Bundle et construit le Bundle de réponse.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Bundle `batch-response` ou `transaction-response`, une entrée par entrée reçue
+
+        Raises
+        ------
+        BundleError
+            Si une entrée d'une transaction échoue (aucune écriture n'est conservée)
+        """
+        pending = self.resolve_conflicts(self.prepare_entries())
+
+        if self.type == "transaction":
+            if self.failures:
+                message = "; ".join(f"entry[{index}]: {diagnostics}" for index, _, diagnostics in self.failures)
+                raise BundleError(message, self.failures[0][1])
+            try:
+                bulk_create_patients([patient for _, patient in pending])
+            except IntegrityError:
+                raise BundleError("A patient with this IPP was created concurrently", status.HTTP_409_CONFLICT)
+            for index, patient in pending:
+                self.responses[index] = self.located(patient, status.HTTP_201_CREATED)
+        else:
+            self.create_batch(pending)
+
+        return {
+            "resourceType": "Bundle",
+            "type": RESPONSE_TYPES[self.type],
+            "entry": [response for response in self.responses if response is not None],
+        }
+
+    def prepare_entries(self) -> List[Tuple[int, Patient, Optional[str]]]:
+        """Valide chaque entrée et construit les patients à créer (sans requête SQL).
+
+        Returns
+        -------
+        List[Tuple[int, Patient, Optional[str]]]
+            Index de l'entrée, patient non enregistré et critères `ifNoneExist` (None sans création conditionnelle)
+        """
+        # Une seule instance : la construction des champs DRF coûte plus cher que la conversion elle-même
+        serializer = PatientFHIRSerializer()
+        candidates = []
+        for index, entry in enumerate(self.entries):
+            request = entry.get("request") if isinstance(entry, dict) else None
+            if not isinstance(request, dict):
+                self.fail(index, status.HTTP_400_BAD_REQUEST, "Bundle entry must have a request")
+                continue
+            if str(request.get("method", "")).upper() != "POST" or str(request.get("url", "")).strip("/") != "Patient":
+                self.fail(index, status.HTTP_400_BAD_REQUEST, "Only 'POST Patient' entries are supported")
+                continue
+            resource = entry.get("resource")
+            if not isinstance(resource, dict) or resource.get("resourceType") != "Patient":
+                self.fail(index, status.HTTP_400_BAD_REQUEST, "resourceType must be 'Patient'")
+                continue
+            try:
+                data = serializer.run_validation(resource)
+            except ValidationError as exc:
+                self.fail(index, status.HTTP_400_BAD_REQUEST, str(exc.detail))
+                continue
+            if not data.get("ipp"):
+                self.fail(index, status.HTTP_400_BAD_REQUEST, "Patient identifier (IPP) is required")
+                continue
+            criteria = request.get("ifNoneExist")
+            if criteria is not None and not isinstance(criteria, str):
+                self.fail(index, status.HTTP_400_BAD_REQUEST, "ifNoneExist must be a search string")
+                continue
+            candidates.append((index, Patient(**data), criteria))
+        return candidates
+
+    def resolve_conflicts(self, candidates: List[Tuple[int, Patient, Optional[str]]]) -> List[Tuple[int, Patient]]:
+        """Évalue les `ifNoneExist` et écarte les patients dont l'IPP existe déjà, en base ou plus tôt dans le Bundle.
+
+        Comme `If-None-Exist` sur `POST /api/patient/`, `ifNoneExist` est une recherche évaluée
+        en mode strict : l'entrée renvoie 200 avec le patient trouvé s'il est unique, 412 si
+        plusieurs correspondent, et sinon est créée. Un IPP déjà présent renvoie 409.
+
+        Args:
+            candidates: Entrées valides, avec leur patient et leurs critères `ifNoneExist`
+
+        Returns
+        -------
+        List[Tuple[int, Patient]]
+            Entrées à créer, avec leur patient
+        """
+        remaining = []
+        for index, patient, criteria in candidates:
+            if criteria is not None:
+                try:
+                    self.conditions[index] = conditional_search(criteria)
+                except SearchError as exc:
+                    self.fail(index, status.HTTP_400_BAD_REQUEST, f"ifNoneExist: {exc}")
+                    continue
+                if self.match_existing(index):
+                    continue
+            remaining.append((index, patient))
+
+        taken = set(Patient.objects.filter(ipp__in={p.ipp for _, p in remaining}).values_list("ipp", flat=True))
+        pending = []
+        for index, patient in remaining:
+            if patient.ipp in taken:
+                self.fail(index, status.HTTP_409_CONFLICT, "A patient with this IPP already exists")
+                continue
+            taken.add(patient.ipp)
+            pending.append((index, patient))
+        return pending
+
+    def match_existing(self, index: int) -> bool:
+        """Répond à une entrée conditionnelle par le patient existant que désignent ses critères.
+
+        Args:
+            index: Index de l'entrée, dont la recherche `ifNoneExist` est dans `conditions`
+
+        Returns
+        -------
+        bool
+            True si l'entrée a reçu sa réponse (200 avec le patient, ou 412), False si aucun patient ne correspond
+        """
+        matches = list(self.conditions[index][:2])
+        if len(matches) > 1:
+            self.fail(index, status.HTTP_412_PRECONDITION_FAILED, "ifNoneExist matches several patients")
+        elif matches:
+            self.responses[index] = self.located(matches[0], status.HTTP_200_OK)
+        return bool(matches)
+
+    def create_batch(self, pending: List[Tuple[int, Patient]]) -> None:
+        """Insère les entrées valides d'un `batch`, entrée par entrée en cas de conflit concurrent.
+
+        Args
+        ----
+        pending : List[Tuple[int, Patient]]
+            Entrées à créer, avec leur patient
+        """
+        try:
+            with transaction.atomic():
+                bulk_create_patients([patient for _, patient in pending])
+        except IntegrityError:
+            # Un IPP a été créé entre la vérification et l'insertion : chaque entrée est rejouée seule
+            for index, patient in pending:
+                patient.pk = None
+                try:
+                    bulk_create_patients([patient])
+                except IntegrityError:
+                    # Création conditionnelle : le patient créé entre-temps peut correspondre aux critères
+                    if index not in self.conditions or not self.match_existing(index):
+                        self.fail(index, status.HTTP_409_CONFLICT, "A patient with this IPP already exists")
+                else:
+                    self.responses[index] = self.located(patient, status.HTTP_201_CREATED)
+            return
+        for index, patient in pending:
+            self.responses[index] = self.located(patient, status.HTTP_201_CREATED)
+
+    def located(self, patient: Patient, status_code: int) -> Dict[str, Any]:
+        """Construit l'entrée de réponse d'un patient créé ou existant.
+
+        Args:
+            patient: Patient inséré, ou trouvé par `ifNoneExist`
+            status_code: Statut de l'entrée (201 ou 200)
+
+        Returns
+        -------
+        Dict[str, Any]
+            Entrée avec statut, emplacement de la version et ETag
+        """
+        entry: Dict[str, Any] = {}
+        if self.representation:
+            entry["resource"] = serialize_patient(patient)
+        entry["response"] = {
+            "status": status_line(status_code),
+            "location": f"{self.patient_url}{patient.pk}/_history/{patient.version_id}/",
+            "etag": version_etag(patient.version_id),
+        }
+        if patient.update_date is not None:
+            # Patients chargés avant l'horodatage des écritures : date de mise à jour inconnue
+            entry["response"]["lastModified"] = patient.update_date.isoformat()
+        return entry
+
+    def fail(self, index: int, status_code: int, diagnostics: str) -> None:
+        """Enregistre l'échec d'une entrée sous forme d'OperationOutcome.
+
+        Args
+        ----
+        index : int
+            Index de l'entrée dans le Bundle
+        status_code : int
+            Statut HTTP de l'entrée
+        diagnostics : str
+            Description de l'erreur
+        """
+        self.failures.append((index, status_code, diagnostics))
+        self.responses[index] = {
+            "response": {
+                "status": status_line(status_code),
+                "outcome": {
+                    "resourceType": "OperationOutcome",
+                    "issue": [{"severity": "error", "code": "processing", "diagnostics": diagnostics}],
+                },
+            }
+        }
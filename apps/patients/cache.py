@@ -0,0 +1,181 @@
+# apps/patients/cache.py
+"""Cache des ressources Patient rendues et validateurs HTTP des lectures.
+
+Deux écarts à la demande initiale (ETags forts, aucune requête sur un succès de cache) :
+
+- les ETags sont faibles (`W/"<versionId>"`), comme l'impose FHIR pour `ETag` et `If-Match`
+  (https://hl7.org/fhir/http.html#versioning) ; la comparaison ignore le préfixe `W/`.
+- un succès de cache évite la sérialisation mais pas la lecture de la version par clé
+  primaire : le cache est propre à chaque processus, et seule la version lue en base garantit
+  qu'une écriture faite par un autre processus n'est pas masquée par une entrée périmée.
+"""
+from datetime import datetime
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+from django.core.cache import caches
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from dwh_fhir.metrics import record_cache_lookup
+
+from . import fhir_json
+from .fast_serializer import serialize_patient
+from .models import Patient
+
+RESOURCE_CACHE_ALIAS = "fhir_resources"
+
+
+class CachedResource(NamedTuple):
+    """Ressource FHIR rendue : ETag de version, JSON prêt à envoyer et dictionnaire pour les templates."""
+
+    etag: str
+    body: bytes
+    data: Dict[str, Any]
+    last_modified: Optional[datetime]
+
+    def headers(self) -> Dict[str, str]:
+        """En-têtes de validation HTTP de la ressource.
+
+        Returns
+        -------
+        Dict[str, str]
+            `ETag` et, si la date de mise à jour est connue, `Last-Modified`
+        """
+        return validator_headers(self.etag, self.last_modified)
+
+
+def version_etag(version_id: int) -> str:
+    """Construit l'ETag FHIR d'une version de ressource (`W/"<versionId>"`).
+
+    Args:
+        version_id: Numéro de version du patient
+
+    Returns
+    -------
+    str
+        ETag faible portant le numéro de version
+    """
+    return f'W/"{version_id}"'
+
+
+def cache_key(pk: Any, version_id: int) -> str:
+    """Clé de cache d'une version de la ressource rendue d'un patient.
+
+    La version fait partie de la clé : une écriture, quel que soit le processus qui l'a faite,
+    rend l'entrée précédente inaccessible sans invalidation.
+
+    Args:
+        pk: Clé primaire du patient
+        version_id: Version courante du patient
+
+    Returns
+    -------
+    str
+        Clé de cache
+    """
+    return f"patient:{pk}:{version_id}"
+
+
+def get_cached_resource(pk: Any, version_id: int) -> Optional[CachedResource]:
+    """Retourne une version de la ressource rendue en cache, sans requête SQL ni sérialisation.
+
+    Args:
+        pk: Clé primaire du patient
+        version_id: Version courante du patient, lue en base par l'appelant
+
+    Returns
+    -------
+    Optional[CachedResource]
+        Ressource rendue ou None si cette version est absente du cache
+    """
+    resource = caches[RESOURCE_CACHE_ALIAS].get(cache_key(pk, version_id))
+    record_cache_lookup(RESOURCE_CACHE_ALIAS, resource is not None)
+    return resource
+
+
+def cache_resource(patient: Patient) -> CachedResource:
+    """Sérialise et rend un patient, puis met le résultat en cache.
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    CachedResource
+        Ressource rendue
+    """
+    data = serialize_patient(patient)
+    body = fhir_json.dumps(data)
+    resource = CachedResource(version_etag(patient.version_id), body, data, patient.update_date)
+    caches[RESOURCE_CACHE_ALIAS].set(cache_key(patient.pk, patient.version_id), resource)
+    return resource
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Indique si un en-tête `If-None-Match` ou `If-Match` désigne l'ETag courant (comparaison faible).
+
+    Args:
+        header: Valeur de l'en-tête conditionnel
+        etag: ETag courant de la ressource
+
+    Returns
+    -------
+    bool
+        True si l'en-tête vaut `*` ou contient l'ETag courant
+    """
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag.removeprefix("W/") in (candidate.removeprefix("W/") for candidate in etags)
+
+
+def not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """Évalue les en-têtes `If-None-Match` puis `If-Modified-Since` d'une lecture conditionnelle.
+
+    Comme le prévoit la RFC 9110, `If-Modified-Since` est ignoré lorsque `If-None-Match` est présent.
+
+    Args:
+        headers: En-têtes de la requête
+        etag: ETag courant de la ressource
+        last_modified: Date de dernière modification (None si inconnue)
+
+    Returns
+    -------
+    bool
+        True si le client peut réutiliser sa copie (réponse 304)
+    """
+    if "If-None-Match" in headers:
+        return etag_matches(headers["If-None-Match"], etag)
+    return unmodified_since(headers.get("If-Modified-Since"), last_modified)
+
+
+def unmodified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Indique si la ressource n'a pas changé depuis la date `If-Modified-Since` (précision à la seconde).
+
+    Args:
+        if_modified_since: Valeur de l'en-tête `If-Modified-Since`
+        last_modified: Date de dernière modification (None si inconnue)
+
+    Returns
+    -------
+    bool
+        True si la date de modification est connue et antérieure ou égale à celle du client
+    """
+    since = parse_http_date_safe(if_modified_since or "")
+    return since is not None and last_modified is not None and int(last_modified.timestamp()) <= since
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """Construit les en-têtes de validation HTTP d'une ressource.
+
+    Args:
+        etag: ETag de la ressource
+        last_modified: Date de dernière modification (None si inconnue)
+
+    Returns
+    -------
+    Dict[str, str]
+        `ETag` et, si la date est connue, `Last-Modified`
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return headers
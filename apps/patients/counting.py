@@ -0,0 +1,224 @@
+# apps/patients/counting.py
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Optional, Type
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, router
+from django.db.models import Max, Min, QuerySet
+from dwh_fhir.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Modes du paramètre FHIR `_total`
+TOTAL_MODES = ("none", "estimate", "accurate")
+
+# Âge au-delà duquel l'estimation d'une table est recalculée en arrière-plan, et durée de conservation
+ESTIMATE_MAX_AGE = 60
+ESTIMATE_TIMEOUT = 3600
+# Durée de conservation d'un décompte exact (la clé inclut la date de dernière écriture)
+EXACT_COUNT_TIMEOUT = 600
+# Nombre de lignes au-delà duquel une estimation filtrée n'est pas comptée
+ESTIMATE_COUNT_LIMIT = 1000
+
+
+def read_table_estimate(model: Type[models.Model], exact: bool = False) -> int:
+    """Lit le nombre de lignes d'une table dans les statistiques de la base.
+
+    PostgreSQL fournit une estimation tenue à jour par `ANALYZE` / autovacuum (`pg_class.reltuples`).
+    Les autres bases n'en ont pas : `exact` autorise un `COUNT(*)` (réservé au rafraîchissement
+    en arrière-plan), sinon l'étendue des clés primaires, lue sur l'index, sert d'approximation.
+
+    Args:
+        model: Modèle dont la table est estimée
+        exact: Autoriser un `COUNT(*)` lorsque la base ne tient pas de statistiques
+
+    Returns
+    -------
+    int
+        Nombre de lignes estimé
+    """
+    alias = router.db_for_read(model)
+    connection = connections[alias]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 : table jamais analysée
+        if row and row[0] >= 0:
+            return int(row[0])
+    if exact:
+        return model._default_manager.using(alias).count()
+    bounds = model._default_manager.using(alias).aggregate(low=Min("pk"), high=Max("pk"))
+    return 0 if bounds["high"] is None else bounds["high"] - bounds["low"] + 1
+
+
+def estimate_key(model: Type[models.Model]) -> str:
+    """Clé de cache de l'estimation d'une table.
+
+    Args:
+        model: Modèle de la table
+
+    Returns
+    -------
+    str
+        Clé de cache
+    """
+    return f"table-estimate:{model._meta.db_table}"
+
+
+def refresh_estimate(model: Type[models.Model]) -> int:
+    """Recalcule l'estimation d'une table et la met en cache.
+
+    Args:
+        model: Modèle de la table
+
+    Returns
+    -------
+    int
+        Nombre de lignes estimé
+    """
+    value = read_table_estimate(model, exact=True)
+    cache.set(estimate_key(model), (value, time.time()), ESTIMATE_TIMEOUT)
+    return value
+
+
+def _refresh_in_background(model: Type[models.Model]) -> None:
+    try:
+        refresh_estimate(model)
+    except Exception:
+        logger.exception("Échec du rafraîchissement de l'estimation de %s", model._meta.db_table)
+    finally:
+        cache.delete(f"{estimate_key(model)}:refreshing")
+        connections.close_all()
+
+
+def estimated_count(model: Type[models.Model]) -> int:
+    """Retourne le nombre de lignes estimé d'une table, sans `COUNT(*)` sur le chemin de la requête.
+
+    L'estimation est servie depuis le cache ; trop ancienne, elle est tout de même renvoyée
+    et recalculée dans un thread (un seul à la fois). En l'absence d'estimation, l'étendue
+    des clés primaires sert de valeur initiale.
+
+    Args:
+        model: Modèle de la table
+
+    Returns
+    -------
+    int
+        Nombre de lignes estimé
+    """
+    key = estimate_key(model)
+    entry = cache.get(key)
+    record_cache_lookup("estimated_count", entry is not None)
+    if entry is None:
+        value, computed_at = read_table_estimate(model), 0.0
+        cache.set(key, (value, computed_at), ESTIMATE_TIMEOUT)
+    else:
+        value, computed_at = entry
+    if time.time() - computed_at > ESTIMATE_MAX_AGE and cache.add(f"{key}:refreshing", True, 30):
+        threading.Thread(target=_refresh_in_background, args=(model,), daemon=True).start()
+    return value
+
+
+def count_key(queryset: QuerySet, version: Any = None) -> Optional[str]:
+    """Clé de cache du décompte exact d'un queryset.
+
+    Args:
+        queryset: Queryset compté
+        version: Marqueur de la dernière écriture sur la table
+
+    Returns
+    -------
+    Optional[str]
+        Clé dérivée de la requête SQL (sans tri ni colonnes), de ses paramètres et du marqueur,
+        ou None si la requête ne peut rien renvoyer (`IN` vide : aucune requête SQL n'est générée)
+    """
+    try:
+        sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    return f"exact-count:{hashlib.sha1(f'{sql}|{params!r}|{version}'.encode()).hexdigest()}"
+
+
+def exact_count(queryset: QuerySet, version: Any = None) -> int:
+    """Compte exactement les résultats d'un queryset, en cache par requête SQL.
+
+    Args:
+        queryset: Queryset à compter
+        version: Marqueur de la dernière écriture sur la table (date) ; un décompte
+            mis en cache avant une écriture n'est alors plus réutilisé
+
+    Returns
+    -------
+    int
+        Nombre de résultats
+    """
+    key = count_key(queryset, version)
+    if key is None:
+        return 0
+    count = cache.get(key)
+    record_cache_lookup("exact_count", count is not None)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, EXACT_COUNT_TIMEOUT)
+    return count
+
+
+def estimated_search_count(queryset: QuerySet, version: Any = None) -> Optional[int]:
+    """Estime le nombre de résultats d'une recherche sans `COUNT(*)` complet.
+
+    Sans filtre, l'estimation de la table est renvoyée. Avec filtre : décompte exact déjà
+    en cache, estimation du planificateur PostgreSQL, ou décompte borné à `ESTIMATE_COUNT_LIMIT`.
+
+    Args:
+        queryset: Queryset de la recherche
+        version: Marqueur de la dernière écriture sur la table
+
+    Returns
+    -------
+    Optional[int]
+        Nombre estimé, ou None si aucune estimation bon marché n'est disponible
+    """
+    if not queryset.query.where:
+        return estimated_count(queryset.model)
+
+    key = count_key(queryset, version)
+    if key is None:
+        return 0
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            return int(cursor.fetchone()[0][0]["Plan"]["Plan Rows"])
+
+    count = queryset.order_by()[: ESTIMATE_COUNT_LIMIT + 1].count()
+    return count if count <= ESTIMATE_COUNT_LIMIT else None
+
+
+def search_total(queryset: QuerySet, mode: str, version: Any = None) -> Optional[int]:
+    """Calcule le `total` d'un Bundle selon le mode `_total`.
+
+    Args:
+        queryset: Queryset de la recherche
+        mode: `none`, `estimate` ou `accurate`
+        version: Marqueur de la dernière écriture sur la table
+
+    Returns
+    -------
+    Optional[int]
+        Total à renvoyer, ou None s'il doit être omis
+    """
+    if mode == "accurate":
+        return exact_count(queryset, version)
+    if mode == "estimate":
+        return estimated_search_count(queryset, version)
+    return None
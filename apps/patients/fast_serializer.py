@@ -0,0 +1,277 @@
+# apps/patients/fast_serializer.py
+from datetime import datetime
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+from django.utils.timezone import localtime
+from dwh_fhir.timing import timed
+
+from .models import Patient
+
+IPP_SYSTEM = "urn:oid:1.2.250.1.213.1.4.8"
+DEATH_CAUSE_SYSTEM = "urn:oid:1.2.250.1.213.1.4.5.2"
+GEOLOCATION_URL = "http://hl7.org/fhir/StructureDefinition/geolocation"
+BIRTH_PLACE_URL = "http://hl7.org/fhir/StructureDefinition/patient-birthPlace"
+DEATH_DATE_URL = "http://hl7.org/fhir/StructureDefinition/patient-deathDate"
+DEATH_CAUSE_URL = "http://hl7.org/fhir/StructureDefinition/patient-deathCause"
+GENDER_MAPPING = {"M": "male", "F": "female", "O": "other"}
+SUBSETTED_TAG = {"system": "http://terminology.hl7.org/CodeSystem/v3-ObservationValue", "code": "SUBSETTED"}
+
+
+def geolocation(latitude: float, longitude: float) -> List[Dict[str, Any]]:
+    """Construit l'extension FHIR de géolocalisation.
+
+    Args:
+        latitude: Latitude en degrés décimaux
+        longitude: Longitude en degrés décimaux
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Liste contenant l'extension `geolocation`
+    """
+    return [
+        {
+            "url": GEOLOCATION_URL,
+            "extension": [
+                {"url": "latitude", "valueDecimal": latitude},
+                {"url": "longitude", "valueDecimal": longitude},
+            ],
+        }
+    ]
+
+
+def identifier_element(patient: Patient) -> List[Dict[str, Any]]:
+    """Construit l'élément `identifier` (IPP).
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Identifiant IPP
+    """
+    identifier: Dict[str, Any] = {"system": IPP_SYSTEM}
+    if patient.ipp is not None:
+        identifier["value"] = patient.ipp
+    return [identifier]
+
+
+def name_element(patient: Patient) -> List[Dict[str, Any]]:
+    """Construit l'élément `name` (nom officiel, prénom et nom de naissance).
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Nom officiel du patient
+    """
+    name: Dict[str, Any] = {"use": "official"}
+    if patient.last_name is not None:
+        name["family"] = patient.last_name
+    if patient.first_name:
+        name["given"] = [patient.first_name]
+    if patient.maiden_name:
+        name["maiden"] = patient.maiden_name
+    return [name]
+
+
+def telecom_element(patient: Patient) -> Optional[List[Dict[str, Any]]]:
+    """Construit l'élément `telecom` si un numéro de téléphone est renseigné.
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    Optional[List[Dict[str, Any]]]
+        Téléphone, ou None
+    """
+    if patient.phone_number:
+        return [{"system": "phone", "value": patient.phone_number, "use": "home"}]
+    return None
+
+
+def birth_date_element(patient: Patient) -> Optional[str]:
+    """Construit l'élément `birthDate` si la date de naissance est renseignée.
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    Optional[str]
+        Date au format AAAA-MM-JJ, ou None
+    """
+    return patient.birth_date.strftime("%Y-%m-%d") if patient.birth_date else None
+
+
+def deceased_element(patient: Patient) -> Optional[str]:
+    """Construit l'élément `deceasedDateTime` si la date de décès est renseignée.
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    Optional[str]
+        Date de décès formatée, ou None
+    """
+    death_date = patient.death_date
+    if isinstance(death_date, str):
+        return death_date
+    return death_date.strftime("%d/%m/%Y à %H:%M") if death_date else None
+
+
+def address_element(patient: Patient) -> Optional[List[Dict[str, Any]]]:
+    """Construit l'élément `address` (résidence) si une composante de l'adresse est renseignée.
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    Optional[List[Dict[str, Any]]]
+        Adresse de résidence, ou None
+    """
+    if not (
+        patient.residence_address or patient.residence_city or patient.residence_zip_code or patient.residence_country
+    ):
+        return None
+    address: Dict[str, Any] = {"use": "home", "type": "both"}
+    if patient.residence_address:
+        address["line"] = [patient.residence_address]
+    if patient.residence_city is not None:
+        address["city"] = patient.residence_city
+    if patient.residence_zip_code is not None:
+        address["postalCode"] = patient.residence_zip_code
+    if patient.residence_country is not None:
+        address["country"] = patient.residence_country
+    if patient.residence_latitude is not None and patient.residence_longitude is not None:
+        address["extension"] = geolocation(patient.residence_latitude, patient.residence_longitude)
+    return [address]
+
+
+def extension_element(patient: Patient) -> Optional[List[Dict[str, Any]]]:
+    """Construit les extensions lieu de naissance, date et cause de décès.
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    Optional[List[Dict[str, Any]]]
+        Extensions renseignées, ou None
+    """
+    extensions: List[Dict[str, Any]] = []
+    if patient.birth_city or patient.birth_country or patient.birth_zip_code:
+        value_address: Dict[str, Any] = {}
+        if patient.birth_city is not None:
+            value_address["city"] = patient.birth_city
+        if patient.birth_zip_code is not None:
+            value_address["postalCode"] = patient.birth_zip_code
+        if patient.birth_country is not None:
+            value_address["country"] = patient.birth_country
+        if patient.birth_latitude is not None and patient.birth_longitude is not None:
+            value_address["extension"] = geolocation(patient.birth_latitude, patient.birth_longitude)
+        extensions.append({"url": BIRTH_PLACE_URL, "valueAddress": value_address})
+    if patient.death_date:
+        extensions.append({"url": DEATH_DATE_URL, "valueDateTime": patient.death_date.isoformat()})
+    if patient.death_code:
+        extensions.append(
+            {
+                "url": DEATH_CAUSE_URL,
+                "valueCodeableConcept": {"coding": [{"system": DEATH_CAUSE_SYSTEM, "code": patient.death_code}]},
+            }
+        )
+    return extensions or None
+
+
+def meta_element(patient: Patient) -> Dict[str, Any]:
+    """Construit l'élément `meta` (version et date de mise à jour).
+
+    Args:
+        patient: Instance du modèle Patient
+
+    Returns
+    -------
+    Dict[str, Any]
+        `versionId` et `lastUpdated`
+    """
+    if patient.update_date:
+        last_updated = localtime(patient.update_date).strftime("%d/%m/%Y à %H:%M")
+    else:
+        last_updated = datetime.now().strftime("%d/%m/%Y à %H:%M")
+    return {"versionId": str(patient.version_id), "lastUpdated": last_updated}
+
+
+# Éléments FHIR du patient dans l'ordre de la ressource, avec leur constructeur
+# et les colonnes du modèle qu'il lit (`id` et `meta` sont toujours émis)
+ELEMENTS: Dict[str, Tuple[Callable[[Patient], Any], Tuple[str, ...]]] = {
+    "identifier": (identifier_element, ("ipp",)),
+    "active": (lambda patient: True, ()),
+    "name": (name_element, ("last_name", "first_name", "maiden_name")),
+    "telecom": (telecom_element, ("phone_number",)),
+    "gender": (lambda patient: GENDER_MAPPING.get(patient.sex, "unknown"), ("sex",)),
+    "birthDate": (birth_date_element, ("birth_date",)),
+    "deceasedDateTime": (deceased_element, ("death_date",)),
+    "address": (
+        address_element,
+        (
+            "residence_address",
+            "residence_city",
+            "residence_zip_code",
+            "residence_country",
+            "residence_latitude",
+            "residence_longitude",
+        ),
+    ),
+    "extension": (
+        extension_element,
+        (
+            "birth_city",
+            "birth_zip_code",
+            "birth_country",
+            "birth_latitude",
+            "birth_longitude",
+            "death_date",
+            "death_code",
+        ),
+    ),
+}
+META_FIELDS = ("version_id", "update_date")
+
+
+@timed("serializer")
+def serialize_patient(patient: Patient, elements: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """Convertit un patient en ressource FHIR sans passer par la mécanique des champs DRF.
+
+    Chemin de lecture rapide équivalent à `PatientFHIRSerializer(patient).data` : les
+    éléments sont construits dans le même ordre et seuls les éléments renseignés sont
+    émis, ce qui évite les 16 `SerializerMethodField` et la passe récursive `clean_data`.
+
+    Avec `elements`, seuls les éléments demandés sont construits : le patient peut avoir
+    été chargé avec les seules colonnes de ces éléments (`.only()`), et la ressource est
+    marquée `SUBSETTED` comme le prévoit FHIR.
+
+    Args:
+        patient: Instance du modèle Patient
+        elements: Éléments FHIR à construire (tous si absent), en plus de `id` et `meta`
+
+    Returns
+    -------
+    Dict[str, Any]
+        Représentation FHIR du patient
+    """
+    resource: Dict[str, Any] = {"resourceType": "Patient", "id": str(patient.pk)}
+    for element, (build, _) in ELEMENTS.items():
+        if elements is None or element in elements:
+            value = build(patient)
+            if value is not None:
+                resource[element] = value
+    resource["meta"] = meta_element(patient)
+    if elements is not None:
+        resource["meta"]["tag"] = [SUBSETTED_TAG]
+    return resource
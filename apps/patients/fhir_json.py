@@ -0,0 +1,70 @@
+# apps/patients/fhir_json.py
+import json
+from typing import Any, Union
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Les dates passent par l'encodeur DRF (millisecondes, suffixe `Z`) pour un rendu identique à `JSONRenderer`.
+# Les clés non textuelles, qui ralentissent tout l'encodage, ne sont acceptées qu'en second essai.
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+ORJSON_NON_STR_KEYS_OPTIONS = (ORJSON_OPTIONS | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+_encoder = JSONEncoder()
+
+
+def dumps(data: Any) -> bytes:
+    """Encode des données en JSON compact UTF-8, octet pour octet comme le `JSONRenderer` de DRF.
+
+    Utilise `orjson` s'il est installé, le module `json` de la bibliothèque standard sinon.
+
+    Args:
+        data: Données à encoder (types non natifs convertis par l'encodeur DRF)
+
+    Returns
+    -------
+    bytes
+        Document JSON
+    """
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            content = orjson.dumps(data, default=_encoder.default, option=ORJSON_NON_STR_KEYS_OPTIONS)
+        # Séparateurs U+2028 et U+2029 échappés comme le fait DRF ; leur premier octet est cherché seul (memchr)
+        if b"\xe2" in content:
+            content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return content
+    text = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """Décode un document JSON.
+
+    Args:
+        content: Document JSON (UTF-8 s'il est fourni en octets)
+
+    Returns
+    -------
+    Any
+        Données décodées
+
+    Raises
+    ------
+    ValueError
+        Si le document n'est pas du JSON valide (`NaN` et `Infinity` compris)
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content, parse_constant=_reject_constant)
+
+
+def _reject_constant(value: str) -> Any:
+    raise ValueError(f"Invalid JSON constant: {value}")
@@ -0,0 +1,243 @@
+# apps/patients/geo.py
+import math
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import Expression, F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+# Alphabet base 32 du geohash, dans l'ordre ASCII : l'ordre des chaînes suit celui des cellules
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Précision des geohash stockés : cellules d'environ 150 m de côté
+GEOHASH_PRECISION = 7
+# Nombre maximal de cellules (intervalles d'index) lues par une recherche `near`
+MAX_NEAR_CELLS = 16
+
+# Valeur absolue maximale de chaque colonne de coordonnées du patient
+COORDINATE_LIMITS = {
+    "residence_latitude": 90.0,
+    "residence_longitude": 180.0,
+    "birth_latitude": 90.0,
+    "birth_longitude": 180.0,
+}
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def parse_coordinate(value: Any, limit: float) -> Optional[float]:
+    """Convertit une latitude ou une longitude saisie (nombre ou chaîne, virgule décimale acceptée).
+
+    Args:
+        value: Valeur brute (None ou chaîne vide : coordonnée absente)
+        limit: Valeur absolue maximale (90 pour une latitude, 180 pour une longitude)
+
+    Returns
+    -------
+    Optional[float]
+        Coordonnée en degrés décimaux, ou None si elle est absente
+
+    Raises
+    ------
+    ValueError
+        Si la valeur n'est pas un nombre fini compris entre `-limit` et `limit`
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid coordinate: {value!r}")
+    number = float(value.strip().replace(",", ".") if isinstance(value, str) else value)
+    if not math.isfinite(number) or abs(number) > limit:
+        raise ValueError(f"Coordinate out of range [-{limit:g}, {limit:g}]: {value!r}")
+    return number
+
+
+def geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode une position en geohash (bits de longitude et de latitude entrelacés, base 32).
+
+    Args:
+        latitude: Latitude en degrés
+        longitude: Longitude en degrés
+        precision: Nombre de caractères
+
+    Returns
+    -------
+    str
+        Geohash de la cellule contenant la position
+    """
+    bounds = [[-90.0, 90.0], [-180.0, 180.0]]
+    position = (latitude, longitude)
+    chars = []
+    bits = 0
+    axis = 1  # Le premier bit porte sur la longitude
+    for index in range(precision * 5):
+        low, high = bounds[axis]
+        middle = (low + high) / 2
+        bits <<= 1
+        if position[axis] >= middle:
+            bits |= 1
+            bounds[axis][0] = middle
+        else:
+            bounds[axis][1] = middle
+        axis = 1 - axis
+        if index % 5 == 4:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+    return "".join(chars)
+
+
+def location_cell(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """Geohash stocké pour une position, None si elle est incomplète.
+
+    Args:
+        latitude: Latitude en degrés
+        longitude: Longitude en degrés
+
+    Returns
+    -------
+    Optional[str]
+        Geohash de précision `GEOHASH_PRECISION`
+    """
+    if latitude is None or longitude is None:
+        return None
+    return geohash(latitude, longitude)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Hauteur et largeur en degrés d'une cellule geohash.
+
+    Args:
+        precision: Nombre de caractères du geohash
+
+    Returns
+    -------
+    Tuple[float, float]
+        Hauteur (latitude) et largeur (longitude)
+    """
+    bits = precision * 5
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def next_prefix(prefix: str) -> str:
+    """Plus petite chaîne supérieure à toutes celles qui commencent par `prefix`.
+
+    Args:
+        prefix: Geohash non vide
+
+    Returns
+    -------
+    str
+        Borne haute exclue des geohash de la cellule (chaîne vide : aucune borne)
+    """
+    while prefix and prefix[-1] == GEOHASH_ALPHABET[-1]:
+        prefix = prefix[:-1]
+    if not prefix:
+        return ""
+    return prefix[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(prefix[-1]) + 1]
+
+
+def bounding_box(latitude: float, longitude: float, distance: float) -> Tuple[float, float, float, float]:
+    """Rectangle (en degrés) contenant le disque de rayon `distance` autour d'une position.
+
+    Le rectangle n'est pas étendu au-delà de l'antiméridien : les positions situées de
+    l'autre côté de la longitude ±180 ne sont pas trouvées.
+
+    Args:
+        latitude: Latitude du centre
+        longitude: Longitude du centre
+        distance: Rayon en kilomètres
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        Latitudes minimale et maximale, longitudes minimale et maximale
+    """
+    delta_latitude = distance / KM_PER_DEGREE
+    south, north = max(latitude - delta_latitude, -90.0), min(latitude + delta_latitude, 90.0)
+    # Largeur maximale du disque, atteinte sur le bord le plus proche du pôle
+    cos_latitude = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_latitude * KM_PER_DEGREE * 180 <= distance:
+        return south, north, -180.0, 180.0
+    delta_longitude = distance / (KM_PER_DEGREE * cos_latitude)
+    return south, north, max(longitude - delta_longitude, -180.0), min(longitude + delta_longitude, 180.0)
+
+
+def covering_ranges(box: Tuple[float, float, float, float]) -> List[Tuple[str, str]]:
+    """Intervalles de geohash couvrant un rectangle, pour une lecture par index.
+
+    La précision retenue est la plus fine couvrant le rectangle avec au plus
+    `MAX_NEAR_CELLS` cellules ; les cellules consécutives dans l'ordre des geohash sont
+    fusionnées en un seul intervalle.
+
+    Args:
+        box: Latitudes minimale et maximale, longitudes minimale et maximale
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        Intervalles `[début, fin)` de geohash (fin vide : pas de borne haute)
+    """
+    south, north, west, east = box
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor((north + 90) / height) - math.floor((south + 90) / height) + 1
+        columns = math.floor((east + 180) / width) - math.floor((west + 180) / width) + 1
+        if rows * columns <= MAX_NEAR_CELLS or precision == 1:
+            break
+    cells = set()
+    for row in range(rows):
+        for column in range(columns):
+            # Centre de chaque cellule traversée par le rectangle
+            cell_latitude = (math.floor((south + 90) / height) + row + 0.5) * height - 90
+            cell_longitude = (math.floor((west + 180) / width) + column + 0.5) * width - 180
+            cells.add(geohash(min(cell_latitude, 90.0), min(cell_longitude, 180.0), precision))
+
+    ranges: List[Tuple[str, str]] = []
+    for cell in sorted(cells):
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1] = (ranges[-1][0], next_prefix(cell))
+        else:
+            ranges.append((cell, next_prefix(cell)))
+    return ranges
+
+
+def distance_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Distance orthodromique (formule de haversine) entre deux positions.
+
+    Args:
+        latitude1: Latitude de la première position
+        longitude1: Longitude de la première position
+        latitude2: Latitude de la seconde position
+        longitude2: Longitude de la seconde position
+
+    Returns
+    -------
+    float
+        Distance en kilomètres
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    half_chord = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(half_chord)))
+
+
+def distance_expression(latitude: float, longitude: float) -> Expression:
+    """Expression SQL de la distance (haversine, en kilomètres) entre l'adresse d'un patient et une position.
+
+    Les fonctions trigonométriques sont natives sous PostgreSQL et fournies par Django sous
+    SQLite ; elles ne sont évaluées que sur les lignes lues par l'index geohash.
+
+    Args:
+        latitude: Latitude de la position de référence
+        longitude: Longitude de la position de référence
+
+    Returns
+    -------
+    Expression
+        Distance en kilomètres
+    """
+    half_chord = Power(Sin(Radians(F("residence_latitude") - latitude) / 2), 2) + Value(
+        math.cos(math.radians(latitude))
+    ) * Cos(Radians(F("residence_latitude"))) * Power(Sin(Radians(F("residence_longitude") - longitude) / 2), 2)
+    return ASin(Sqrt(half_chord), output_field=FloatField()) * (2 * EARTH_RADIUS_KM)
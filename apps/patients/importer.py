@@ -0,0 +1,192 @@
+# apps/patients/importer.py
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.timezone import is_naive, make_aware
+from rest_framework import serializers
+
+from . import fhir_json
+from .bulk import bulk_create_patients, bulk_update_patients
+from .geo import COORDINATE_LIMITS, parse_coordinate
+from .models import Patient
+from .search import GENDER_CODES
+from .serializers import PatientFHIRSerializer
+
+# Colonnes de `dwh_patient` ignorées à l'import : clé technique et champs maintenus par `Patient.save`
+IGNORED_COLUMNS = {"id", "version_id", "update_date", "residence_geohash"}
+IMPORT_FIELDS = {field.name: field for field in Patient._meta.concrete_fields if field.name not in IGNORED_COLUMNS}
+
+# Enregistrement source : numéro (ligne NDJSON ou ligne de données CSV) et valeurs des colonnes
+Record = Tuple[int, Dict[str, Any]]
+Reject = Tuple[int, str]
+
+_serializer: Optional[PatientFHIRSerializer] = None
+
+
+class UpsertResult(NamedTuple):
+    """Bilan de l'import d'un lot.
+
+    `unchanged` compte aussi les enregistrements remplacés par un enregistrement
+    ultérieur du même IPP dans le lot.
+    """
+
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+def clean_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertit et valide les valeurs d'un enregistrement avec les champs du modèle.
+
+    Args:
+        values: Valeurs brutes par nom de colonne (chaîne vide équivalente à une valeur absente)
+
+    Returns
+    -------
+    Dict[str, Any]
+        Valeurs typées, prêtes pour `Patient`
+
+    Raises
+    ------
+    ValidationError
+        Si une valeur est invalide (type, longueur, IPP manquant)
+    """
+    cleaned = {}
+    for name, value in values.items():
+        if name in IGNORED_COLUMNS:
+            continue
+        try:
+            if name in COORDINATE_LIMITS:
+                # Virgule décimale acceptée, bornes vérifiées
+                value = parse_coordinate(value, COORDINATE_LIMITS[name])
+            else:
+                value = IMPORT_FIELDS[name].clean(None if value == "" else value, None)
+        except ValidationError as exc:
+            raise ValidationError(f"{name}: {' '.join(exc.messages)}")
+        except (TypeError, ValueError) as exc:
+            raise ValidationError(f"{name}: {exc}")
+        if isinstance(value, datetime) and is_naive(value):
+            value = make_aware(value)
+        cleaned[name] = value
+    if not cleaned.get("ipp"):
+        raise ValidationError("ipp: This field cannot be blank.")
+    return cleaned
+
+
+def parse_ndjson(lines: List[Tuple[int, str]]) -> Tuple[List[Record], List[Reject]]:
+    """Convertit un lot de lignes NDJSON (ressources Patient FHIR) en valeurs de colonnes.
+
+    Exécutée dans les processus de travail : aucune requête SQL.
+
+    Args:
+        lines: Numéros et contenus des lignes
+
+    Returns
+    -------
+    Tuple[List[Record], List[Reject]]
+        Enregistrements valides et enregistrements rejetés avec leur motif
+    """
+    global _serializer
+    if _serializer is None:
+        _serializer = PatientFHIRSerializer()
+
+    records: List[Record] = []
+    rejects: List[Reject] = []
+    for number, line in lines:
+        try:
+            resource = fhir_json.loads(line)
+            if not isinstance(resource, dict) or resource.get("resourceType") != "Patient":
+                raise ValidationError("resourceType must be 'Patient'")
+            values = _serializer.to_internal_value(resource)
+            # Codes de la colonne `sex` (M, F, O) plutôt que le code FHIR en majuscules
+            values["sex"] = GENDER_CODES.get(resource.get("gender"))
+            records.append((number, clean_values(values)))
+        except serializers.ValidationError as exc:
+            rejects.append((number, validation_message(exc.detail)))
+        except (ValueError, TypeError, AttributeError, IndexError, ValidationError) as exc:
+            rejects.append((number, " ".join(exc.messages) if isinstance(exc, ValidationError) else str(exc)))
+    return records, rejects
+
+
+def validation_message(detail: Any) -> str:
+    """Motif de rejet d'une erreur de validation du sérialiseur.
+
+    Args:
+        detail: Détail de l'erreur : erreurs par champ, liste d'erreurs ou message
+
+    Returns
+    -------
+    str
+        Erreurs sur une ligne, préfixées par leur champ
+    """
+    if isinstance(detail, dict):
+        return " ".join(f"{field}: {validation_message(errors)}" for field, errors in detail.items())
+    if isinstance(detail, list):
+        return " ".join(validation_message(error) for error in detail)
+    return str(detail)
+
+
+def parse_csv(rows: List[Tuple[int, Dict[str, str]]]) -> Tuple[List[Record], List[Reject]]:
+    """Convertit un lot de lignes CSV (colonnes de `dwh_patient`) en valeurs de colonnes.
+
+    Exécutée dans les processus de travail : aucune requête SQL.
+
+    Args:
+        rows: Numéros et valeurs brutes des lignes
+
+    Returns
+    -------
+    Tuple[List[Record], List[Reject]]
+        Enregistrements valides et enregistrements rejetés avec leur motif
+    """
+    records: List[Record] = []
+    rejects: List[Reject] = []
+    for number, row in rows:
+        try:
+            records.append((number, clean_values(row)))
+        except ValidationError as exc:
+            rejects.append((number, " ".join(exc.messages)))
+    return records, rejects
+
+
+def upsert_patients(records: List[Record], batch_size: Optional[int] = None) -> UpsertResult:
+    """Insère les nouveaux patients et met à jour ceux qui ont changé, par IPP.
+
+    Une seule requête `IN` charge et verrouille les patients existants du lot ; les patients
+    identiques ne sont pas réécrits (pas de nouvelle version).
+
+    Args:
+        records: Enregistrements valides du lot
+        batch_size: Nombre de lignes par requête d'écriture
+
+    Returns
+    -------
+    UpsertResult
+        Nombre de patients créés, modifiés et inchangés
+    """
+    # Le dernier enregistrement d'un même IPP l'emporte
+    values_by_ipp = {values["ipp"]: values for _, values in records}
+
+    with transaction.atomic():
+        # Verrou des lignes lues jusqu'à la fin de l'écriture : une mise à jour concurrente (PUT)
+        # ne peut s'intercaler entre la comparaison et le `bulk_update`, qui l'écraserait
+        existing = {
+            patient.ipp: patient for patient in Patient.objects.select_for_update().filter(ipp__in=values_by_ipp)
+        }
+
+        new_patients = []
+        changes = []
+        for ipp, values in values_by_ipp.items():
+            patient = existing.get(ipp)
+            if patient is None:
+                new_patients.append(Patient(**values))
+                continue
+            changed = {name: value for name, value in values.items() if getattr(patient, name) != value}
+            if changed:
+                changes.append((patient, changed))
+
+        bulk_create_patients(new_patients, batch_size=batch_size)
+        bulk_update_patients(changes, batch_size=batch_size)
+    return UpsertResult(len(new_patients), len(changes), len(records) - len(new_patients) - len(changes))
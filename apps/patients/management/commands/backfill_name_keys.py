@@ -0,0 +1,56 @@
+# apps/patients/management/commands/backfill_name_keys.py
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from apps.patients.models import Patient, PatientNameToken
+
+
+class Command(BaseCommand):
+    """Recalcule les clés de rapprochement des noms (normalisées et phonétiques) des patients existants."""
+
+    help = "Recalcule par lots les clés de recherche des noms (dwh_patient_name_token)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--batch-size", type=int, default=5000, help="Nombre de patients traités par lot")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Parcourt la table par lots de clés primaires et remplace les clés de chaque lot.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        batch_size = options["batch_size"]
+        fields = ("id", "last_name", "first_name", "maiden_name")
+        last_id = 0
+        processed = 0
+        start = time.perf_counter()
+
+        while True:
+            batch = list(Patient.objects.filter(id__gt=last_id).order_by("id").only(*fields)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                PatientNameToken.objects.filter(patient_id__gt=last_id, patient_id__lte=batch[-1].pk).delete()
+                PatientNameToken.objects.bulk_create(
+                    [token for patient in batch for token in PatientNameToken.for_patient(patient)],
+                    batch_size=batch_size,
+                )
+            last_id = batch[-1].pk
+            processed += len(batch)
+            self.stdout.write(f"{processed} patients traités ({processed / (time.perf_counter() - start):.0f}/s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Clés de rapprochement recalculées pour {processed} patients"))
@@ -0,0 +1,551 @@
+# apps/patients/management/commands/bench_api.py
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+
+from apps.patients.models import Patient
+from apps.patients.synthetic import generate_patients, patient_resource
+
+# Opérations mesurées, dans l'ordre : les mises à jour et suppressions portent sur les patients créés
+OPERATIONS = ("list", "read", "search", "create", "update", "delete", "export")
+# Délai maximal de démarrage du serveur local
+SERVER_STARTUP_TIMEOUT = 30.0
+
+# Réponse à une requête : statut, en-tête `Location` et octets reçus
+Reply = Tuple[int, Optional[str], int]
+Sender = Callable[[str, str, Optional[Dict[str, Any]]], Reply]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentile (rang le plus proche) d'une liste triée.
+
+    Args:
+        values: Valeurs triées
+        fraction: Rang recherché (0.95 pour le p95)
+
+    Returns
+    -------
+    float
+        Valeur du percentile, 0 si la liste est vide
+    """
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    """Mesure le débit et les latences (p50, p95, p99) de l'API patient selon le volume de la base.
+
+    La base primaire SQLite est copiée dans un fichier temporaire, puis complétée par des
+    patients synthétiques (`generate_patients`) jusqu'à chaque volume demandé (par ordre croissant). À chaque
+    volume, un processus dédié mesure chaque opération (liste, lecture, recherche,
+    création, mise à jour, suppression et export) avec plusieurs clients concurrents, une
+    première fois par le client de test de Django (toute la pile Django, sans réseau), une
+    seconde fois par HTTP contre un serveur uvicorn local à plusieurs workers. Les
+    résultats sont écrits en JSON pour être comparés d'une exécution à l'autre (`--baseline`).
+    """
+
+    help = "Mesure le débit et les latences p50/p95/p99 de l'API patient à 10k, 100k et 1M patients (JSON)."
+
+    requires_system_checks: List[str] = []
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--sizes", default="10000,100000,1000000", help="Volumes mesurés, par ordre croissant")
+        parser.add_argument("--requests", type=int, default=200, help="Requêtes par opération")
+        parser.add_argument("--export-requests", type=int, default=2, help="Exports complets par mesure")
+        parser.add_argument("--concurrency", type=int, default=4, help="Clients concurrents")
+        parser.add_argument("--server-workers", type=int, default=2, help="Workers du serveur uvicorn local")
+        parser.add_argument(
+            "--transports", default="client,server", help="Transports mesurés : client (de test), server (HTTP)"
+        )
+        parser.add_argument("--output", default="bench_api.json", help="Fichier JSON des résultats")
+        parser.add_argument("--baseline", default=None, help="Résultats JSON d'une exécution précédente à comparer")
+        # Option interne du processus de mesure d'un volume
+        parser.add_argument("--size", type=int, default=None, help="(interne) volume mesuré sur la base courante")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Prépare la copie de la base, mesure chaque volume et écrit les résultats.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        transports = options["transports"].split(",")
+        if set(transports) - {"client", "server"}:
+            raise CommandError(f"Transports inconnus : {options['transports']} (client, server)")
+        if options["size"] is not None:
+            self.stdout.write(json.dumps(self.measure_size(options["size"], transports, options)))
+            return
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError(f"La mesure porte sur une copie SQLite (base primaire actuelle : {primary.vendor})")
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        baseline = self.load_baseline(options["baseline"])
+
+        report: Dict[str, Any] = {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "debug": settings.DEBUG,
+                "database": "sqlite (mode production)",
+            },
+            "options": {
+                "requests": options["requests"],
+                "export_requests": options["export_requests"],
+                "concurrency": options["concurrency"],
+                "server_workers": options["server_workers"],
+            },
+            "results": [],
+        }
+        self.stdout.write(
+            f"{'patients':>9} {'transport':<9} {'opération':<9} {'req/s':>8} {'p50 (ms)':>9} "
+            f"{'p95 (ms)':>9} {'p99 (ms)':>9} {'erreurs':>8}"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.sqlite3")
+            target = sqlite3.connect(path)
+            try:
+                primary.ensure_connection()
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            for size in sizes:
+                for result in self.run_size(path, size, transports, options):
+                    report["results"].append(result)
+                    self.write_result(result, baseline)
+
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    def load_baseline(self, path: Optional[str]) -> Dict[Tuple[int, str, str], Dict[str, Any]]:
+        """Lit les résultats d'une exécution précédente, indexés par volume, transport et opération.
+
+        Args:
+            path: Fichier JSON écrit par une exécution précédente (None : aucune comparaison)
+
+        Returns
+        -------
+        Dict[Tuple[int, str, str], Dict[str, Any]]
+            Résultats précédents
+        """
+        if path is None:
+            return {}
+        try:
+            with open(path, encoding="utf-8") as baseline:
+                results = json.load(baseline)["results"]
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Résultats de référence illisibles ({path}) : {error}")
+        return {(result["patients"], result["transport"], result["operation"]): result for result in results}
+
+    def write_result(self, result: Dict[str, Any], baseline: Dict[Tuple[int, str, str], Dict[str, Any]]) -> None:
+        """Affiche une ligne de résultats, suivie de l'écart avec la référence s'il y en a une.
+
+        Args
+        ----
+        result : Dict[str, Any]
+            Résultats d'une opération
+        baseline : Dict[Tuple[int, str, str], Dict[str, Any]]
+            Résultats de référence
+        """
+        latency = result["latency_ms"]
+        line = (
+            f"{result['patients']:>9} {result['transport']:<9} {result['operation']:<9} "
+            f"{result['throughput']:>8.1f} {latency['p50']:>9.1f} {latency['p95']:>9.1f} "
+            f"{latency['p99']:>9.1f} {result['errors']:>8}"
+        )
+        previous = baseline.get((result["patients"], result["transport"], result["operation"]))
+        if previous and previous["throughput"] and previous["latency_ms"]["p95"]:
+            line += (
+                f"   réf. : débit x{result['throughput'] / previous['throughput']:.2f}, "
+                f"p95 x{latency['p95'] / previous['latency_ms']['p95']:.2f}"
+            )
+        self.stdout.write(line)
+
+    def run_size(self, path: str, size: int, transports: List[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Mesure un volume dans un processus dédié, sur la copie de la base.
+
+        Args:
+            path: Copie de la base SQLite
+            size: Nombre de patients de la mesure
+            transports: Transports mesurés
+            options: Options de la commande
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Résultats de chaque opération
+        """
+        arguments = [
+            sys.executable,
+            os.path.abspath(sys.argv[0]),
+            "bench_api",
+            f"--size={size}",
+            f"--transports={','.join(transports)}",
+            f"--requests={options['requests']}",
+            f"--export-requests={options['export_requests']}",
+            f"--concurrency={options['concurrency']}",
+            f"--server-workers={options['server_workers']}",
+        ]
+        worker = subprocess.run(arguments, env=self.environment(path), stdout=subprocess.PIPE, text=True)
+        if worker.returncode:
+            raise CommandError(f"Mesure de {size} patients en échec (code {worker.returncode})")
+        return json.loads(worker.stdout.strip().splitlines()[-1])
+
+    def environment(self, path: str) -> Dict[str, str]:
+        """Environnement des processus de mesure et du serveur : la copie de la base, en mode production.
+
+        Args:
+            path: Copie de la base SQLite
+
+        Returns
+        -------
+        Dict[str, str]
+            Variables d'environnement
+        """
+        env = {**os.environ, "DJANGO_SQLITE_PATH": path, "DJANGO_SQLITE_PRODUCTION": "1"}
+        # Les processus de mesure lisent et écrivent la seule copie
+        env.pop("DJANGO_DATABASE_REPLICAS", None)
+        return env
+
+    def measure_size(self, size: int, transports: List[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Complète la base jusqu'au volume demandé puis mesure chaque opération sur chaque transport.
+
+        Args:
+            size: Nombre de patients de la mesure
+            transports: Transports mesurés
+            options: Options de la commande
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Résultats de chaque opération
+        """
+        self.seed(size)
+        rng = random.Random(size)
+        pks = list(Patient.objects.values_list("pk", flat=True))
+        families = list(Patient.objects.exclude(last_name=None).values_list("last_name", flat=True)[:1000])
+        connections.close_all()
+
+        results = []
+        for transport in transports:
+            if transport == "client":
+                results += self.measure_operations(self.client_sender, size, transport, rng, pks, families, options)
+            else:
+                with self.server(options["server_workers"]) as port:
+                    results += self.measure_operations(
+                        lambda: self.server_sender(port), size, transport, rng, pks, families, options
+                    )
+        return results
+
+    def seed(self, size: int) -> None:
+        """Complète la base par des patients synthétiques (`generate_patients`) jusqu'à `size` patients.
+
+        Args
+        ----
+        size : int
+            Nombre de patients visé
+        """
+        missing = size - Patient.objects.count()
+        if missing > 0:
+            # Une graine par volume : les IPP générés pour chaque volume sont distincts
+            generate_patients(
+                missing, seed=size, progress=lambda count: self.stderr.write(f"{count}/{missing} patients", ending="\r")
+            )
+            self.stderr.write("")
+
+    def measure_operations(
+        self,
+        make_sender: Callable[[], Sender],
+        size: int,
+        transport: str,
+        rng: random.Random,
+        pks: List[int],
+        families: List[str],
+        options: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """Mesure chaque opération avec des clients concurrents.
+
+        Args:
+            make_sender: Crée l'émetteur de requêtes d'un client (un par thread)
+            size: Nombre de patients de la mesure
+            transport: Transport mesuré
+            rng: Générateur aléatoire des patients lus et recherchés
+            pks: Clés primaires des patients existants
+            families: Noms de famille existants, recherchés par préfixe
+            options: Options de la commande
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Résultats de chaque opération
+        """
+        count = options["requests"]
+        created: List[Tuple[int, int]] = []
+        requests: Dict[str, List[Tuple[str, str, Optional[Dict[str, Any]]]]] = {
+            "list": [("GET", "/api/patient/", None)] * count,
+            "read": [("GET", f"/api/patient/{rng.choice(pks)}/", None) for _ in range(count)],
+            "search": [("GET", f"/api/patient/?family={rng.choice(families)[:4]}", None) for _ in range(count)],
+            "create": [
+                ("POST", "/api/patient/", patient_resource(f"BENCH-{transport}-{size}-{index}", index))
+                for index in range(count)
+            ],
+            "export": [("GET", "/api/patient/$export/", None)] * options["export_requests"],
+        }
+        results = []
+        for operation in OPERATIONS:
+            if operation == "update":
+                requests[operation] = [
+                    ("PUT", f"/api/patient/{pk}/", patient_resource(f"BENCH-{transport}-{size}-{index}", -index))
+                    for index, pk in created
+                ]
+            elif operation == "delete":
+                requests[operation] = [("DELETE", f"/api/patient/{pk}/", None) for _, pk in created]
+            latencies, errors, elapsed = self.run_requests(make_sender, requests[operation], created, options)
+            latencies.sort()
+            results.append(
+                {
+                    "patients": size,
+                    "transport": transport,
+                    "operation": operation,
+                    "requests": len(requests[operation]),
+                    "errors": errors,
+                    "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                    "latency_ms": {
+                        "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                        "p50": percentile(latencies, 0.50),
+                        "p95": percentile(latencies, 0.95),
+                        "p99": percentile(latencies, 0.99),
+                        "max": latencies[-1] if latencies else 0.0,
+                    },
+                }
+            )
+        return results
+
+    def run_requests(
+        self,
+        make_sender: Callable[[], Sender],
+        requests: List[Tuple[str, str, Optional[Dict[str, Any]]]],
+        created: List[Tuple[int, int]],
+        options: Dict[str, Any],
+    ) -> Tuple[List[float], int, float]:
+        """Envoie des requêtes réparties entre les clients concurrents.
+
+        Args:
+            make_sender: Crée l'émetteur de requêtes d'un client
+            requests: Méthode, chemin et corps JSON de chaque requête
+            created: Liste complétée par les couples (numéro, clé primaire) des patients créés
+            options: Options de la commande
+
+        Returns
+        -------
+        Tuple[List[float], int, float]
+            Latences des requêtes réussies (ms), nombre d'erreurs et durée totale (s)
+        """
+        latencies: List[float] = []
+        errors = [0]
+        lock = threading.Lock()
+        clients = max(min(options["concurrency"], len(requests)), 1)
+
+        def run_client(client: int) -> None:
+            sender = make_sender()
+            try:
+                for index in range(client, len(requests), clients):
+                    method, path, body = requests[index]
+                    start = time.perf_counter()
+                    try:
+                        status, location, _ = sender(method, path, body)
+                    except (OSError, http.client.HTTPException):
+                        status, location = 0, None
+                    latency = round((time.perf_counter() - start) * 1000, 2)
+                    with lock:
+                        if status >= 400 or status == 0:
+                            errors[0] += 1
+                            continue
+                        latencies.append(latency)
+                        if method == "POST" and location:
+                            created.append((index, int(location.rstrip("/").rsplit("/", 1)[-1])))
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            list(pool.map(run_client, range(clients)))
+        return latencies, errors[0], time.perf_counter() - start
+
+    def client_sender(self) -> Sender:
+        """Émetteur de requêtes par le client de test de Django (toute la pile Django, sans réseau).
+
+        Returns
+        -------
+        Sender
+            Envoie une requête et retourne son statut, son en-tête `Location` et sa taille
+        """
+        client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[0].lstrip(".") if settings.ALLOWED_HOSTS else "localhost")
+
+        def send(method: str, path: str, body: Optional[Dict[str, Any]]) -> Reply:
+            data = json.dumps(body) if body is not None else None
+            response = client.generic(method, path, data or "", content_type="application/fhir+json")
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            return response.status_code, response.headers.get("Location"), size
+
+        return send
+
+    def server_sender(self, port: int) -> Sender:
+        """Émetteur de requêtes HTTP vers le serveur local (connexion persistante).
+
+        Args:
+            port: Port du serveur local
+
+        Returns
+        -------
+        Sender
+            Envoie une requête et retourne son statut, son en-tête `Location` et sa taille
+        """
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        connection.connect()
+        # Sans TCP_NODELAY, l'accusé de réception retardé ajoute jusqu'à 40 ms aux petites requêtes
+        connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+
+        def send(method: str, path: str, body: Optional[Dict[str, Any]]) -> Reply:
+            headers = {"Host": f"{host}:{port}", "Content-Type": "application/fhir+json"}
+            connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = connection.getresponse()
+            size = 0
+            while chunk := response.read(65536):
+                size += len(chunk)
+            return response.status, response.getheader("Location"), size
+
+        return send
+
+    def server(self, workers: int) -> "LocalServer":
+        """Serveur uvicorn local servant l'application ASGI sur la copie de la base.
+
+        Args:
+            workers: Nombre de workers
+
+        Returns
+        -------
+        LocalServer
+            Gestionnaire de contexte démarrant et arrêtant le serveur
+        """
+        return LocalServer(workers, self.environment(settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"]))
+
+
+class LocalServer:
+    """Workers uvicorn locaux partageant un socket d'écoute, démarrés le temps d'une mesure.
+
+    Le socket est ouvert ici avec TCP_NODELAY, hérité par les connexions acceptées : avec
+    `uvicorn --workers`, les réponses attendent l'accusé de réception retardé (40 ms).
+    """
+
+    def __init__(self, workers: int, env: Dict[str, str]) -> None:
+        """Prépare le lancement des workers.
+
+        Args
+        ----
+        workers : int
+            Nombre de workers
+        env : Dict[str, str]
+            Variables d'environnement des workers
+        """
+        self.workers = workers
+        project = str(settings.BASE_DIR)
+        # `apps/` est ajouté au chemin par manage.py, pas par le module ASGI
+        path = [project, os.path.join(project, "apps"), env.get("PYTHONPATH", "")]
+        self.env = {**env, "PYTHONPATH": os.pathsep.join(filter(None, path))}
+        self.sock: Optional[socket.socket] = None
+        self.processes: List[subprocess.Popen] = []
+
+    def __enter__(self) -> int:
+        """Démarre les workers et attend que le serveur réponde.
+
+        Returns
+        -------
+        int
+            Port d'écoute
+        """
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(128)
+        port = self.sock.getsockname()[1]
+        fd = self.sock.fileno()
+        command = [sys.executable, "-m", "uvicorn", "dwh_fhir.asgi:application", "--fd", str(fd)]
+        command += ["--log-level", "warning", "--no-access-log"]
+        self.processes = [
+            subprocess.Popen(command, env=self.env, cwd=str(settings.BASE_DIR), pass_fds=[fd])
+            for _ in range(self.workers)
+        ]
+
+        # Le socket accepte les connexions dès maintenant : le serveur est prêt quand un worker répond
+        host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+        deadline = time.monotonic() + SERVER_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if any(process.poll() is not None for process in self.processes):
+                self.__exit__()
+                raise CommandError("Un worker du serveur local s'est arrêté au démarrage")
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            try:
+                connection.request("GET", "/api/patient/?_count=1", headers={"Host": f"{host}:{port}"})
+                connection.getresponse().read()
+                return port
+            except (OSError, http.client.HTTPException):
+                time.sleep(0.1)
+            finally:
+                connection.close()
+        self.__exit__()
+        raise CommandError(f"Le serveur local n'a pas démarré en {SERVER_STARTUP_TIMEOUT:.0f} s")
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Arrête les workers et ferme le socket d'écoute.
+
+        Args
+        ----
+        *exc_info : Any
+            Exception éventuelle du bloc `with`
+        """
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.wait(timeout=30)
+        self.processes = []
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
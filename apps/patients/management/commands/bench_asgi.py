@@ -0,0 +1,412 @@
+# apps/patients/management/commands/bench_asgi.py
+import asyncio
+import contextlib
+import http.client
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.wsgi import get_wsgi_application
+
+from apps.patients.management.commands.bench_api import percentile
+from apps.patients.models import Patient, PatientHistory
+from apps.patients.synthetic import patient_resource
+
+# Tampons réseau réduits (serveur et client) : un client lent bloque l'envoi au-delà de quelques Kio
+SOCKET_BUFFER = 8192
+# Taille moyenne d'une ligne d'export NDJSON, pour vérifier que l'export dépasse les tampons
+RESOURCE_SIZE = 700
+# Opérations du scénario `requests`
+OPERATIONS = ("list", "read", "create")
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    """Gestionnaire de requêtes WSGI sans journal d'accès."""
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Ignore le journal d'accès.
+
+        Args
+        ----
+        format : str
+            Format du message
+        *args : Any
+            Arguments du message
+        """
+
+
+class PooledWSGIServer(WSGIServer):
+    """Serveur WSGI à nombre fixe de threads, comme un worker gunicorn `gthread`.
+
+    Chaque connexion occupe un thread jusqu'à la fin de l'envoi de la réponse ; les
+    connexions suivantes attendent dans la file du socket d'écoute.
+    """
+
+    # File d'attente du socket d'écoute de la taille de celle d'uvicorn (5 par défaut)
+    request_queue_size = 2048
+
+    def __init__(self, address: Tuple[str, int], threads: int) -> None:
+        """Ouvre le socket d'écoute.
+
+        Args
+        ----
+        address : Tuple[str, int]
+            Adresse d'écoute
+        threads : int
+            Nombre de threads du worker
+        """
+        super().__init__(address, QuietWSGIRequestHandler)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Confie la connexion au pool de threads.
+
+        Args
+        ----
+        request : Any
+            Socket de la connexion
+        client_address : Any
+            Adresse du client
+        """
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request: Any, client_address: Any) -> None:
+        """Traite une connexion dans un thread du pool.
+
+        Args
+        ----
+        request : Any
+            Socket de la connexion
+        client_address : Any
+            Adresse du client
+        """
+        try:
+            self.finish_request(request, client_address)
+        except OSError:
+            # Client déconnecté en cours d'envoi
+            pass
+        finally:
+            self.shutdown_request(request)
+
+
+class Command(BaseCommand):
+    """Compare un worker WSGI à threads et un worker ASGI (uvicorn) servant l'API patient.
+
+    Scénario `slow-clients` : des clients lents ouvrent tous en même temps un export NDJSON
+    et le lisent par petits morceaux pendant toute la fenêtre de mesure ; une requête rapide
+    (sonde) est envoyée pendant la fenêtre. Un worker WSGI consacre un thread à chaque
+    client jusqu'à la fin de l'envoi, alors que le worker ASGI suspend la vue asynchrone
+    tant que le client ne lit pas.
+
+    Scénario `requests` : des clients concurrents enchaînent des listes, des lectures et des
+    créations ; le débit et les latences de chaque opération sont comparés d'un worker à
+    l'autre. Les patients créés sont supprimés.
+    """
+
+    help = "Compare un worker WSGI et un worker ASGI (uvicorn) : clients lents sur l'export, ou liste/lecture/création."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--scenario", choices=("slow-clients", "requests"), default="slow-clients")
+        parser.add_argument("--clients", type=int, default=50, help="Nombre de clients simultanés")
+        parser.add_argument("--threads", type=int, default=4, help="Threads du worker WSGI")
+        parser.add_argument("--duration", type=float, default=5.0, help="Durée de la fenêtre de mesure (s)")
+        parser.add_argument(
+            "--read-size", type=int, default=1024, help="Octets lus par un client lent à chaque lecture"
+        )
+        parser.add_argument("--read-delay", type=float, default=0.05, help="Pause d'un client lent entre deux lectures")
+        parser.add_argument("--path", default="/api/patient/$export/", help="Ressource lue par les clients lents")
+        parser.add_argument("--probe", default="/api/patient/?_count=1", help="Ressource lue par la sonde")
+        parser.add_argument("--requests", type=int, default=2000, help="Requêtes par opération (scénario requests)")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Exécute le scénario sur chaque serveur et affiche les résultats côte à côte.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        self.host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+        if options["scenario"] == "requests":
+            self.compare_requests(options)
+            return
+
+        # Une réponse contenue dans les tampons réseau ne retient aucun worker
+        minimum = 4 * SOCKET_BUFFER // RESOURCE_SIZE + 1
+        if options["path"].startswith("/api/patient/$export/") and Patient.objects.count() < minimum:
+            raise CommandError(f"Au moins {minimum} patients sont nécessaires : l'export tiendrait dans les tampons")
+
+        self.stdout.write(
+            f"{options['clients']} clients lents ({options['read_size']} o toutes les {options['read_delay']} s) "
+            f"sur {options['path']} pendant {options['duration']} s ; sonde : {options['probe']}"
+        )
+        self.stdout.write(f"{'serveur':<22} {'clients servis':>15} {'Kio reçus':>10} {'sonde':>10}")
+        servers = (
+            (f"WSGI ({options['threads']} threads)", self.wsgi_server(options["threads"])),
+            ("ASGI (uvicorn)", self.asgi_server()),
+        )
+        for label, server in servers:
+            with server as port:
+                served, received, probe = asyncio.run(self.run_clients(port, options))
+            probe_label = f"{probe * 1000:.0f} ms" if probe is not None else f"> {options['duration']:.0f} s"
+            self.stdout.write(
+                f"{label:<22} {served:>8}/{options['clients']:<6} {received / 1024:>10.0f} {probe_label:>10}"
+            )
+
+    def compare_requests(self, options: Dict[str, Any]) -> None:
+        """Mesure la liste, la lecture et la création sur chaque serveur et affiche les résultats côte à côte.
+
+        Args
+        ----
+        options : Dict[str, Any]
+            Options de la commande
+        """
+        pks = list(Patient.objects.values_list("pk", flat=True)[: options["requests"]])
+        if not pks:
+            raise CommandError("Aucun patient : importer un extrait (import_patients) avant la mesure")
+        self.stdout.write(f"{options['clients']} clients, {options['requests']} requêtes par opération")
+        self.stdout.write(f"{'serveur':<22} {'opération':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'erreurs':>8}")
+        servers = (
+            ("wsgi", f"WSGI ({options['threads']} threads)", self.wsgi_server(options["threads"])),
+            ("asgi", "ASGI (uvicorn)", self.asgi_server()),
+        )
+        prefix = f"BENCH-ASGI-{time.time_ns()}"
+        try:
+            for name, label, server in servers:
+                with server as port:
+                    requests: Dict[str, List[Tuple[str, str, Optional[Dict[str, Any]]]]] = {
+                        "list": [("GET", "/api/patient/", None)] * options["requests"],
+                        "read": [
+                            ("GET", f"/api/patient/{pks[index % len(pks)]}/", None)
+                            for index in range(options["requests"])
+                        ],
+                        "create": [
+                            ("POST", "/api/patient/", patient_resource(f"{prefix}-{name}-{index}", index))
+                            for index in range(options["requests"])
+                        ],
+                    }
+                    for operation in OPERATIONS:
+                        latencies, errors, elapsed = self.run_requests(port, requests[operation], options["clients"])
+                        latencies.sort()
+                        self.stdout.write(
+                            f"{label:<22} {operation:<10} {len(latencies) / elapsed:>8.0f} "
+                            f"{percentile(latencies, 0.50):>8.1f} {percentile(latencies, 0.95):>8.1f} {errors:>8}"
+                        )
+        finally:
+            ids = list(Patient.objects.filter(ipp__startswith=prefix).values_list("pk", flat=True))
+            Patient.objects.filter(pk__in=ids).delete()
+            PatientHistory.objects.filter(patient_id__in=ids).delete()
+
+    def run_requests(
+        self, port: int, requests: List[Tuple[str, str, Optional[Dict[str, Any]]]], clients: int
+    ) -> Tuple[List[float], int, float]:
+        """Envoie des requêtes réparties entre des clients concurrents (une connexion par requête).
+
+        Args:
+            port: Port du serveur
+            requests: Méthode, chemin et corps JSON de chaque requête
+            clients: Nombre de clients concurrents
+
+        Returns
+        -------
+        Tuple[List[float], int, float]
+            Latences des requêtes réussies (ms), nombre d'erreurs et durée totale (s)
+        """
+        latencies: List[float] = []
+        errors = [0]
+        lock = threading.Lock()
+
+        def run_client(client: int) -> None:
+            for index in range(client, len(requests), clients):
+                method, path, body = requests[index]
+                start = time.perf_counter()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                try:
+                    headers = {"Host": self.host, "Content-Type": "application/fhir+json", "Connection": "close"}
+                    connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    status = 0
+                finally:
+                    connection.close()
+                latency = (time.perf_counter() - start) * 1000
+                with lock:
+                    if status >= 400 or status == 0:
+                        errors[0] += 1
+                    else:
+                        latencies.append(latency)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            list(pool.map(run_client, range(clients)))
+        return latencies, errors[0], time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def wsgi_server(self, threads: int) -> Iterator[int]:
+        """Démarre un worker WSGI à threads dans un thread de fond.
+
+        Args:
+            threads: Nombre de threads du worker
+
+        Yields
+        ------
+        int
+            Port d'écoute
+        """
+        server = PooledWSGIServer(("127.0.0.1", 0), threads)
+        server.set_app(get_wsgi_application())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server.server_address[1]
+        finally:
+            server.shutdown()
+            server.server_close()
+            server.pool.shutdown(wait=True, cancel_futures=True)
+
+    @contextlib.contextmanager
+    def asgi_server(self) -> Iterator[int]:
+        """Démarre un worker uvicorn (une boucle d'événements) dans un thread de fond.
+
+        Yields
+        ------
+        int
+            Port d'écoute
+        """
+        import uvicorn
+
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+        sock.bind(("127.0.0.1", 0))
+        config = uvicorn.Config(
+            get_asgi_application(), lifespan="off", log_level="warning", access_log=False, timeout_graceful_shutdown=5
+        )
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=asyncio.run, args=(server.serve(sockets=[sock]),), daemon=True)
+        thread.start()
+        while not server.started:
+            threading.Event().wait(0.01)
+        try:
+            yield sock.getsockname()[1]
+        finally:
+            server.should_exit = True
+            thread.join()
+            sock.close()
+
+    async def run_clients(self, port: int, options: Any) -> Tuple[int, int, Optional[float]]:
+        """Lance les clients lents et la sonde, et attend la fin de la fenêtre de mesure.
+
+        Args:
+            port: Port du serveur
+            options: Options de la commande
+
+        Returns
+        -------
+        Tuple[int, int, Optional[float]]
+            Clients ayant reçu des données, octets reçus, durée de la sonde (None si non servie)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + options["duration"]
+        slow: List[Any] = [
+            self.slow_client(port, options["path"], deadline, options["read_size"], options["read_delay"])
+            for _ in range(options["clients"])
+        ]
+        results = await asyncio.gather(self.probe_client(port, options["probe"], deadline), *slow)
+        probe, clients = results[0], results[1:]
+        return sum(1 for received in clients if received), sum(clients), probe
+
+    async def open(self, port: int, path: str, limit: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Ouvre une connexion à tampon de réception réduit et envoie la requête GET.
+
+        Args:
+            port: Port du serveur
+            path: Ressource demandée
+            limit: Taille du tampon de lecture du client
+
+        Returns
+        -------
+        Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+            Flux de la connexion
+        """
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+        reader, writer = await asyncio.open_connection(sock=sock, limit=limit)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: close\r\n\r\n".encode())
+        return reader, writer
+
+    async def slow_client(self, port: int, path: str, deadline: float, read_size: int, read_delay: float) -> int:
+        """Lit une ressource par petits morceaux jusqu'à la fin de la fenêtre de mesure.
+
+        Args:
+            port: Port du serveur
+            path: Ressource lue
+            deadline: Fin de la fenêtre de mesure (horloge de la boucle)
+            read_size: Octets lus à chaque lecture
+            read_delay: Pause entre deux lectures
+
+        Returns
+        -------
+        int
+            Octets reçus
+        """
+        loop = asyncio.get_running_loop()
+        reader, writer = await self.open(port, path, read_size)
+        received = 0
+        try:
+            while loop.time() < deadline:
+                data = await asyncio.wait_for(reader.read(read_size), deadline - loop.time())
+                if not data:
+                    break
+                received += len(data)
+                await asyncio.sleep(read_delay)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            writer.close()
+        return received
+
+    async def probe_client(self, port: int, path: str, deadline: float) -> Optional[float]:
+        """Envoie une requête rapide au milieu de la fenêtre de mesure et mesure sa durée.
+
+        Args:
+            port: Port du serveur
+            path: Ressource lue
+            deadline: Fin de la fenêtre de mesure (horloge de la boucle)
+
+        Returns
+        -------
+        Optional[float]
+            Durée de la réponse complète en secondes, ou None si elle n'est pas servie dans la fenêtre
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep((deadline - loop.time()) / 2)
+        start = loop.time()
+        reader, writer = await self.open(port, path, 2**16)
+        try:
+            response = await asyncio.wait_for(reader.read(), deadline - loop.time())
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            writer.close()
+        return loop.time() - start if b" 200 " in response[:16] else None
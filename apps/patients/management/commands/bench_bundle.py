@@ -0,0 +1,94 @@
+# apps/patients/management/commands/bench_bundle.py
+import time
+import uuid
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.test import Client
+
+from apps.patients.models import Patient, PatientHistory
+from apps.patients.synthetic import patient_resource
+
+
+class Command(BaseCommand):
+    """Compare des créations unitaires `POST /api/patient/` à un Bundle `POST /api/`.
+
+    Les requêtes traversent toute la pile Django (middlewares, rendu JSON) via le client
+    de test ; seul l'aller-retour réseau n'est pas mesuré.
+    """
+
+    help = "Mesure le débit de création : POST séquentiels contre Bundles batch et transaction."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--patients", type=int, default=1000, help="Nombre de patients créés par mesure")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Exécute les trois mesures puis supprime les patients créés.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        count = options["patients"]
+        client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[0].lstrip(".") if settings.ALLOWED_HOSTS else "localhost")
+        run_id = uuid.uuid4().hex[:8]
+        results = {}
+
+        try:
+            for mode in ("sequential", "batch", "transaction"):
+                resources = [patient_resource(f"BENCH-{run_id}-{mode}-{i}", i) for i in range(count)]
+                results[mode] = self.measure(mode, resources, client)
+                self.stdout.write(f"{mode:<12}: {count / results[mode]:10.0f} patients/s ({results[mode]:.2f} s)")
+        finally:
+            ids = list(Patient.objects.filter(ipp__startswith=f"BENCH-{run_id}-").values_list("pk", flat=True))
+            Patient.objects.filter(pk__in=ids).delete()
+            PatientHistory.objects.filter(patient_id__in=ids).delete()
+
+        for mode in ("batch", "transaction"):
+            self.stdout.write(self.style.SUCCESS(f"Gain {mode} : x{results['sequential'] / results[mode]:.1f}"))
+
+    def measure(self, mode: str, resources: List[Dict[str, Any]], client: Client) -> float:
+        """Crée les patients selon un mode et retourne la durée écoulée.
+
+        Args:
+            mode: `sequential`, `batch` ou `transaction`
+            resources: Ressources Patient à créer
+            client: Client HTTP de test
+
+        Returns
+        -------
+        float
+            Durée totale en secondes
+        """
+        if mode == "sequential":
+            start = time.perf_counter()
+            for resource in resources:
+                response = client.post("/api/patient/", resource, content_type="application/json")
+                if response.status_code != 201:
+                    raise CommandError(f"Création refusée ({response.status_code}) : {response.content!r}")
+            return time.perf_counter() - start
+
+        bundle = {
+            "resourceType": "Bundle",
+            "type": mode,
+            "entry": [
+                {"resource": resource, "request": {"method": "POST", "url": "Patient"}} for resource in resources
+            ],
+        }
+        start = time.perf_counter()
+        response = client.post("/api/", bundle, content_type="application/json")
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise CommandError(f"Bundle refusé ({response.status_code}) : {response.content!r}")
+        return elapsed
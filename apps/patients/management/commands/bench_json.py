@@ -0,0 +1,134 @@
+# apps/patients/management/commands/bench_json.py
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from django.core.management.base import BaseCommand, CommandParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.patients import fhir_json
+from apps.patients.fast_serializer import serialize_patient
+from apps.patients.models import Patient
+from apps.patients.synthetic import patient_resource
+
+
+class Command(BaseCommand):
+    """Compare le débit d'encodage et de décodage JSON d'un Bundle `searchset` de 1000 entrées.
+
+    Les ressources proviennent de la base (complétées par des ressources générées si elle
+    en compte moins que demandé). Trois encodeurs sont comparés : le `JSONRenderer` de DRF,
+    le repli `json` de la bibliothèque standard et le renderer de l'API (`orjson` s'il est installé).
+    """
+
+    help = "Mesure le débit d'encodage et de décodage JSON des Bundles FHIR (DRF, json, renderer de l'API)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--entries", type=int, default=1000, help="Nombre d'entrées du Bundle")
+        parser.add_argument("--rounds", type=int, default=50, help="Nombre d'encodages par mesure")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Exécute les mesures et affiche le débit de chaque encodeur.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        bundle = self.build_bundle(options["entries"])
+        rounds = options["rounds"]
+        renderer = JSONRenderer()
+        reference = renderer.render(bundle)
+        self.stdout.write(f"Bundle de {len(bundle['entry'])} entrées : {len(reference) / 1024:.0f} Kio")
+
+        def stdlib_dumps(data: Any) -> bytes:
+            return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+        encoders: Dict[str, Callable[[Any], bytes]] = {
+            "DRF JSONRenderer": renderer.render,
+            "json (repli)": stdlib_dumps,
+            f"API ({fhir_json.BACKEND})": fhir_json.dumps,
+        }
+        timings = {}
+        for name, encode in encoders.items():
+            if encode(bundle) != reference:
+                self.stderr.write(f"{name} : rendu différent de DRF")
+            timings[name] = self.measure(lambda: encode(bundle), rounds)
+            self.report(f"Encodage {name}", timings[name], rounds, len(reference))
+
+        json_time = self.measure(lambda: json.loads(reference), rounds)
+        self.report("Décodage json", json_time, rounds, len(reference))
+        api_time = self.measure(lambda: fhir_json.loads(reference), rounds)
+        self.report(f"Décodage API ({fhir_json.BACKEND})", api_time, rounds, len(reference))
+
+        gain = timings["DRF JSONRenderer"] / timings[f"API ({fhir_json.BACKEND})"]
+        self.stdout.write(self.style.SUCCESS(f"Gain encodage : x{gain:.1f} · décodage : x{json_time / api_time:.1f}"))
+
+    def build_bundle(self, entries: int) -> Dict[str, Any]:
+        """Construit un Bundle `searchset` à partir des patients de la base.
+
+        Args:
+            entries: Nombre d'entrées du Bundle
+
+        Returns
+        -------
+        Dict[str, Any]
+            Bundle FHIR
+        """
+        resources: List[Dict[str, Any]] = [serialize_patient(p) for p in Patient.objects.order_by("id")[:entries]]
+        resources += [patient_resource(f"BENCH-{i}", i) for i in range(len(resources), entries)]
+        return {
+            "resourceType": "Bundle",
+            "type": "searchset",
+            "entry": [
+                {"fullUrl": f"http://localhost/api/patient/{i}/", "resource": r, "search": {"mode": "match"}}
+                for i, r in enumerate(resources)
+            ],
+        }
+
+    def measure(self, operation: Callable[[], Any], rounds: int) -> float:
+        """Retourne la meilleure durée d'une opération répétée `rounds` fois (trois essais).
+
+        Args:
+            operation: Opération à mesurer
+            rounds: Nombre de répétitions par essai
+
+        Returns
+        -------
+        float
+            Durée en secondes pour `rounds` répétitions
+        """
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                operation()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def report(self, label: str, elapsed: float, rounds: int, size: int) -> None:
+        """Affiche le débit d'une mesure.
+
+        Args
+        ----
+        label : str
+            Libellé de la mesure
+        elapsed : float
+            Durée pour `rounds` répétitions
+        rounds : int
+            Nombre de répétitions
+        size : int
+            Taille du document en octets
+        """
+        self.stdout.write(
+            f"{label:<26}: {rounds / elapsed:8.1f} Bundles/s · {rounds * size / elapsed / 2**20:7.1f} Mio/s"
+        )
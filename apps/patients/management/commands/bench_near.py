@@ -0,0 +1,99 @@
+# apps/patients/management/commands/bench_near.py
+import random
+import time
+from typing import Any, Callable, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Q
+from django.db.models.lookups import LessThanOrEqual
+from django.http import QueryDict
+
+from apps.patients.geo import distance_expression
+from apps.patients.models import Patient
+from apps.patients.search import PatientSearch
+
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    """Mesure la recherche `near` par l'index geohash contre un calcul de distance sur toute la table.
+
+    Les positions recherchées sont celles de patients tirés au hasard ; pour chaque rayon,
+    les deux lectures renvoient les mêmes patients les plus proches, ce qui est vérifié.
+    """
+
+    help = "Mesure la recherche near (index geohash) contre un parcours complet, selon le rayon."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--distances", default="1,10,50", help="Rayons mesurés en km, séparés par des virgules")
+        parser.add_argument("--repeat", type=int, default=10, help="Nombre de positions recherchées par rayon")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Exécute les mesures pour chaque rayon.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        located = Patient.objects.filter(residence_geohash__isnull=False)
+        positions = list(located.values_list("residence_latitude", "residence_longitude")[:10000])
+        if not positions:
+            raise CommandError("Aucun patient géolocalisé : importer un extrait avec coordonnées avant la mesure")
+        rng = random.Random(0)
+        positions = [rng.choice(positions) for _ in range(options["repeat"])]
+
+        self.stdout.write(f"{located.count()} patients géolocalisés, {PAGE_SIZE} plus proches (ms par recherche)")
+        self.stdout.write(f"{'rayon (km)':>10} {'résultats':>10} {'index':>10} {'parcours':>10}")
+        for distance in (float(value) for value in options["distances"].split(",")):
+            results: List[int] = []
+
+            def indexed(latitude: float, longitude: float) -> List[int]:
+                plan = PatientSearch(QueryDict(f"near={latitude}|{longitude}|{distance}")).plan()
+                expression = distance_expression(latitude, longitude)
+                queryset = plan.queryset.annotate(near_distance=expression).order_by("near_distance", "id")
+                return list(queryset.values_list("id", flat=True)[:PAGE_SIZE])
+
+            def full_scan(latitude: float, longitude: float) -> List[int]:
+                expression = distance_expression(latitude, longitude)
+                queryset = Patient.objects.filter(Q(LessThanOrEqual(expression, distance)))
+                queryset = queryset.annotate(near_distance=expression).order_by("near_distance", "id")
+                return list(queryset.values_list("id", flat=True)[:PAGE_SIZE])
+
+            index_time = self.measure(indexed, positions, results)
+            scan_results: List[int] = []
+            scan_time = self.measure(full_scan, positions, scan_results)
+            if results != scan_results:
+                raise CommandError(f"Résultats différents pour un rayon de {distance:g} km")
+            self.stdout.write(
+                f"{distance:>10g} {len(results) / len(positions):>10.1f} {index_time:>10.2f} {scan_time:>10.2f}"
+            )
+
+    def measure(self, search: Callable[[float, float], List[int]], positions: List[Any], results: List[int]) -> float:
+        """Retourne la durée médiane d'une recherche, en millisecondes.
+
+        Args:
+            search: Recherche à mesurer, appelée avec une latitude et une longitude
+            positions: Positions recherchées
+            results: Liste complétée par les identifiants trouvés pour chaque position
+
+        Returns
+        -------
+        float
+            Durée médiane en millisecondes
+        """
+        timings = []
+        for latitude, longitude in positions:
+            start = time.perf_counter()
+            results += search(latitude, longitude)
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings)[len(timings) // 2]
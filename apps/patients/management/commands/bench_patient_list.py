@@ -0,0 +1,100 @@
+# apps/patients/management/commands/bench_patient_list.py
+import time
+from typing import Any, Callable, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.paginator import Paginator
+from django.test import Client
+
+from apps.patients.fast_serializer import serialize_patient
+from apps.patients.models import Patient
+from apps.patients.pagination import KeysetPaginator
+from apps.patients.web_views import PATIENT_ROW_COLUMNS
+
+PER_PAGE = 15
+
+
+class Command(BaseCommand):
+    """Mesure la latence de la liste HTML des patients selon la profondeur de la page.
+
+    Compare, pour des pages de plus en plus profondes, l'ancienne lecture (`Paginator` :
+    `COUNT(*)`, `OFFSET` et ressources FHIR complètes) à la lecture par clé sur les seules
+    colonnes affichées, puis mesure la vue complète (`GET /patient/?after=...`).
+    """
+
+    help = "Mesure la latence de la liste HTML des patients (OFFSET contre keyset) selon la profondeur."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--sort", default="id", help="Tri de la liste (id, last_name, -last_name...)")
+        parser.add_argument("--repeat", type=int, default=20, help="Nombre de lectures par mesure")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Exécute les mesures à chaque profondeur (puissances de 10 jusqu'à la fin de la table).
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        total = Patient.objects.count()
+        if total < PER_PAGE * 10:
+            raise CommandError(f"{total} patients : importer un extrait (import_patients) avant la mesure")
+        depths: List[int] = []
+        depth = 1
+        while depth * PER_PAGE <= total:
+            depths.append(depth)
+            depth *= 10
+        depths.append(total // PER_PAGE)
+
+        rows = Patient.objects.values_list(*PATIENT_ROW_COLUMNS, named=True)
+        keyset = KeysetPaginator(rows, options["sort"], PER_PAGE)
+        ordering = keyset.ordering(reverse=False)
+        client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[0].lstrip(".") if settings.ALLOWED_HOSTS else "localhost")
+        repeat = options["repeat"]
+
+        self.stdout.write(f"{total} patients, tri {options['sort']}, {PER_PAGE} lignes par page (ms par page)")
+        self.stdout.write(f"{'page':>8} {'OFFSET':>10} {'keyset':>10} {'vue':>10}")
+        for page_number in depths:
+            # Curseur de la page : dernière ligne de la page précédente (préparation non mesurée)
+            cursor = None
+            if page_number > 1:
+                cursor = keyset.encode_cursor(rows.order_by(*ordering)[(page_number - 1) * PER_PAGE - 1])
+
+            def offset_page() -> Any:
+                paginator = Paginator(Patient.objects.order_by(*ordering), PER_PAGE)
+                return [serialize_patient(patient) for patient in paginator.page(page_number)]
+
+            offset = self.measure(offset_page, repeat)
+            keyset_time = self.measure(lambda: keyset.get_page(after=cursor), repeat)
+            url = f"/patient/?sort={options['sort']}" + (f"&after={cursor}" if cursor else "")
+            view = self.measure(lambda: client.get(url), repeat)
+            self.stdout.write(f"{page_number:>8} {offset:>10.2f} {keyset_time:>10.2f} {view:>10.2f}")
+
+    def measure(self, operation: Callable[[], Any], repeat: int) -> float:
+        """Retourne la durée médiane d'une opération, en millisecondes.
+
+        Args:
+            operation: Opération à mesurer
+            repeat: Nombre de mesures
+
+        Returns
+        -------
+        float
+            Durée médiane en millisecondes
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            operation()
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings)[len(timings) // 2]
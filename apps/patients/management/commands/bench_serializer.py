@@ -0,0 +1,87 @@
+# apps/patients/management/commands/bench_serializer.py
+import time
+from itertools import cycle, islice
+from typing import Any, Callable, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.patients.fast_serializer import serialize_patient
+from apps.patients.models import Patient
+from apps.patients.serializers import PatientFHIRSerializer
+
+
+class Command(BaseCommand):
+    """Vérifie l'équivalence du sérialiseur rapide sur les patients en base et mesure son gain par ligne.
+
+    Les cas limites (champs vides, coordonnées partielles...) sont couverts par
+    `tests/test_fast_serializer.py`.
+    """
+
+    help = "Compare serialize_patient() à PatientFHIRSerializer (équivalence puis micro-benchmark)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--rows", type=int, default=10000, help="Nombre de lignes sérialisées par mesure")
+        parser.add_argument("--repeat", type=int, default=3, help="Nombre de mesures (la meilleure est retenue)")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Exécute la vérification d'équivalence puis le benchmark.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        patients = list(Patient.objects.order_by("id")[: options["rows"]])
+        if not patients:
+            raise CommandError("Aucun patient : importer un extrait (import_patients) avant la mesure")
+        slow_serializer = PatientFHIRSerializer()
+        renderer = JSONRenderer()
+
+        # Comparaison des JSON rendus : valeurs et ordre des éléments doivent être identiques
+        mismatches = [
+            p.pk
+            for p in patients
+            if renderer.render(slow_serializer.to_representation(p)) != renderer.render(serialize_patient(p))
+        ]
+        if mismatches:
+            raise CommandError(f"Représentations différentes pour les patients : {mismatches}")
+        self.stdout.write(self.style.SUCCESS(f"Équivalence vérifiée sur {len(patients)} patients"))
+
+        sample = list(islice(cycle(patients), options["rows"]))
+        slow = self.measure(lambda p: PatientFHIRSerializer(p).data, sample, options["repeat"])
+        fast = self.measure(serialize_patient, sample, options["repeat"])
+
+        self.stdout.write(f"PatientFHIRSerializer : {slow * 1e6:8.2f} µs/ligne")
+        self.stdout.write(f"serialize_patient     : {fast * 1e6:8.2f} µs/ligne")
+        self.stdout.write(self.style.SUCCESS(f"Gain : x{slow / fast:.1f}"))
+
+    def measure(self, serialize: Callable[[Patient], Dict[str, Any]], sample: List[Patient], repeat: int) -> float:
+        """Mesure le temps moyen de sérialisation d'une ligne.
+
+        Args:
+            serialize: Fonction de sérialisation à mesurer
+            sample: Patients à sérialiser
+            repeat: Nombre de mesures
+
+        Returns
+        -------
+        float
+            Meilleur temps moyen par ligne, en secondes
+        """
+        timings = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            for patient in sample:
+                serialize(patient)
+            timings.append((time.perf_counter() - start) / len(sample))
+        return min(timings)
@@ -0,0 +1,230 @@
+# apps/patients/management/commands/bench_sqlite_contention.py
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from apps.patients.fast_serializer import serialize_patient
+from apps.patients.models import Patient
+from apps.patients.serializers import PatientFHIRSerializer
+from apps.patients.synthetic import patient_resource
+
+# Délai laissé aux processus pour démarrer Django avant le début commun de la mesure
+STARTUP_DELAY = 3.0
+PAGE_SIZE = 20
+
+
+class Command(BaseCommand):
+    """Mesure le débit et le taux d'erreurs de processus concurrents sur une copie de la base SQLite.
+
+    Chaque configuration (SQLite par défaut, puis `DJANGO_SQLITE_PRODUCTION=1`) est mesurée
+    sur sa propre copie de la base. Les processus démarrent ensemble et enchaînent, pendant
+    la durée de la mesure, des créations (comme `POST`), des mises à jour sous verrou
+    (comme `PUT`) et des lectures (une page de liste ou un patient). Une opération qui
+    échoue sur `database is locked` est comptée comme erreur, sans nouvel essai.
+    """
+
+    help = "Compare le débit et le taux d'erreurs de processus concurrents en SQLite par défaut et en mode production."
+
+    requires_system_checks: List[str] = []
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--processes", type=int, default=4, help="Nombre de processus concurrents")
+        parser.add_argument("--duration", type=float, default=5.0, help="Durée de la mesure (s)")
+        parser.add_argument("--writes", type=float, default=0.3, help="Part des écritures parmi les opérations")
+        # Options internes des processus de mesure
+        parser.add_argument("--worker", type=int, default=None, help="(interne) numéro du processus de mesure")
+        parser.add_argument("--start-at", type=float, default=0.0, help="(interne) début commun de la mesure")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Mesure chaque configuration et affiche les résultats côte à côte.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        if options["worker"] is not None:
+            self.stdout.write(json.dumps(self.work(options)))
+            return
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError(f"La mesure porte sur SQLite (base primaire actuelle : {primary.vendor})")
+        if not Patient.objects.exists():
+            raise CommandError("Aucun patient : importer un extrait (import_patients) avant la mesure")
+
+        self.stdout.write(
+            f"{options['processes']} processus pendant {options['duration']} s, "
+            f"{options['writes']:.0%} d'écritures (créations et mises à jour)"
+        )
+        self.stdout.write(
+            f"{'configuration':<18} {'op/s':>8} {'écritures/s':>12} {'lectures/s':>11} "
+            f"{'erreurs':>8} {'p95 (ms)':>9} {'max (ms)':>9}"
+        )
+        for label, production in (("SQLite par défaut", False), ("mode production", True)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "bench.sqlite3")
+                target = sqlite3.connect(path)
+                try:
+                    primary.ensure_connection()
+                    primary.connection.backup(target)
+                finally:
+                    target.close()
+                results = self.run_workers(path, production, options)
+
+            operations = sum(result["writes"] + result["reads"] for result in results)
+            errors = sum(result["errors"] for result in results)
+            latencies = sorted(latency for result in results for latency in result["latencies"])
+            p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+            duration = options["duration"]
+            self.stdout.write(
+                f"{label:<18} {operations / duration:>8.0f} "
+                f"{sum(result['writes'] for result in results) / duration:>12.0f} "
+                f"{sum(result['reads'] for result in results) / duration:>11.0f} "
+                f"{errors / max(operations + errors, 1):>8.1%} {p95:>9.1f} {max(latencies, default=0.0):>9.1f}"
+            )
+
+    def run_workers(self, path: str, production: bool, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Lance les processus de mesure sur une copie de la base et collecte leurs résultats.
+
+        Args:
+            path: Copie de la base SQLite
+            production: Active le mode production de SQLite
+            options: Options de la commande
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Résultats de chaque processus
+        """
+        env = {**os.environ, "DJANGO_SQLITE_PATH": path, "DJANGO_SQLITE_PRODUCTION": "1" if production else "0"}
+        # Les processus de mesure lisent et écrivent la seule copie
+        env.pop("DJANGO_DATABASE_REPLICAS", None)
+        start_at = time.time() + STARTUP_DELAY
+        manage = os.path.abspath(sys.argv[0])
+        workers = [
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    manage,
+                    "bench_sqlite_contention",
+                    f"--worker={index}",
+                    f"--start-at={start_at}",
+                    f"--duration={options['duration']}",
+                    f"--writes={options['writes']}",
+                ],
+                env=env,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for index in range(options["processes"])
+        ]
+        results = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode:
+                raise CommandError(f"Processus de mesure en échec (code {worker.returncode})")
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        return results
+
+    def work(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Enchaîne les opérations d'un processus de mesure jusqu'à la fin de la mesure.
+
+        Args:
+            options: Options de la commande
+
+        Returns
+        -------
+        Dict[str, Any]
+            Opérations réussies, erreurs et latences (ms) du processus
+        """
+        index = options["worker"]
+        rng = random.Random(index)
+        pks = list(Patient.objects.values_list("pk", flat=True))
+        result: Dict[str, Any] = {"writes": 0, "reads": 0, "errors": 0, "latencies": []}
+
+        time.sleep(max(options["start_at"] - time.time(), 0))
+        deadline = options["start_at"] + options["duration"]
+        count = 0
+        while time.time() < deadline:
+            write = rng.random() < options["writes"]
+            start = time.perf_counter()
+            try:
+                if not write:
+                    self.read(rng, pks)
+                elif rng.random() < 0.5:
+                    self.create(f"BENCH-{os.getpid()}-{index}-{count}", count)
+                else:
+                    self.update(rng.choice(pks), count)
+            except OperationalError:
+                # `database is locked` : délai d'attente du verrou d'écriture dépassé
+                result["errors"] += 1
+            else:
+                result["writes" if write else "reads"] += 1
+            result["latencies"].append(round((time.perf_counter() - start) * 1000, 2))
+            count += 1
+        return result
+
+    def read(self, rng: random.Random, pks: List[int]) -> None:
+        """Lit une page de la liste des patients ou un patient.
+
+        Args
+        ----
+        rng : random.Random
+            Générateur aléatoire du processus
+        pks : List[int]
+            Clés primaires existantes
+        """
+        if rng.random() < 0.5:
+            [serialize_patient(patient) for patient in Patient.objects.order_by("-id")[:PAGE_SIZE]]
+        else:
+            serialize_patient(Patient.objects.get(pk=rng.choice(pks)))
+
+    def create(self, ipp: str, count: int) -> None:
+        """Crée un patient comme `POST /api/patient/`.
+
+        Args
+        ----
+        ipp : str
+            IPP du patient créé
+        count : int
+            Numéro de l'opération, utilisé pour varier les noms
+        """
+        serializer = PatientFHIRSerializer(data=patient_resource(ipp, count))
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def update(self, pk: int, count: int) -> None:
+        """Met à jour un patient sous verrou comme `PUT /api/patient/<pk>/`.
+
+        Args
+        ----
+        pk : int
+            Clé primaire du patient
+        count : int
+            Numéro de l'opération, utilisé pour varier les noms
+        """
+        with transaction.atomic():
+            patient = Patient.objects.select_for_update().get(pk=pk)
+            resource = PatientFHIRSerializer(patient).data
+            resource["name"] = [{"family": f"Bench{count}", "given": ["Camille"]}]
+            serializer = PatientFHIRSerializer(patient, data=resource)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
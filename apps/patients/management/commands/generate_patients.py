@@ -0,0 +1,63 @@
+# apps/patients/management/commands/generate_patients.py
+import time
+from datetime import date
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.patients.synthetic import DEFAULT_AS_OF, SeedError, generate_patients
+
+
+class Command(BaseCommand):
+    """Génère des patients synthétiques (démographie française) pour la recette et les mesures.
+
+    Les patients sont tirés colonne par colonne par lots et insérés en masse avec leurs clés
+    de rapprochement des noms ; une même graine produit toujours les mêmes patients.
+    """
+
+    help = "Génère des patients synthétiques reproductibles (--count N --seed S)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("--count", type=int, required=True, help="Nombre de patients à générer")
+        parser.add_argument("--seed", type=int, default=0, help="Graine du générateur (IPP SYN<graine>-<numéro>)")
+        parser.add_argument(
+            "--as-of",
+            type=date.fromisoformat,
+            default=DEFAULT_AS_OF,
+            help=f"Date de référence des âges et des décès (AAAA-MM-JJ, {DEFAULT_AS_OF.isoformat()} par défaut)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Génère les patients et affiche le débit d'insertion.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        if options["count"] < 1:
+            raise CommandError("--count doit être strictement positif")
+        start = time.perf_counter()
+        try:
+            count = generate_patients(
+                options["count"],
+                options["seed"],
+                options["as_of"],
+                progress=lambda inserted: self.stderr.write(f"{inserted}/{options['count']} patients", ending="\r"),
+            )
+        except SeedError:
+            raise CommandError(f"Des patients ont déjà été générés avec la graine {options['seed']} (--seed)")
+        elapsed = time.perf_counter() - start
+        self.stderr.write("")
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} patients générés en {elapsed:.1f} s ({count / elapsed:.0f} patients/s)")
+        )
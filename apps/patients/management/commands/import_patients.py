@@ -0,0 +1,285 @@
+# apps/patients/management/commands/import_patients.py
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import django
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections
+
+from apps.patients.importer import (
+    IGNORED_COLUMNS,
+    IMPORT_FIELDS,
+    Record,
+    Reject,
+    parse_csv,
+    parse_ndjson,
+    upsert_patients,
+)
+
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+COUNTERS = ("inserted", "updated", "unchanged", "rejected")
+
+ParsedChunk = Tuple[List[Record], List[Reject]]
+
+
+def init_worker() -> None:
+    """Initialise Django dans un processus de travail démarré par `spawn` (Windows, macOS)."""
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+class Command(BaseCommand):
+    """Importe un extrait de patients (NDJSON FHIR ou CSV au format `dwh_patient`) par lots et en parallèle.
+
+    La lecture du fichier et l'écriture en base restent dans le processus principal ; la
+    conversion et la validation des lots sont réparties sur un pool de processus. Chaque
+    lot est écrit par upsert sur l'IPP dans sa propre transaction, puis la position atteinte
+    est enregistrée dans un fichier de reprise : une commande interrompue reprend au
+    premier lot non validé. Un lot rejoué après une interruption ne crée pas de doublon.
+    """
+
+    help = "Importe des patients depuis un fichier NDJSON (ressources Patient FHIR) ou CSV (colonnes dwh_patient)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Déclare les options de la commande.
+
+        Args
+        ----
+        parser : CommandParser
+            Parser d'arguments de la commande
+        """
+        parser.add_argument("path", help="Fichier à importer (.ndjson, .jsonl ou .csv)")
+        parser.add_argument("--format", choices=("ndjson", "csv"), help="Format du fichier (déduit de l'extension)")
+        parser.add_argument("--delimiter", default=",", help="Séparateur des fichiers CSV")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Nombre d'enregistrements par lot")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1, help="Processus de conversion (0 : aucun pool)"
+        )
+        parser.add_argument("--checkpoint", help="Fichier de reprise (par défaut : <path>.checkpoint)")
+        parser.add_argument("--restart", action="store_true", help="Ignore le fichier de reprise existant")
+        parser.add_argument("--rejects", help="Fichier NDJSON recevant les enregistrements rejetés et leur motif")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Lance l'import du fichier lot par lot et affiche la progression.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"Fichier introuvable : {path}")
+        file_format = options["format"] or FORMATS.get(path.suffix.lower())
+        if file_format is None:
+            raise CommandError("Format inconnu : préciser --format ndjson ou --format csv")
+
+        checkpoint_path = Path(options["checkpoint"] or f"{path}.checkpoint")
+        source = {"path": str(path.resolve()), "size": path.stat().st_size, "mtime": path.stat().st_mtime}
+        state = self.load_checkpoint(checkpoint_path, source, options["restart"])
+        if state["position"]:
+            self.stdout.write(f"Reprise après {state['position']} enregistrements ({checkpoint_path})")
+
+        parser: Callable[[List[Any]], ParsedChunk] = parse_ndjson if file_format == "ndjson" else parse_csv
+        rejects_file = open(options["rejects"], "a", encoding="utf-8") if options["rejects"] else None
+        shown_rejects = 0
+        start = last_report = time.perf_counter()
+        processed = 0
+
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            reader = self.read_ndjson if file_format == "ndjson" else self.read_csv
+            chunks = self.chunked(reader(stream, options["delimiter"], state["position"]), options["chunk_size"])
+            try:
+                for (records, rejects), position in self.parse_chunks(chunks, parser, options["workers"]):
+                    result = upsert_patients(records)
+                    for counter, value in zip(COUNTERS, (*result, len(rejects))):
+                        state[counter] += value
+                    processed += position - state["position"]
+                    state["position"] = position
+                    self.save_checkpoint(checkpoint_path, state)
+
+                    for number, reason in rejects:
+                        if rejects_file:
+                            rejects_file.write(json.dumps({"record": number, "error": reason}) + "\n")
+                        elif shown_rejects < 20:
+                            self.stderr.write(f"Enregistrement {number} rejeté : {reason}")
+                            shown_rejects += 1
+
+                    if time.perf_counter() - last_report >= 1:
+                        last_report = time.perf_counter()
+                        self.report(state, processed / (last_report - start))
+            finally:
+                if rejects_file:
+                    rejects_file.close()
+
+        elapsed = time.perf_counter() - start
+        self.report(state, processed / elapsed if elapsed else 0.0)
+        checkpoint_path.unlink(missing_ok=True)
+        self.stdout.write(
+            self.style.SUCCESS(f"Import terminé : {state['position']} enregistrements en {elapsed:.1f} s")
+        )
+
+    def read_ndjson(self, stream: IO[str], delimiter: str, skip: int) -> Iterator[Tuple[int, str]]:
+        """Lit les lignes non vides d'un fichier NDJSON, après les `skip` premières lignes.
+
+        Args:
+            stream: Fichier ouvert en lecture
+            delimiter: Inutilisé (signature commune avec `read_csv`)
+            skip: Nombre de lignes déjà importées
+
+        Yields
+        ------
+        Tuple[int, str]
+            Numéro de ligne (à partir de 1) et contenu ; les lignes vides sont renvoyées vides
+        """
+        for number, line in enumerate(islice(stream, skip, None), start=skip + 1):
+            yield number, line.strip()
+
+    def read_csv(self, stream: IO[str], delimiter: str, skip: int) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Lit les lignes de données d'un fichier CSV, après les `skip` premières.
+
+        Args:
+            stream: Fichier ouvert en lecture
+            delimiter: Séparateur de colonnes
+            skip: Nombre de lignes de données déjà importées
+
+        Yields
+        ------
+        Tuple[int, Dict[str, str]]
+            Numéro de ligne de données (à partir de 1) et valeurs par colonne
+        """
+        reader = csv.DictReader(stream, delimiter=delimiter)
+        columns = set(reader.fieldnames or ())
+        unknown = columns - IMPORT_FIELDS.keys() - IGNORED_COLUMNS
+        if unknown:
+            raise CommandError(f"Colonnes inconnues de dwh_patient : {', '.join(sorted(unknown))}")
+        if "ipp" not in columns:
+            raise CommandError("La colonne ipp est obligatoire")
+        yield from enumerate(islice(reader, skip, None), start=skip + 1)
+
+    def chunked(self, items: Iterator[Tuple[int, Any]], size: int) -> Iterator[Tuple[List[Tuple[int, Any]], int]]:
+        """Regroupe les enregistrements par lots, en écartant les lignes vides.
+
+        Args:
+            items: Enregistrements numérotés
+            size: Nombre d'enregistrements par lot
+
+        Yields
+        ------
+        Tuple[List[Tuple[int, Any]], int]
+            Lot d'enregistrements et position atteinte à la fin du lot
+        """
+        chunk: List[Tuple[int, Any]] = []
+        position = 0
+        for position, item in items:
+            if item:
+                chunk.append((position, item))
+            if len(chunk) >= size:
+                yield chunk, position
+                chunk = []
+        if chunk or position:
+            yield chunk, position
+
+    def parse_chunks(
+        self,
+        chunks: Iterator[Tuple[List[Tuple[int, Any]], int]],
+        parser: Callable[[List[Any]], ParsedChunk],
+        workers: int,
+    ) -> Iterator[Tuple[ParsedChunk, int]]:
+        """Convertit les lots sur le pool de processus en conservant l'ordre du fichier.
+
+        Au plus deux lots par processus sont en cours de conversion, ce qui borne la
+        mémoire quelle que soit la taille du fichier.
+
+        Args:
+            chunks: Lots bruts et position atteinte à la fin de chaque lot
+            parser: Fonction de conversion d'un lot
+            workers: Nombre de processus (0 ou 1 : conversion dans le processus principal)
+
+        Yields
+        ------
+        Tuple[ParsedChunk, int]
+            Lot converti et position atteinte à la fin du lot
+        """
+        if workers <= 1:
+            for chunk, position in chunks:
+                yield parser(chunk), position
+            return
+
+        # Les processus forkés ne doivent pas hériter de la connexion ouverte
+        connections.close_all()
+        pending: Deque[Tuple[Future, int]] = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            for chunk, position in chunks:
+                pending.append((executor.submit(parser, chunk), position))
+                if len(pending) >= workers * 2:
+                    future, end = pending.popleft()
+                    yield future.result(), end
+            while pending:
+                future, end = pending.popleft()
+                yield future.result(), end
+
+    def load_checkpoint(self, checkpoint_path: Path, source: Dict[str, Any], restart: bool) -> Dict[str, Any]:
+        """Charge l'état de reprise, ou un état vierge.
+
+        Args:
+            checkpoint_path: Fichier de reprise
+            source: Chemin, taille et date de modification du fichier importé
+            restart: Ignorer le fichier de reprise existant
+
+        Returns
+        -------
+        Dict[str, Any]
+            Position atteinte et compteurs cumulés
+
+        Raises
+        ------
+        CommandError
+            Si le fichier de reprise concerne une autre version du fichier importé
+        """
+        if checkpoint_path.exists() and not restart:
+            state = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+            if state.get("source") != source:
+                raise CommandError(f"{checkpoint_path} concerne un autre fichier : relancer avec --restart")
+            return state
+        return {"source": source, "position": 0, **{counter: 0 for counter in COUNTERS}}
+
+    def save_checkpoint(self, checkpoint_path: Path, state: Dict[str, Any]) -> None:
+        """Enregistre l'état de reprise de façon atomique (écriture puis renommage).
+
+        Args
+        ----
+        checkpoint_path : Path
+            Fichier de reprise
+        state : Dict[str, Any]
+            Position atteinte et compteurs cumulés
+        """
+        temporary = checkpoint_path.with_name(f"{checkpoint_path.name}.tmp")
+        temporary.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(temporary, checkpoint_path)
+
+    def report(self, state: Dict[str, Any], rate: float) -> None:
+        """Affiche la progression de l'import.
+
+        Args
+        ----
+        state : Dict[str, Any]
+            Position atteinte et compteurs cumulés
+        rate : float
+            Débit de la session en enregistrements par seconde
+        """
+        self.stdout.write(
+            f"{state['position']} lus · {state['inserted']} créés · {state['updated']} modifiés · "
+            f"{state['unchanged']} inchangés · {state['rejected']} rejetés · {rate:.0f} enregistrements/s"
+        )
@@ -0,0 +1,50 @@
+# apps/patients/management/commands/sync_replicas.py
+import os
+import sqlite3
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """Recopie la base primaire SQLite dans les réplicas SQLite (`DJANGO_DATABASE_REPLICAS`).
+
+    En local, les réplicas sont des fichiers SQLite ouverts en lecture seule : cette commande
+    joue le rôle de la réplication (API de sauvegarde en ligne de SQLite). Entre deux
+    exécutions, les réplicas sont en retard sur la base primaire, comme le serait une
+    réplique réelle, ce qui permet de vérifier la lecture de ses propres écritures.
+    """
+
+    help = "Recopie la base primaire SQLite dans les réplicas SQLite locaux."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Copie la base primaire dans chaque réplica.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels
+        **options : Any
+            Options de la commande
+        """
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas:
+            raise CommandError("Aucun réplica configuré (DJANGO_DATABASE_REPLICAS)")
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError("Seuls les réplicas SQLite locaux sont recopiés : la réplication relève du serveur")
+
+        primary.ensure_connection()
+        for alias in replicas:
+            # `file:<chemin>?mode=ro` : le réplica est ouvert ici en écriture pour être remplacé
+            path = connections[alias].settings_dict["NAME"].removeprefix("file:").split("?")[0]
+            if os.path.abspath(path) == os.path.abspath(primary.settings_dict["NAME"]):
+                raise CommandError(f"{alias} désigne la base primaire elle-même")
+            target = sqlite3.connect(path)
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"{alias} ({path}) recopié depuis {primary.settings_dict['NAME']}"))
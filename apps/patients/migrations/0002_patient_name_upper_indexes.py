@@ -0,0 +1,30 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:10
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(django.db.models.functions.text.Upper("last_name"), name="dwh_patient_last_name_upper"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                django.db.models.functions.text.Upper("first_name"), name="dwh_patient_first_name_upper"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                django.db.models.functions.text.Upper("maiden_name"), name="dwh_patient_maiden_name_upper"
+            ),
+        ),
+    ]
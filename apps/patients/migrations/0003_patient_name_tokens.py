@@ -0,0 +1,63 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0002_patient_name_upper_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PatientNameToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=6)),
+                ("normalized", models.CharField(max_length=120)),
+                ("phonetic", models.CharField(max_length=4)),
+            ],
+            options={
+                "db_table": "dwh_patient_name_token",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="patient",
+            name="dwh_patient_last_name_upper",
+        ),
+        migrations.RemoveIndex(
+            model_name="patient",
+            name="dwh_patient_first_name_upper",
+        ),
+        migrations.RemoveIndex(
+            model_name="patient",
+            name="dwh_patient_maiden_name_upper",
+        ),
+        migrations.AddField(
+            model_name="patientnametoken",
+            name="patient",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="name_tokens",
+                to="patients.patient",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patientnametoken",
+            index=models.Index(fields=["normalized", "kind"], name="dwh_patient_normali_d50490_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patientnametoken",
+            index=models.Index(fields=["phonetic", "kind"], name="dwh_patient_phoneti_5ed483_idx"),
+        ),
+    ]
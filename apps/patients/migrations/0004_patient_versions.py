@@ -0,0 +1,48 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0003_patient_name_tokens"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PatientHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("patient_id", models.BigIntegerField()),
+                ("version_id", models.PositiveIntegerField()),
+                ("method", models.CharField(max_length=6)),
+                ("recorded_at", models.DateTimeField(db_index=True)),
+                ("resource", models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "dwh_patient_history",
+            },
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="version_id",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["update_date"], name="dwh_patient_update__c3359e_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="patienthistory",
+            constraint=models.UniqueConstraint(fields=("patient_id", "version_id"), name="patient_version_unique"),
+        ),
+    ]
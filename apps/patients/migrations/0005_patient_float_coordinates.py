@@ -0,0 +1,181 @@
+# Generated by Django 5.0.7 on 2026-10-17 23:41
+
+import math
+import re
+from typing import Any, Optional, Tuple
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+# Copies figées de `geo` au moment de la migration : une évolution du module ne doit pas en changer le résultat
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 7
+# Séparateur de la colonne `coordinates` ("latitude, longitude") : la virgule décimale reste possible
+COORDINATES_SEPARATOR = re.compile(r"\s*;\s*|,\s+|\s+")
+
+
+def parse_coordinate(value: Any, limit: float) -> Optional[float]:
+    """Coordonnée en degrés décimaux (virgule décimale acceptée), None si absente ; ValueError si invalide."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid coordinate: {value!r}")
+    number = float(value.strip().replace(",", ".") if isinstance(value, str) else value)
+    if not math.isfinite(number) or abs(number) > limit:
+        raise ValueError(f"Coordinate out of range [-{limit:g}, {limit:g}]: {value!r}")
+    return number
+
+
+def location_cell(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """Geohash de précision `GEOHASH_PRECISION` d'une position, None si elle est incomplète."""
+    if latitude is None or longitude is None:
+        return None
+    bounds = [[-90.0, 90.0], [-180.0, 180.0]]
+    position = (latitude, longitude)
+    chars = []
+    bits = 0
+    axis = 1  # Le premier bit porte sur la longitude
+    for index in range(GEOHASH_PRECISION * 5):
+        low, high = bounds[axis]
+        middle = (low + high) / 2
+        bits <<= 1
+        if position[axis] >= middle:
+            bits |= 1
+            bounds[axis][0] = middle
+        else:
+            bounds[axis][1] = middle
+        axis = 1 - axis
+        if index % 5 == 4:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+    return "".join(chars)
+
+
+def clean_pair(latitude: Any, longitude: Any) -> Tuple[Optional[float], Optional[float]]:
+    """Position nettoyée : une coordonnée invalide ou manquante annule la paire, tout comme (0, 0)."""
+    try:
+        latitude = parse_coordinate(latitude, 90.0)
+        longitude = parse_coordinate(longitude, 180.0)
+    except (TypeError, ValueError):
+        return None, None
+    # (0, 0) est la valeur par défaut des extractions sans géocodage, pas une adresse
+    if latitude is None or longitude is None or (latitude == 0 and longitude == 0):
+        return None, None
+    return latitude, longitude
+
+
+def clean_coordinates(apps: Any, schema_editor: Any) -> None:
+    """Recopie les coordonnées texte de résidence en nombres, nettoie celles de naissance et calcule les geohash."""
+    Patient = apps.get_model("patients", "Patient")
+    connection = schema_editor.connection
+    located = (
+        models.Q(residence_latitude_text__isnull=False)
+        | models.Q(residence_longitude_text__isnull=False)
+        | models.Q(coordinates__isnull=False)
+        | models.Q(birth_latitude__isnull=False)
+        | models.Q(birth_longitude__isnull=False)
+    )
+    rows = Patient.objects.using(connection.alias).filter(located).order_by("id")
+    columns = (
+        "id",
+        "residence_latitude_text",
+        "residence_longitude_text",
+        "coordinates",
+        "birth_latitude",
+        "birth_longitude",
+    )
+    # Une requête UPDATE préparée par ligne : `bulk_update` construirait des CASE de 2000 branches
+    update = (
+        f"UPDATE {connection.ops.quote_name(Patient._meta.db_table)} SET residence_latitude = %s, residence_longitude = %s, residence_geohash = %s, "
+        "birth_latitude = %s, birth_longitude = %s WHERE id = %s"
+    )
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id).values_list(*columns)[:BATCH_SIZE])
+        if not batch:
+            break
+        params = []
+        for pk, latitude_text, longitude_text, coordinates, birth_latitude, birth_longitude in batch:
+            latitude, longitude = clean_pair(latitude_text, longitude_text)
+            if latitude is None and coordinates:
+                parts = COORDINATES_SEPARATOR.split(coordinates.strip())
+                if len(parts) == 2:
+                    latitude, longitude = clean_pair(*parts)
+            params.append(
+                (
+                    latitude,
+                    longitude,
+                    location_cell(latitude, longitude),
+                    *clean_pair(birth_latitude, birth_longitude),
+                    pk,
+                )
+            )
+        with connection.cursor() as cursor:
+            cursor.executemany(update, params)
+        last_id = batch[-1][0]
+
+
+def restore_text_coordinates(apps: Any, schema_editor: Any) -> None:
+    """Recopie les coordonnées de résidence dans les colonnes texte (retour arrière)."""
+    Patient = apps.get_model("patients", "Patient")
+    patients = Patient.objects.using(schema_editor.connection.alias)
+    last_id = 0
+    while True:
+        batch = list(patients.filter(residence_latitude__isnull=False, id__gt=last_id).order_by("id")[:BATCH_SIZE])
+        if not batch:
+            break
+        for patient in batch:
+            patient.residence_latitude_text = str(patient.residence_latitude)
+            patient.residence_longitude_text = (
+                None if patient.residence_longitude is None else str(patient.residence_longitude)
+            )
+        patients.bulk_update(batch, ("residence_latitude_text", "residence_longitude_text"))
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0004_patient_versions"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="patient",
+            old_name="residence_latitude",
+            new_name="residence_latitude_text",
+        ),
+        migrations.RenameField(
+            model_name="patient",
+            old_name="residence_longitude",
+            new_name="residence_longitude_text",
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="residence_latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="residence_longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="patient",
+            name="residence_geohash",
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(clean_coordinates, restore_text_coordinates),
+        migrations.RemoveField(
+            model_name="patient",
+            name="residence_latitude_text",
+        ),
+        migrations.RemoveField(
+            model_name="patient",
+            name="residence_longitude_text",
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["residence_geohash"], name="dwh_patient_residen_ac0992_idx"),
+        ),
+    ]
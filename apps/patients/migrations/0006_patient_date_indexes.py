@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-17 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0005_patient_float_coordinates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["birth_date"], name="dwh_patient_birth_d_10181a_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["death_date"], name="dwh_patient_death_d_7d384d_idx"),
+        ),
+    ]
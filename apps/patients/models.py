@@ -1,5 +1,16 @@
 # apps/patients/models.py
-from django.db import models
+from typing import Any, List
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .geo import location_cell
+from .phonetic import french_soundex, name_tokens
+
+# Colonnes dont dérivent les clés de rapprochement des noms
+NAME_FIELDS = {"last_name": "family", "first_name": "given", "maiden_name": "maiden"}
+# Colonnes dont dérive la cellule geohash de l'adresse
+LOCATION_FIELDS = {"residence_latitude", "residence_longitude"}
 
 
 class Patient(models.Model):
@@ -17,8 +28,10 @@ class Patient(models.Model):
     residence_country = models.CharField(max_length=100, blank=True, null=True)
     residence_city = models.CharField(max_length=200, blank=True, null=True)
     residence_zip_code = models.CharField(max_length=30, blank=True, null=True)
-    residence_latitude = models.CharField(max_length=300, blank=True, null=True)
-    residence_longitude = models.CharField(max_length=300, blank=True, null=True)
+    residence_latitude = models.FloatField(blank=True, null=True)
+    residence_longitude = models.FloatField(blank=True, null=True)
+    # Cellule geohash de l'adresse, maintenue par `save` : index de la recherche `near`
+    residence_geohash = models.CharField(max_length=12, blank=True, null=True, editable=False)
     coordinates = models.CharField(max_length=200, blank=True, null=True)
     death_code = models.CharField(max_length=2, blank=True, null=True)
     death_date = models.DateTimeField(blank=True, null=True)
@@ -28,6 +41,7 @@ class Patient(models.Model):
     birth_latitude = models.FloatField(blank=True, null=True)
     birth_longitude = models.FloatField(blank=True, null=True)
     update_date = models.DateTimeField(blank=True, null=True)
+    version_id = models.PositiveIntegerField(default=1)  # meta.versionId FHIR, incrémenté à chaque écriture
 
     class Meta:
         db_table = "dwh_patient"
@@ -36,4 +50,94 @@ class Patient(models.Model):
             models.Index(fields=("first_name",)),
             models.Index(fields=("maiden_name",)),
             models.Index(fields=("ipp",)),
+            models.Index(fields=("update_date",)),
+            models.Index(fields=("birth_date",)),
+            models.Index(fields=("death_date",)),
+            models.Index(fields=("residence_geohash",)),
         )
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Enregistre le patient, avance sa version et recalcule ses clés de rapprochement des noms.
+
+        Chaque écriture incrémente `version_id`, horodate `update_date` et recalcule la
+        cellule geohash de l'adresse ; la version enregistrée est archivée dans
+        `PatientHistory` par le signal `post_save`.
+
+        Args
+        ----
+        *args : Any
+            Arguments positionnels de `Model.save`
+        **kwargs : Any
+            Arguments nommés de `Model.save`
+        """
+        update_fields = kwargs.get("update_fields")
+        if not self._state.adding:
+            self.version_id += 1
+        self.update_date = timezone.now()
+        self.residence_geohash = location_cell(self.residence_latitude, self.residence_longitude)
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version_id", "update_date"}
+            if set(update_fields) & LOCATION_FIELDS:
+                kwargs["update_fields"].add("residence_geohash")
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            if update_fields is None or set(update_fields) & NAME_FIELDS.keys():
+                self.name_tokens.all().delete()
+                PatientNameToken.objects.bulk_create(PatientNameToken.for_patient(self))
+
+
+class PatientNameToken(models.Model):
+    """Clé de rapprochement d'un mot du nom d'un patient, calculée à l'écriture.
+
+    Chaque mot du nom de famille, du prénom et du nom de naissance est stocké sous forme
+    normalisée (sans accents ni casse) et sous forme phonétique (Soundex2), avec des index
+    permettant les recherches par préfixe et phonétiques sans parcourir `dwh_patient`.
+    """
+
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name="name_tokens")
+    kind = models.CharField(max_length=6)  # family, given ou maiden
+    normalized = models.CharField(max_length=120)
+    phonetic = models.CharField(max_length=4)
+
+    class Meta:
+        db_table = "dwh_patient_name_token"
+        indexes = (
+            models.Index(fields=("normalized", "kind")),
+            models.Index(fields=("phonetic", "kind")),
+        )
+
+    @classmethod
+    def for_patient(cls, patient: Patient) -> List["PatientNameToken"]:
+        """Construit (sans les enregistrer) les clés de rapprochement d'un patient.
+
+        Args:
+            patient: Instance du modèle Patient, déjà enregistrée
+
+        Returns
+        -------
+        List[PatientNameToken]
+            Une clé par mot de chaque composant du nom
+        """
+        return [
+            cls(patient_id=patient.pk, kind=kind, normalized=token, phonetic=french_soundex(token))
+            for field, kind in NAME_FIELDS.items()
+            for token in name_tokens(getattr(patient, field))
+        ]
+
+
+class PatientHistory(models.Model):
+    """Version archivée d'un patient, servie par `_history` et la lecture de version (vread).
+
+    Une ligne par version : la ressource FHIR telle qu'elle a été enregistrée, ou aucune
+    ressource pour une suppression. Sans clé étrangère, l'historique survit au patient.
+    """
+
+    patient_id = models.BigIntegerField()
+    version_id = models.PositiveIntegerField()
+    method = models.CharField(max_length=6)  # POST, PUT ou DELETE
+    recorded_at = models.DateTimeField(db_index=True)
+    resource = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        db_table = "dwh_patient_history"
+        constraints = (models.UniqueConstraint(fields=("patient_id", "version_id"), name="patient_version_unique"),)
@@ -0,0 +1,57 @@
+# apps/patients/negotiation.py
+from typing import List, Optional, Tuple
+
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+
+# Valeurs de `_format` désignant un format par son nom court plutôt que par son type de média
+FORMAT_ALIASES = {
+    "json": "json",
+    "text/json": "json",
+    "html": "api",
+    "text/html": "api",
+    "ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+}
+
+
+class FHIRContentNegotiation(DefaultContentNegotiation):
+    """Négociation de contenu DRF complétée par le paramètre FHIR `_format`.
+
+    `_format` accepte un type de média (`application/fhir+json`) ou un nom court (`json`)
+    et prévaut sur l'en-tête `Accept`, comme le prévoit la spécification FHIR.
+    """
+
+    def select_renderer(
+        self, request: Request, renderers: List[BaseRenderer], format_suffix: Optional[str] = None
+    ) -> Tuple[BaseRenderer, str]:
+        """Choisit le renderer de la réponse.
+
+        Args:
+            request: Requête DRF
+            renderers: Renderers disponibles pour la vue
+            format_suffix: Format imposé par l'URL
+
+        Returns
+        -------
+        Tuple[BaseRenderer, str]
+            Renderer retenu et type de média de la réponse
+
+        Raises
+        ------
+        NotAcceptable
+            Si aucun renderer ne correspond à `_format`
+        """
+        requested = request.query_params.get("_format")
+        if not requested or format_suffix:
+            return super().select_renderer(request, renderers, format_suffix)
+
+        # Un « + » non encodé dans l'URL (application/fhir+json) est décodé en espace
+        requested = requested.strip().replace(" ", "+")
+        renderer_format = FORMAT_ALIASES.get(requested)
+        for renderer in renderers:
+            if renderer.media_type == requested or renderer.format == renderer_format:
+                return renderer, renderer.media_type
+        raise NotAcceptable(f"Unsupported _format: {requested}", available_renderers=renderers)
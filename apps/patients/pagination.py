@@ -0,0 +1,452 @@
+# apps/patients/pagination.py
+import base64
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.urls import reverse
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .cache import version_etag
+from .geo import distance_expression
+from .models import PatientHistory
+from .search import NearTerm, SearchPlan, rank_candidates
+
+# Extension FHIR portant la distance d'un résultat de recherche `near`
+DISTANCE_URL = "http://hl7.org/fhir/StructureDefinition/location-distance"
+
+# Statut HTTP d'origine de chaque type d'écriture archivée
+HISTORY_STATUS = {"POST": "201 Created", "PUT": "200 OK", "DELETE": "204 No Content"}
+
+# Tris de la liste HTML : clé primaire ou colonne de nom indexée, départagée par la clé primaire
+PATIENT_LIST_SORTS = ("id", "last_name", "-last_name", "first_name", "-first_name")
+
+
+class PatientBundlePagination(CursorPagination):
+    """Pagination par curseur (keyset) sur `id` renvoyant un Bundle FHIR `searchset`.
+
+    Chaque page est obtenue par un `WHERE id > <curseur> ORDER BY id LIMIT n + 1` :
+    le coût d'une page est constant quelle que soit sa profondeur (aucun OFFSET,
+    aucun `COUNT(*)`, jamais de chargement complet de la table).
+    """
+
+    ordering = "id"
+    page_size = 20
+    max_page_size = 1000
+    page_size_query_param = "_count"
+    cursor_query_param = "_cursor"
+    template = None
+    scores: Optional[Dict[str, float]] = None
+    distances: Optional[Dict[str, float]] = None
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> Optional[List[Any]]:
+        """Retourne les instances de la page courante.
+
+        Args:
+            queryset: Queryset de patients à paginer
+            request: Requête DRF contenant `_count` et `_cursor`
+            view: Vue appelante (optionnelle)
+
+        Returns
+        -------
+        Optional[List[Any]]
+            Instances de la page courante
+        """
+        self.fhir_base_url = request.build_absolute_uri(reverse("api-patient-list"))
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_ranked(self, plan: SearchPlan, request: Request) -> List[Any]:
+        """Retourne la page unique des meilleurs candidats d'une recherche phonétique.
+
+        Les résultats sont triés par score et non par `id` : ils ne sont pas paginés
+        par curseur, `_count` fixe le nombre de candidats renvoyés.
+
+        Args:
+            plan: Plan de recherche comportant au moins un critère phonétique
+            request: Requête DRF contenant `_count`
+
+        Returns
+        -------
+        List[Any]
+            Patients classés du plus proche au plus éloigné
+        """
+        self.fhir_base_url = request.build_absolute_uri(reverse("api-patient-list"))
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.has_next = self.has_previous = False
+        ranked = rank_candidates(plan, self.page_size)
+        self.scores = {str(patient.pk): score for patient, score in ranked}
+        return [patient for patient, _ in ranked]
+
+    def paginate_near(self, queryset: QuerySet, near: NearTerm, request: Request) -> List[Any]:
+        """Retourne la page unique des patients les plus proches d'une recherche `near`.
+
+        Comme pour la recherche phonétique, les résultats sont triés par distance et non
+        par `id` : `_count` fixe le nombre de patients renvoyés, sans curseur. La base ne
+        trie que les lignes du rayon, lues par l'index geohash.
+
+        Args:
+            queryset: Queryset filtré par le planificateur (rayon compris)
+            near: Position et rayon de la recherche
+            request: Requête DRF contenant `_count`
+
+        Returns
+        -------
+        List[Any]
+            Patients classés du plus proche au plus éloigné
+        """
+        self.fhir_base_url = request.build_absolute_uri(reverse("api-patient-list"))
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.has_next = self.has_previous = False
+        queryset = queryset.annotate(near_distance=distance_expression(near.latitude, near.longitude))
+        patients = list(queryset.order_by("near_distance", "id")[: self.page_size])
+        self.distances = {str(patient.pk): round(patient.near_distance, 3) for patient in patients}
+        return patients
+
+    def get_links(self) -> List[Dict[str, str]]:
+        """Construit les liens FHIR `self`, `next` et `previous` du Bundle.
+
+        Returns
+        -------
+        List[Dict[str, str]]
+            Liste des liens du Bundle
+        """
+        links = [{"relation": "self", "url": self.base_url}]
+        next_link = self.get_next_link()
+        if next_link:
+            links.append({"relation": "next", "url": next_link})
+        previous_link = self.get_previous_link()
+        if previous_link:
+            links.append({"relation": "previous", "url": previous_link})
+        return links
+
+    def get_bundle(
+        self, data: List[Dict[str, Any]], warnings: Optional[List[str]] = None, total: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Enveloppe les ressources sérialisées dans un Bundle FHIR `searchset`.
+
+        Args:
+            data: Ressources Patient FHIR de la page courante
+            warnings: Avertissements du planificateur de recherche, renvoyés dans un OperationOutcome
+            total: Nombre de résultats de la recherche (omis si None)
+
+        Returns
+        -------
+        Dict[str, Any]
+            Bundle FHIR de type `searchset`
+        """
+        entries: List[Dict[str, Any]] = [
+            {
+                "fullUrl": f"{self.fhir_base_url}{resource['id']}/",
+                "resource": resource,
+                "search": self.get_entry_search(resource["id"]),
+            }
+            for resource in data
+        ]
+        if warnings:
+            entries.append(
+                {
+                    "resource": {
+                        "resourceType": "OperationOutcome",
+                        "issue": [
+                            {"severity": "warning", "code": "processing", "diagnostics": warning}
+                            for warning in warnings
+                        ],
+                    },
+                    "search": {"mode": "outcome"},
+                }
+            )
+        bundle: Dict[str, Any] = {"resourceType": "Bundle", "type": "searchset"}
+        if total is not None:
+            bundle["total"] = total
+        bundle["link"] = self.get_links()
+        bundle["entry"] = entries
+        return bundle
+
+    def get_entry_search(self, resource_id: str) -> Dict[str, Any]:
+        """Construit l'élément `search` d'une entrée : score phonétique ou distance `near` éventuels.
+
+        Args:
+            resource_id: Identifiant de la ressource
+
+        Returns
+        -------
+        Dict[str, Any]
+            Élément `search` de l'entrée
+        """
+        search: Dict[str, Any] = {"mode": "match"}
+        if self.scores:
+            search["score"] = self.scores[resource_id]
+        if self.distances:
+            search["extension"] = [
+                {
+                    "url": DISTANCE_URL,
+                    "valueDistance": {
+                        "value": self.distances[resource_id],
+                        "unit": "km",
+                        "system": "http://unitsofmeasure.org",
+                        "code": "km",
+                    },
+                }
+            ]
+        return search
+
+    def get_count_response(
+        self, total: Optional[int], request: Request, warnings: Optional[List[str]] = None
+    ) -> Response:
+        """Retourne le Bundle `searchset` de `_summary=count` : le nombre de résultats, sans entrée de patient.
+
+        Args:
+            total: Nombre de patients correspondant à la recherche (omis si aucune estimation)
+            request: Requête DRF
+            warnings: Avertissements du planificateur de recherche
+
+        Returns
+        -------
+        Response
+            Réponse contenant le Bundle `searchset` et son `total`
+        """
+        self.fhir_base_url = request.build_absolute_uri(reverse("api-patient-list"))
+        self.base_url = request.build_absolute_uri()
+        self.has_next = self.has_previous = False
+        bundle = self.get_bundle([], warnings, total)
+        if not bundle["entry"]:
+            del bundle["entry"]
+        return Response(bundle)
+
+    def get_paginated_response(
+        self, data: List[Dict[str, Any]], warnings: Optional[List[str]] = None, total: Optional[int] = None
+    ) -> Response:
+        """Retourne la réponse HTTP contenant le Bundle FHIR.
+
+        Args:
+            data: Ressources Patient FHIR de la page courante
+            warnings: Avertissements du planificateur de recherche
+            total: Nombre de résultats de la recherche (omis si None)
+
+        Returns
+        -------
+        Response
+            Réponse contenant le Bundle `searchset`
+        """
+        return Response(self.get_bundle(data, warnings, total))
+
+
+class PatientHistoryPagination(CursorPagination):
+    """Pagination par curseur sur les versions d'un patient, de la plus récente à la plus ancienne.
+
+    Renvoie un Bundle FHIR `history` ; chaque page est lue sur la contrainte
+    unique (patient, version) sans `COUNT(*)`.
+    """
+
+    ordering = "-version_id"
+    page_size = 20
+    max_page_size = 1000
+    page_size_query_param = "_count"
+    cursor_query_param = "_cursor"
+    template = None
+
+    def get_history_entry(self, version: PatientHistory) -> Dict[str, Any]:
+        """Construit l'entrée de Bundle `history` d'une version archivée.
+
+        Args:
+            version: Version archivée du patient
+
+        Returns
+        -------
+        Dict[str, Any]
+            Entrée avec la ressource (sauf suppression), la requête et la réponse d'origine
+        """
+        full_url = self.request.build_absolute_uri(reverse("api-patient-detail", args=[version.patient_id]))
+        entry: Dict[str, Any] = {"fullUrl": full_url}
+        if version.resource is not None:
+            entry["resource"] = version.resource
+        entry["request"] = {
+            "method": version.method,
+            "url": "Patient" if version.method == "POST" else f"Patient/{version.patient_id}",
+        }
+        entry["response"] = {
+            "status": HISTORY_STATUS[version.method],
+            "etag": version_etag(version.version_id),
+            "lastModified": version.recorded_at.isoformat(),
+        }
+        return entry
+
+    def get_paginated_response(self, data: List[Dict[str, Any]]) -> Response:
+        """Retourne la réponse HTTP contenant le Bundle FHIR `history`.
+
+        Args:
+            data: Entrées `history` de la page courante
+
+        Returns
+        -------
+        Response
+            Réponse contenant le Bundle `history`
+        """
+        links = [{"relation": "self", "url": self.base_url}]
+        for relation, url in (("next", self.get_next_link()), ("previous", self.get_previous_link())):
+            if url:
+                links.append({"relation": relation, "url": url})
+        return Response({"resourceType": "Bundle", "type": "history", "link": links, "entry": data})
+
+
+class KeysetPage(NamedTuple):
+    """Page d'une pagination par clé : lignes et curseurs des pages voisines."""
+
+    rows: List[Any]
+    next_cursor: Optional[str]
+    previous_cursor: Optional[str]
+
+
+class KeysetPaginator:
+    """Pagination par clé (keyset) d'un queryset de lignes `values_list(named=True)`, sans OFFSET ni COUNT.
+
+    L'ordre est `(colonne, id)` : chaque page est lue par `WHERE (colonne, id) > curseur
+    ORDER BY colonne, id LIMIT n + 1` sur l'index de la colonne, à coût constant quelle que
+    soit la profondeur. Les NULL sont placés comme le fait nativement la base (en tête sous
+    SQLite, en fin sous PostgreSQL) pour que l'index reste utilisable.
+    """
+
+    def __init__(self, queryset: QuerySet, sort: str = "id", per_page: int = 15) -> None:
+        """Initialise le paginator.
+
+        Args
+        ----
+        queryset : QuerySet
+            Queryset de lignes nommées comportant `id` et la colonne de tri
+        sort : str
+            Colonne de tri, préfixée par `-` pour un ordre décroissant (voir `PATIENT_LIST_SORTS`)
+        per_page : int
+            Nombre de lignes par page
+        """
+        self.queryset = queryset
+        self.descending = sort.startswith("-")
+        self.field = sort.lstrip("-")
+        self.per_page = per_page
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+    def ordering(self, reverse: bool) -> List[str]:
+        """Ordre SQL du parcours.
+
+        Args:
+            reverse: Parcours à rebours (page précédente, dernière page)
+
+        Returns
+        -------
+        List[str]
+            Critères de `order_by`
+        """
+        prefix = "-" if self.descending != reverse else ""
+        if self.field == "id":
+            return [f"{prefix}id"]
+        return [f"{prefix}{self.field}", f"{prefix}id"]
+
+    def segments(self, cursor: Optional[List[Any]], reverse: bool) -> List[Q]:
+        """Conditions successives sélectionnant les lignes situées après le curseur dans le sens du parcours.
+
+        Les NULL forment un segment distinct, lu avant ou après les valeurs selon leur position :
+        une condition unique (`... OR colonne IS NULL`) empêcherait la base de partir du curseur
+        dans l'index et la forcerait à le parcourir depuis le début.
+
+        Args:
+            cursor: Valeur de la colonne de tri et clé primaire de la ligne de référence (None : début)
+            reverse: Parcours à rebours
+
+        Returns
+        -------
+        List[Q]
+            Conditions à lire dans l'ordre, chacune triée par `ordering`
+        """
+        if cursor is None:
+            return [Q()]
+        value, pk = cursor
+        descending = self.descending != reverse
+        lookup = "lt" if descending else "gt"
+        if self.field == "id":
+            return [Q(**{f"id__{lookup}": pk})]
+        # Les NULL sont en fin de parcours s'ils sont « plus grands » en ordre croissant, ou l'inverse
+        nulls_at_end = self.nulls_largest != descending
+        if value is None:
+            nulls = Q(**{f"{self.field}__isnull": True, f"id__{lookup}": pk})
+            return [nulls] if nulls_at_end else [nulls, Q(**{f"{self.field}__isnull": False})]
+        # La borne `>=` (ou `<=`), redondante, permet le parcours de l'index à partir du curseur
+        values = Q(**{f"{self.field}__{lookup}e": value}) & (
+            Q(**{f"{self.field}__{lookup}": value}) | Q(**{f"id__{lookup}": pk})
+        )
+        return [values, Q(**{f"{self.field}__isnull": True})] if nulls_at_end else [values]
+
+    def encode_cursor(self, row: Any) -> str:
+        """Encode la position d'une ligne en curseur opaque.
+
+        Args:
+            row: Ligne nommée
+
+        Returns
+        -------
+        str
+            Curseur base64 (URL)
+        """
+        value = None if self.field == "id" else getattr(row, self.field)
+        return base64.urlsafe_b64encode(json.dumps([value, row.id]).encode()).decode()
+
+    def decode_cursor(self, token: Optional[str]) -> Optional[List[Any]]:
+        """Décode un curseur, en ignorant un curseur invalide.
+
+        Args:
+            token: Curseur reçu dans l'URL
+
+        Returns
+        -------
+        Optional[List[Any]]
+            Valeur de tri et clé primaire, ou None
+        """
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+        except ValueError:
+            return None
+        valid = isinstance(cursor, list) and len(cursor) == 2 and isinstance(cursor[1], int)
+        return cursor if valid and (cursor[0] is None or isinstance(cursor[0], str)) else None
+
+    def get_page(self, after: Optional[str] = None, before: Optional[str] = None, last: bool = False) -> KeysetPage:
+        """Lit une page : la première, celle qui suit `after`, celle qui précède `before` ou la dernière.
+
+        Args:
+            after: Curseur de la dernière ligne de la page précédente
+            before: Curseur de la première ligne de la page suivante
+            last: Lire la dernière page
+
+        Returns
+        -------
+        KeysetPage
+            Lignes de la page et curseurs de navigation
+        """
+        after_cursor = self.decode_cursor(after)
+        before_cursor = None if after_cursor else self.decode_cursor(before)
+        reverse = last or before_cursor is not None
+
+        queryset = self.queryset.order_by(*self.ordering(reverse))
+        cursor = before_cursor or after_cursor
+        rows: List[Any] = []
+        for condition in self.segments(cursor, reverse):
+            rows += queryset.filter(condition)[: self.per_page + 1 - len(rows)]
+            if len(rows) > self.per_page:
+                break
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = not last, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        return KeysetPage(
+            rows,
+            self.encode_cursor(rows[-1]) if rows and has_next else None,
+            self.encode_cursor(rows[0]) if rows and has_previous else None,
+        )
@@ -0,0 +1,49 @@
+# apps/patients/parsers.py
+from typing import IO, Any, Optional
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from . import fhir_json
+from .renderers import FastJSONRenderer, FHIRJSONRenderer
+
+
+class FastJSONParser(JSONParser):
+    """Parser JSON (`application/json`) décodé par `orjson` quand il est disponible."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream: IO[bytes], media_type: Optional[str] = None, parser_context: Any = None) -> Any:
+        """Décode le corps de la requête.
+
+        Args:
+            stream: Corps de la requête
+            media_type: Type de média du corps
+            parser_context: Contexte DRF (encodage de la requête)
+
+        Returns
+        -------
+        Any
+            Données décodées
+
+        Raises
+        ------
+        ParseError
+            Si le corps n'est pas du JSON valide
+        """
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            content: Any = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                content = content.decode(encoding)
+            return fhir_json.loads(content)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class FHIRJSONParser(FastJSONParser):
+    """Parser FHIR JSON (`application/fhir+json`)."""
+
+    media_type = "application/fhir+json"
+    renderer_class = FHIRJSONRenderer
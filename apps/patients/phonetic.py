@@ -0,0 +1,100 @@
+# apps/patients/phonetic.py
+import re
+import unicodedata
+from typing import List, Optional
+
+LIGATURES = {"œ": "oe", "æ": "ae"}
+
+# Étape 2 de Soundex2 : groupes de lettres prononcés [k]
+SOUNDEX2_GROUPS = (
+    ("GUI", "KI"),
+    ("GUE", "KE"),
+    ("GA", "KA"),
+    ("GO", "KO"),
+    ("GU", "K"),
+    ("CA", "KA"),
+    ("CO", "KO"),
+    ("CU", "KU"),
+    ("Q", "K"),
+    ("CC", "K"),
+    ("CK", "K"),
+)
+
+# Étape 4 de Soundex2 : préfixes
+SOUNDEX2_PREFIXES = (
+    ("MAC", "MCC"),
+    ("ASA", "AZA"),
+    ("KN", "NN"),
+    ("PF", "FF"),
+    ("SCH", "SSS"),
+    ("PH", "FF"),
+)
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """Normalise un nom pour la comparaison : sans accents, en minuscules, séparateurs unifiés.
+
+    Les tirets, apostrophes et autres séparateurs deviennent des espaces, de sorte que
+    `Dupont-Léger` et `d'Ormesson` sont découpés en mots comparables.
+
+    Args:
+        value: Nom à normaliser
+
+    Returns
+    -------
+    str
+        Nom normalisé (chaîne vide si absent)
+    """
+    if not value:
+        return ""
+    value = value.casefold()
+    for ligature, replacement in LIGATURES.items():
+        value = value.replace(ligature, replacement)
+    value = "".join(c for c in unicodedata.normalize("NFKD", value) if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", value).strip()
+
+
+def name_tokens(value: Optional[str]) -> List[str]:
+    """Découpe un nom en mots normalisés.
+
+    Args:
+        value: Nom à découper
+
+    Returns
+    -------
+    List[str]
+        Mots normalisés, dans l'ordre
+    """
+    return normalize_name(value).split()
+
+
+def french_soundex(value: Optional[str]) -> str:
+    """Calcule le code phonétique d'un mot selon l'algorithme Soundex2 (adapté au français).
+
+    Args:
+        value: Mot à coder
+
+    Returns
+    -------
+    str
+        Code phonétique de 1 à 4 lettres (chaîne vide si le mot ne contient aucune lettre)
+    """
+    word = re.sub(r"[^A-Z]", "", normalize_name(value).upper())
+    if not word:
+        return ""
+    first_letter = word[0]
+
+    for group, replacement in SOUNDEX2_GROUPS:
+        word = word.replace(group, replacement)
+    word = word[0] + re.sub(r"[EIOU]", "A", word[1:])
+    for prefix, replacement in SOUNDEX2_PREFIXES:
+        if word.startswith(prefix):
+            word = replacement + word[len(prefix) :]
+            break
+    word = re.sub(r"(?<![CS])H", "", word)
+    word = re.sub(r"(?<!A)Y", "", word)
+    word = re.sub(r"(?<=.)[ATDS]$", "", word)
+    word = word[:1] + word[1:].replace("A", "")
+    word = re.sub(r"(.)\1+", r"\1", word)
+
+    return word[:4] or first_letter
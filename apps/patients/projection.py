@@ -0,0 +1,140 @@
+# apps/patients/projection.py
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from django.db.models import QuerySet
+from django.http import QueryDict
+
+from .fast_serializer import ELEMENTS, META_FIELDS, SUBSETTED_TAG, serialize_patient
+from .models import Patient
+from .search import SearchError
+
+# Éléments du résumé FHIR de Patient (`isSummary`) présents dans nos ressources
+SUMMARY_ELEMENTS = frozenset(
+    {"identifier", "active", "name", "telecom", "gender", "birthDate", "deceasedDateTime", "address"}
+)
+# Noms d'éléments à type choisi (`deceased[x]`) acceptés dans `_elements`
+ELEMENT_ALIASES = {"deceased": "deceasedDateTime"}
+# Éléments toujours renvoyés, inutiles dans `_elements`
+MANDATORY_ELEMENTS = {"resourceType", "id", "meta"}
+SUMMARY_MODES = ("true", "false", "data", "text", "count")
+
+
+class Projection(NamedTuple):
+    """Projection FHIR (`_elements`, `_summary`) d'une lecture de patients.
+
+    `elements` vaut None pour la ressource complète ; `count_only` correspond à
+    `_summary=count` (nombre de résultats sans aucune ressource).
+    """
+
+    elements: Optional[FrozenSet[str]] = None
+    count_only: bool = False
+    warnings: List[str] = []
+
+    @property
+    def fields(self) -> Optional[Tuple[str, ...]]:
+        """Colonnes du modèle lues par les éléments de la projection (toutes si None)."""
+        if self.elements is None:
+            return None
+        columns = dict.fromkeys(META_FIELDS)
+        for element in ELEMENTS:
+            if element in self.elements:
+                columns.update(dict.fromkeys(ELEMENTS[element][1]))
+        return tuple(columns)
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        """Restreint le queryset aux colonnes de la projection (`.only()`).
+
+        Args:
+            queryset: Queryset de patients
+
+        Returns
+        -------
+        QuerySet
+            Queryset ne chargeant que la clé primaire et les colonnes utiles
+        """
+        fields = self.fields
+        return queryset if fields is None else queryset.only(*fields)
+
+    def serialize(self, patient: Patient) -> Dict[str, Any]:
+        """Construit la ressource FHIR projetée d'un patient chargé par `apply`.
+
+        Args:
+            patient: Instance du modèle Patient
+
+        Returns
+        -------
+        Dict[str, Any]
+            Ressource FHIR réduite aux éléments demandés
+        """
+        return serialize_patient(patient, self.elements)
+
+    def project(self, resource: Dict[str, Any]) -> Dict[str, Any]:
+        """Réduit une ressource FHIR déjà construite (cache) aux éléments de la projection.
+
+        Args:
+            resource: Ressource FHIR complète, qui n'est pas modifiée
+
+        Returns
+        -------
+        Dict[str, Any]
+            Ressource FHIR réduite aux éléments demandés
+        """
+        if self.elements is None:
+            return resource
+        projected = {
+            key: value for key, value in resource.items() if key in self.elements or key in ("resourceType", "id")
+        }
+        projected["meta"] = {**resource["meta"], "tag": [SUBSETTED_TAG]}
+        return projected
+
+
+def parse_projection(query_params: QueryDict, strict: bool = False) -> Projection:
+    """Interprète les paramètres `_elements` et `_summary` d'une requête.
+
+    Args:
+        query_params: Paramètres de la requête HTTP
+        strict: Refuser (plutôt que signaler) les éléments inconnus
+
+    Returns
+    -------
+    Projection
+        Projection demandée (ressource complète par défaut)
+
+    Raises
+    ------
+    SearchError
+        Si `_summary` est invalide, combiné à `_elements`, ou si un élément est inconnu en mode strict
+    """
+    summary = query_params.get("_summary")
+    requested = [
+        element.strip()
+        for value in query_params.getlist("_elements")
+        for element in value.split(",")
+        if element.strip()
+    ]
+    if summary is not None and requested:
+        raise SearchError("_summary and _elements cannot be combined")
+
+    if summary is not None:
+        if summary not in SUMMARY_MODES:
+            raise SearchError(f"_summary must be one of: {', '.join(SUMMARY_MODES)}")
+        if summary == "count":
+            return Projection(count_only=True)
+        if summary == "true":
+            return Projection(SUMMARY_ELEMENTS)
+        # Aucun élément `text` (narratif) n'est produit : `data` équivaut à la ressource complète
+        return Projection(frozenset()) if summary == "text" else Projection()
+
+    if not requested:
+        return Projection()
+    elements = set()
+    warnings = []
+    for element in requested:
+        element = ELEMENT_ALIASES.get(element, element)
+        if element in ELEMENTS:
+            elements.add(element)
+        elif element not in MANDATORY_ELEMENTS:
+            if strict:
+                raise SearchError(f"Unknown element '{element}' in _elements")
+            warnings.append(f"Unknown element '{element}' in _elements was ignored")
+    return Projection(frozenset(elements), warnings=warnings)
@@ -0,0 +1,87 @@
+# apps/patients/renderers.py
+from typing import Any, Iterable, Iterator, Optional
+
+from dwh_fhir.timing import timed
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from . import fhir_json
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Renderer JSON (`application/json`) encodé par `orjson` quand il est disponible.
+
+    Le rendu est identique à celui du `JSONRenderer` de DRF ; l'indentation demandée par
+    le client (`Accept: application/json; indent=4`, API navigable) reste confiée à DRF.
+    """
+
+    @timed("render")
+    def render(self, data: Any, accepted_media_type: Optional[str] = None, renderer_context: Any = None) -> bytes:
+        """Rend des données en JSON compact.
+
+        Args:
+            data: Données à rendre
+            accepted_media_type: Type de média négocié
+            renderer_context: Contexte de rendu DRF
+
+        Returns
+        -------
+        bytes
+            Document JSON
+        """
+        if data is None:
+            return b""
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return fhir_json.dumps(data)
+
+
+class FHIRJSONRenderer(FastJSONRenderer):
+    """Renderer FHIR JSON (`application/fhir+json`), type de média par défaut de l'API."""
+
+    media_type = "application/fhir+json"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renderer FHIR NDJSON : une ressource JSON compacte par ligne.
+
+    Chaque ligne est produite par le renderer JSON de l'API, les ressources exportées
+    sont donc identiques octet pour octet à celles renvoyées par l'API REST.
+    """
+
+    media_type = "application/fhir+ndjson"
+    format = "ndjson"
+    charset = None
+    json_renderer = FHIRJSONRenderer()
+
+    @timed("render")
+    def render(self, data: Any, accepted_media_type: Optional[str] = None, renderer_context: Any = None) -> bytes:
+        """Rend une ressource (ou une liste de ressources) au format NDJSON.
+
+        Args:
+            data: Ressource FHIR ou liste de ressources
+            accepted_media_type: Type de média négocié
+            renderer_context: Contexte de rendu DRF
+
+        Returns
+        -------
+        bytes
+            Contenu NDJSON
+        """
+        if data is None:
+            return b""
+        resources = data if isinstance(data, list) else [data]
+        return b"".join(self.iter_lines(resources))
+
+    def iter_lines(self, resources: Iterable[Any]) -> Iterator[bytes]:
+        """Produit paresseusement une ligne NDJSON par ressource.
+
+        Args:
+            resources: Ressources FHIR à rendre
+
+        Yields
+        ------
+        bytes
+            Ligne NDJSON terminée par un saut de ligne
+        """
+        for resource in resources:
+            yield self.json_renderer.render(resource) + b"\n"
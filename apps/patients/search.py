@@ -0,0 +1,691 @@
+# apps/patients/search.py
+import re
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.db.models.lookups import LessThanOrEqual
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .fast_serializer import IPP_SYSTEM
+from .geo import COORDINATE_LIMITS, bounding_box, covering_ranges, distance_expression, parse_coordinate
+from .models import Patient, PatientNameToken
+from .phonetic import french_soundex, name_tokens
+
+# Paramètres de contrôle (pagination, format, projection) qui ne sont pas des critères de recherche
+CONTROL_PARAMETERS = {"_count", "_cursor", "_format", "format", "_elements", "_summary", "_total", "_profile"}
+
+GENDER_CODES = {"male": "M", "female": "F", "other": "O"}
+
+# Préfixes de comparaison des paramètres de type `date` (`eq` par défaut)
+DATE_PREFIXES = ("eq", "ne", "lt", "gt", "le", "ge", "sa", "eb", "ap")
+# Date FHIR de précision variable : année, mois, jour, minute ou seconde (fuseau facultatif)
+DATE_PATTERN = re.compile(
+    r"(?P<year>\d{4})(-(?P<month>\d{2})(-(?P<day>\d{2})"
+    r"(T(?P<hour>\d{2}):(?P<minute>\d{2})(:(?P<second>\d{2})(\.\d+)?)?(Z|[+-]\d{2}:\d{2})?)?)?)?"
+)
+
+# Bornes redondantes des comparaisons ouvertes (`lt`, `ge`...) : sans elles, SQLite estime qu'une
+# comparaison ouverte retient le quart de la table et préfère parcourir la table dans l'ordre de `id`.
+# Ce sont aussi les bornes de tout intervalle recherché : aucun calcul de date ne les dépasse.
+DATE_MIN = datetime.min.replace(tzinfo=dt_timezone.utc)
+DATE_MAX = datetime.max.replace(tzinfo=dt_timezone.utc)
+
+# Unités UCUM acceptées par `near` et leur valeur en kilomètres
+NEAR_UNITS = {"km": 1.0, "m": 0.001, "[mi_i]": 1.609344}
+# Rayon d'une recherche `near` sans distance
+DEFAULT_NEAR_DISTANCE_KM = 10.0
+# Au-delà, les cellules geohash lues couvrent une part importante de la table
+MAX_INDEXED_NEAR_KM = 100.0
+
+
+class SearchError(ValueError):
+    """Erreur levée lorsqu'une recherche FHIR est invalide ou refusée par le planificateur."""
+
+
+class RankingTerm(NamedTuple):
+    """Critère phonétique à classer : composants du nom visés et mots recherchés par valeur."""
+
+    kinds: Tuple[str, ...]
+    values: List[List[str]]
+
+
+class NearTerm(NamedTuple):
+    """Position et rayon (en kilomètres) d'une recherche `near`, dont les résultats sont classés par distance."""
+
+    latitude: float
+    longitude: float
+    distance: float
+
+
+class Clause(NamedTuple):
+    """Critère SQL produit par un paramètre de recherche.
+
+    `indexed` indique si le critère peut être résolu par un parcours d'index
+    (égalité ou intervalle sur une colonne indexée).
+    """
+
+    condition: Q
+    indexed: bool
+    ranking: Optional[RankingTerm] = None
+    near: Optional[NearTerm] = None
+
+
+class SearchPlan(NamedTuple):
+    """Résultat du planificateur : queryset à paginer, avertissements et critères à classer."""
+
+    queryset: QuerySet
+    warnings: List[str]
+    ranking: List[RankingTerm] = []
+    near: Optional[NearTerm] = None
+
+
+def prefix_range(alias: str, prefix: str) -> Q:
+    """Traduit une recherche par préfixe en intervalle semi-ouvert exploitable par un index B-tree.
+
+    `alias >= 'DUP' AND alias < 'DUQ'` remplace `LIKE 'DUP%'`, que SQLite et PostgreSQL
+    ne savent pas résoudre par index sur une collation standard.
+
+    Args:
+        alias: Nom de la colonne (ou de l'expression annotée) à filtrer
+        prefix: Préfixe recherché, déjà normalisé
+
+    Returns
+    -------
+    Q
+        Condition `alias >= prefix AND alias < successeur(prefix)`
+    """
+    last = ord(prefix[-1])
+    if last >= 0x10FFFF:
+        return Q(**{f"{alias}__gte": prefix})
+    upper_bound = prefix[:-1] + chr(last + 1)
+    return Q(**{f"{alias}__gte": prefix, f"{alias}__lt": upper_bound})
+
+
+class PatientSearch:
+    """Planificateur des paramètres de recherche FHIR sur `/api/patient/`.
+
+    Chaque paramètre est traduit en critère SQL favorable aux index :
+
+    - `family`, `given`, `name` : préfixe insensible à la casse et aux accents sur chaque mot
+      du nom, résolu par intervalle sur l'index des clés normalisées (`PatientNameToken`) ;
+      `:exact` utilise les index sur les colonnes brutes ;
+    - `phonetic` et le modificateur `:phonetic` : égalité sur l'index des codes Soundex2,
+      les candidats sont classés par similarité (`search.score`) ;
+    - `identifier` : égalité sur l'index unique `ipp` ;
+    - `birthdate`, `death-date`, `_lastUpdated` : dates de précision variable (`1956`,
+      `1956-03`, `1956-03-04`...) avec préfixe `eq`, `ne`, `lt`, `gt`, `le`, `ge`, `sa`, `eb`
+      ou `ap`, traduites en intervalles semi-ouverts sur les index des colonnes de date ;
+    - `near` (`latitude|longitude|distance|unité`) : adresses situées dans le rayon, lues
+      par intervalles sur l'index des cellules geohash et classées de la plus proche à la
+      plus éloignée ;
+    - `gender`, `address-city`, `address-postalcode` : colonnes non indexées, utilisables
+      uniquement pour affiner un critère indexé.
+
+    Plusieurs valeurs séparées par des virgules sont combinées en OU, un paramètre répété
+    est combiné en ET. Une recherche sans aucun critère indexé (ou utilisant `:contains`)
+    déclenche un parcours complet de la table : elle est refusée en mode
+    `Prefer: handling=strict`, et signalée par un avertissement sinon.
+    """
+
+    name_kinds = {
+        "family": ("family",),
+        "given": ("given",),
+        "name": ("family", "given", "maiden"),
+        "phonetic": ("family", "given", "maiden"),
+    }
+    string_columns = {
+        "family": ("last_name",),
+        "given": ("first_name",),
+        "name": ("last_name", "first_name", "maiden_name"),
+    }
+    unindexed_string_columns = {
+        "address-city": "residence_city",
+        "address-postalcode": "residence_zip_code",
+    }
+    date_columns = {
+        "birthdate": "birth_date",
+        "death-date": "death_date",
+        "_lastUpdated": "update_date",
+    }
+
+    def __init__(self, query_params: QueryDict, strict: bool = False) -> None:
+        """Initialise le planificateur.
+
+        Args
+        ----
+        query_params : QueryDict
+            Paramètres de la requête HTTP
+        strict : bool
+            Refuser (plutôt que signaler) les paramètres inconnus et les recherches non indexées
+        """
+        self.query_params = query_params
+        self.strict = strict
+        self.handlers: Dict[str, Callable[[str, Optional[str], List[str]], Clause]] = {
+            "family": self.string_clause,
+            "given": self.string_clause,
+            "name": self.string_clause,
+            "phonetic": self.phonetic_clause,
+            "address-city": self.unindexed_string_clause,
+            "address-postalcode": self.unindexed_string_clause,
+            "identifier": self.identifier_clause,
+            "gender": self.gender_clause,
+            "near": self.near_clause,
+            "birthdate": self.date_clause,
+            "death-date": self.date_clause,
+            "_lastUpdated": self.date_clause,
+        }
+
+    def plan(self, queryset: Optional[QuerySet] = None) -> SearchPlan:
+        """Construit le queryset filtré correspondant aux paramètres de recherche.
+
+        Args:
+            queryset: Queryset de départ (tous les patients par défaut)
+
+        Returns
+        -------
+        SearchPlan
+            Queryset filtré et avertissements à renvoyer au client
+
+        Raises
+        ------
+        SearchError
+            Si un paramètre est invalide, ou inconnu / non indexé en mode strict, ou si
+            plusieurs classements sont demandés (`near` répété ou combiné à une recherche phonétique)
+        """
+        queryset = Patient.objects.all() if queryset is None else queryset
+        warnings: List[str] = []
+        clauses: List[Clause] = []
+
+        for key in self.query_params:
+            parameter, _, modifier = key.partition(":")
+            if parameter in CONTROL_PARAMETERS:
+                continue
+            handler = self.handlers.get(parameter)
+            if handler is None:
+                self.reject_or_warn(f"Unknown search parameter '{key}'", warnings)
+                continue
+            for raw_value in self.query_params.getlist(key):
+                values = [value.strip() for value in raw_value.split(",") if value.strip()]
+                if values:
+                    clauses.append(handler(parameter, modifier or None, values))
+
+        if clauses and not any(clause.indexed for clause in clauses):
+            self.reject_or_warn("Search uses no indexed parameter and requires a full table scan", warnings)
+
+        for clause in clauses:
+            queryset = queryset.filter(clause.condition)
+        ranking = [clause.ranking for clause in clauses if clause.ranking is not None]
+        near = [clause.near for clause in clauses if clause.near is not None]
+        if len(near) > 1:
+            raise SearchError("near can only be given once")
+        if near and ranking:
+            raise SearchError("near cannot be combined with a phonetic search")
+        return SearchPlan(queryset, warnings, ranking, near[0] if near else None)
+
+    def reject_or_warn(self, message: str, warnings: List[str]) -> None:
+        """Refuse la recherche en mode strict, ou enregistre un avertissement.
+
+        Args:
+            message: Description du problème
+            warnings: Liste des avertissements à compléter
+
+        Raises
+        ------
+        SearchError
+            En mode strict
+        """
+        if self.strict:
+            raise SearchError(message)
+        warnings.append(message)
+
+    def string_clause(self, parameter: str, modifier: Optional[str], values: List[str]) -> Clause:
+        """Critère de type `string` sur les colonnes de nom indexées.
+
+        Args:
+            parameter: Nom du paramètre (`family`, `given` ou `name`)
+            modifier: Modificateur (`exact`, `contains`, `phonetic` ou None)
+            values: Valeurs combinées en OU
+
+        Returns
+        -------
+        Clause
+            Critère SQL correspondant
+        """
+        if modifier == "phonetic":
+            return self.phonetic_clause(parameter, None, values)
+
+        columns = self.string_columns[parameter]
+        condition = Q()
+
+        if modifier == "exact":
+            for value in values:
+                for column in columns:
+                    condition |= Q(**{column: value})
+            return Clause(condition, indexed=True)
+
+        if modifier == "contains":
+            for value in values:
+                for column in columns:
+                    condition |= Q(**{f"{column}__icontains": value})
+            return Clause(condition, indexed=False)
+
+        self.check_modifier(parameter, modifier, allowed=())
+        kinds = self.name_kinds[parameter]
+        for value in values:
+            # Chaque mot recherché doit préfixer un mot du nom (ex. `given=jean pi` trouve `Jean-Pierre`)
+            words = Q()
+            for token in name_tokens(value):
+                tokens = PatientNameToken.objects.filter(prefix_range("normalized", token), kind__in=kinds)
+                words &= Q(id__in=tokens.values("patient_id"))
+            if words:
+                condition |= words
+        return Clause(condition or Q(pk__in=[]), indexed=True)
+
+    def phonetic_clause(self, parameter: str, modifier: Optional[str], values: List[str]) -> Clause:
+        """Critère phonétique (Soundex2) sur les mots du nom, à classer par similarité.
+
+        Args:
+            parameter: Nom du paramètre (`phonetic`, ou `family` / `given` / `name` avec `:phonetic`)
+            modifier: Modificateur (aucun n'est supporté)
+            values: Valeurs combinées en OU
+
+        Returns
+        -------
+        Clause
+            Critère SQL correspondant, accompagné du critère de classement
+        """
+        self.check_modifier(parameter, modifier, allowed=())
+        kinds = self.name_kinds[parameter]
+        condition = Q()
+        searched: List[List[str]] = []
+        for value in values:
+            words = Q()
+            tokens = name_tokens(value)
+            for token in tokens:
+                matches = PatientNameToken.objects.filter(phonetic=french_soundex(token), kind__in=kinds)
+                words &= Q(id__in=matches.values("patient_id"))
+            if words:
+                condition |= words
+                searched.append(tokens)
+        return Clause(condition or Q(pk__in=[]), indexed=True, ranking=RankingTerm(kinds, searched))
+
+    def unindexed_string_clause(self, parameter: str, modifier: Optional[str], values: List[str]) -> Clause:
+        """Critère de type `string` sur une colonne d'adresse non indexée.
+
+        Args:
+            parameter: Nom du paramètre (`address-city` ou `address-postalcode`)
+            modifier: Modificateur (`exact`, `contains` ou None)
+            values: Valeurs combinées en OU
+
+        Returns
+        -------
+        Clause
+            Critère SQL correspondant (jamais indexé)
+        """
+        self.check_modifier(parameter, modifier, allowed=("exact", "contains"))
+        column = self.unindexed_string_columns[parameter]
+        lookup = {"exact": "exact", "contains": "icontains"}.get(modifier or "", "istartswith")
+        condition = Q()
+        for value in values:
+            condition |= Q(**{f"{column}__{lookup}": value})
+        return Clause(condition, indexed=False)
+
+    def identifier_clause(self, parameter: str, modifier: Optional[str], values: List[str]) -> Clause:
+        """Critère de type `token` `system|value` sur l'IPP (index unique).
+
+        Args:
+            parameter: Nom du paramètre (`identifier`)
+            modifier: Modificateur (aucun n'est supporté)
+            values: Jetons `system|value`, `|value` ou `value` combinés en OU
+
+        Returns
+        -------
+        Clause
+            Critère SQL correspondant
+
+        Raises
+        ------
+        SearchError
+            Si un jeton ne porte que le système
+        """
+        self.check_modifier(parameter, modifier, allowed=())
+        ipps = []
+        for token in values:
+            system, separator, value = self.split_token(token)
+            if not value:
+                raise SearchError("identifier must provide a value ('system|value' or 'value')")
+            if not separator or system in ("", IPP_SYSTEM):
+                ipps.append(value)
+        return Clause(Q(ipp__in=ipps), indexed=True)
+
+    def gender_clause(self, parameter: str, modifier: Optional[str], values: List[str]) -> Clause:
+        """Critère de type `token` sur le genre administratif (colonne non indexée).
+
+        Args:
+            parameter: Nom du paramètre (`gender`)
+            modifier: Modificateur (aucun n'est supporté)
+            values: Codes FHIR (`male`, `female`, `other`, `unknown`) combinés en OU
+
+        Returns
+        -------
+        Clause
+            Critère SQL correspondant
+
+        Raises
+        ------
+        SearchError
+            Si un code de genre est inconnu
+        """
+        self.check_modifier(parameter, modifier, allowed=())
+        condition = Q()
+        for value in values:
+            if value == "unknown":
+                condition |= Q(sex__isnull=True) | ~Q(sex__in=GENDER_CODES.values())
+            elif value in GENDER_CODES:
+                condition |= Q(sex=GENDER_CODES[value])
+            else:
+                raise SearchError(f"Unknown gender '{value}'")
+        return Clause(condition, indexed=False)
+
+    def date_clause(self, parameter: str, modifier: Optional[str], values: List[str]) -> Clause:
+        """Critère de type `date` sur une colonne de date indexée.
+
+        Chaque valeur désigne l'intervalle `[début, fin)` couvert par sa précision (`1956` :
+        toute l'année 1956) ; le préfixe compare la date du patient à cet intervalle :
+        `eq` dedans, `ne` en dehors, `lt` / `eb` avant le début, `le` avant la fin,
+        `gt` / `sa` après la fin, `ge` après le début, `ap` dedans à 10 % près de l'écart
+        avec la date du jour. Chaque cas est un intervalle borné des deux côtés, lu par index.
+
+        Args:
+            parameter: Nom du paramètre (`birthdate`, `death-date` ou `_lastUpdated`)
+            modifier: Modificateur (aucun n'est supporté)
+            values: Dates préfixées combinées en OU
+
+        Returns
+        -------
+        Clause
+            Critère SQL correspondant
+        """
+        self.check_modifier(parameter, modifier, allowed=())
+        column = self.date_columns[parameter]
+
+        def between(lower: datetime, upper: datetime) -> Q:
+            return Q(**{f"{column}__gte": lower, f"{column}__lt": upper})
+
+        condition = Q()
+        for value in values:
+            prefix = value[:2] if value[:2] in DATE_PREFIXES else "eq"
+            start, end = date_range(value[2:] if value[:2] in DATE_PREFIXES else value)
+            if prefix == "eq":
+                condition |= between(start, end)
+            elif prefix == "ne":
+                condition |= between(DATE_MIN, start) | between(end, DATE_MAX)
+            elif prefix in ("lt", "eb"):
+                condition |= between(DATE_MIN, start)
+            elif prefix == "le":
+                condition |= between(DATE_MIN, end)
+            elif prefix in ("gt", "sa"):
+                condition |= between(end, DATE_MAX)
+            elif prefix == "ge":
+                condition |= between(start, DATE_MAX)
+            else:
+                margin = abs(timezone.now() - start) / 10
+                # Marge tronquée aux bornes représentables (`ap0001-01-01`, `ap9999-12-31`)
+                condition |= between(max(start, DATE_MIN + margin) - margin, min(end, DATE_MAX - margin) + margin)
+        return Clause(condition, indexed=True)
+
+    def near_clause(self, parameter: str, modifier: Optional[str], values: List[str]) -> Clause:
+        """Critère de type `special` `near` sur les coordonnées de l'adresse, à classer par distance.
+
+        Les cellules geohash couvrant le rayon sont lues par intervalles sur leur index ; le
+        rectangle englobant puis la distance exacte (haversine) ne sont évalués que sur ces lignes.
+
+        Args:
+            parameter: Nom du paramètre (`near`)
+            modifier: Modificateur (aucun n'est supporté)
+            values: Position `latitude|longitude|distance|unité` (distance et unité facultatives)
+
+        Returns
+        -------
+        Clause
+            Critère SQL correspondant, indexé si le rayon ne dépasse pas `MAX_INDEXED_NEAR_KM`
+
+        Raises
+        ------
+        SearchError
+            Si la position, la distance ou l'unité est invalide
+        """
+        self.check_modifier(parameter, modifier, allowed=())
+        parts = values[0].split("|")
+        if len(values) > 1 or not 2 <= len(parts) <= 4:
+            raise SearchError("near must be a single 'latitude|longitude|distance|unit' value")
+        try:
+            latitude = parse_coordinate(parts[0], COORDINATE_LIMITS["residence_latitude"])
+            longitude = parse_coordinate(parts[1], COORDINATE_LIMITS["residence_longitude"])
+            distance = float(parts[2]) if len(parts) > 2 and parts[2] else DEFAULT_NEAR_DISTANCE_KM
+        except ValueError as exc:
+            raise SearchError(f"Invalid near value: {exc}")
+        unit = parts[3] if len(parts) > 3 and parts[3] else "km"
+        if latitude is None or longitude is None:
+            raise SearchError("near must provide a latitude and a longitude")
+        if unit not in NEAR_UNITS:
+            raise SearchError(f"Unsupported near unit '{unit}' (expected one of: {', '.join(NEAR_UNITS)})")
+        if not distance > 0:
+            raise SearchError("near distance must be positive")
+        distance *= NEAR_UNITS[unit]
+
+        south, north, west, east = box = bounding_box(latitude, longitude, distance)
+        cells = Q()
+        for start, end in covering_ranges(box):
+            cells |= (
+                Q(residence_geohash__gte=start, residence_geohash__lt=end) if end else Q(residence_geohash__gte=start)
+            )
+        condition = (
+            cells
+            & Q(residence_latitude__range=(south, north), residence_longitude__range=(west, east))
+            & Q(LessThanOrEqual(distance_expression(latitude, longitude), distance))
+        )
+        return Clause(condition, indexed=distance <= MAX_INDEXED_NEAR_KM, near=NearTerm(latitude, longitude, distance))
+
+    def check_modifier(self, parameter: str, modifier: Optional[str], allowed: Tuple[str, ...]) -> None:
+        """Vérifie que le modificateur est supporté par le paramètre.
+
+        Args:
+            parameter: Nom du paramètre
+            modifier: Modificateur demandé
+            allowed: Modificateurs acceptés
+
+        Raises
+        ------
+        SearchError
+            Si le modificateur n'est pas supporté
+        """
+        if modifier is not None and modifier not in allowed:
+            raise SearchError(f"Modifier ':{modifier}' is not supported for '{parameter}'")
+
+    @staticmethod
+    def split_token(token: str) -> Tuple[str, str, str]:
+        """Découpe un jeton FHIR `system|value`.
+
+        Args:
+            token: Jeton FHIR
+
+        Returns
+        -------
+        Tuple[str, str, str]
+            Système, séparateur (vide si absent) et valeur
+        """
+        if "|" in token:
+            system, separator, value = token.partition("|")
+            return system, separator, value
+        return "", "", token
+
+
+def date_range(value: str) -> Tuple[datetime, datetime]:
+    """Intervalle semi-ouvert `[début, fin)` couvert par une date FHIR selon sa précision.
+
+    Une date sans fuseau horaire est interprétée dans le fuseau courant (`TIME_ZONE`),
+    comme les dates enregistrées par l'API.
+
+    Args:
+        value: Date FHIR (`1956`, `1956-03`, `1956-03-04`, `1956-03-04T10:30`, `1956-03-04T10:30:00+01:00`...)
+
+    Returns
+    -------
+    Tuple[datetime, datetime]
+        Début inclus et fin exclue, avec fuseau horaire
+
+    Raises
+    ------
+    SearchError
+        Si la date est invalide
+    """
+    # Le `+` d'un fuseau non encodé dans l'URL arrive sous forme d'espace
+    value = value.replace(" ", "+")
+    match = DATE_PATTERN.fullmatch(value)
+    if match is None:
+        raise SearchError(f"Invalid date '{value}' (expected YYYY, YYYY-MM, YYYY-MM-DD or YYYY-MM-DDThh:mm[:ss][zone])")
+    parts = match.groupdict()
+    year = int(parts["year"])
+    try:
+        if parts["hour"] is None:
+            start = datetime(year, int(parts["month"] or 1), int(parts["day"] or 1))
+        else:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValueError(value)
+            start = parsed.replace(microsecond=0)
+    except ValueError:
+        raise SearchError(f"Invalid date '{value}'")
+    try:
+        if parts["month"] is None:
+            end = start.replace(year=year + 1)
+        elif parts["day"] is None:
+            end = start.replace(year=year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+        elif parts["hour"] is None:
+            end = start + timedelta(days=1)
+        else:
+            end = start + (timedelta(seconds=1) if parts["second"] else timedelta(minutes=1))
+    except (ValueError, OverflowError):
+        # Dernière période représentable (`9999`, `9999-12-31`...) : jusqu'à la plus grande date
+        end = datetime.max.replace(tzinfo=start.tzinfo)
+    if timezone.is_naive(start):
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return clamp_date(start), clamp_date(end)
+
+
+def clamp_date(moment: datetime) -> datetime:
+    """Date ramenée en UTC, tronquée aux bornes représentables.
+
+    Args:
+        moment: Date avec fuseau horaire (`0001-01-01T00:00+02:00` précède la plus petite date UTC)
+
+    Returns
+    -------
+    datetime
+        Date UTC comprise entre `DATE_MIN` et `DATE_MAX`
+    """
+    try:
+        return moment.astimezone(dt_timezone.utc)
+    except OverflowError:
+        return DATE_MIN if moment.year == DATE_MIN.year else DATE_MAX
+
+
+def score_token(token: str, candidates: List[Tuple[str, str]]) -> float:
+    """Évalue la proximité d'un mot recherché avec les mots du nom d'un patient.
+
+    Args:
+        token: Mot recherché, normalisé
+        candidates: Couples (mot normalisé, code phonétique) du patient
+
+    Returns
+    -------
+    float
+        1 pour une égalité, 0.9 pour un préfixe, entre 0.5 et 0.9 pour une proximité
+        phonétique selon la similarité orthographique, 0 sinon
+    """
+    code = french_soundex(token)
+    best = 0.0
+    for normalized, phonetic in candidates:
+        if normalized == token:
+            return 1.0
+        if normalized.startswith(token):
+            best = max(best, 0.9)
+        elif phonetic == code:
+            best = max(best, 0.5 + 0.4 * SequenceMatcher(None, token, normalized).ratio())
+    return best
+
+
+def rank_candidates(plan: SearchPlan, limit: int, max_candidates: int = 1000) -> List[Tuple[Patient, float]]:
+    """Classe les candidats d'une recherche phonétique par score décroissant.
+
+    Les candidats sont lus par index (codes phonétiques), ceux dont un mot correspond
+    exactement à la recherche en premier, dans la limite de `max_candidates`.
+
+    Args:
+        plan: Plan de recherche comportant au moins un critère phonétique
+        limit: Nombre de patients à renvoyer
+        max_candidates: Nombre maximal de candidats évalués
+
+    Returns
+    -------
+    List[Tuple[Patient, float]]
+        Patients et scores (entre 0 et 1), du plus proche au plus éloigné
+    """
+    searched = {token for term in plan.ranking for tokens in term.values for token in tokens}
+    exact = PatientNameToken.objects.filter(patient=OuterRef("pk"), normalized__in=searched)
+    candidates = list(plan.queryset.alias(exact=Exists(exact)).order_by("-exact", "id")[:max_candidates])
+
+    tokens: Dict[Tuple[int, str], List[Tuple[str, str]]] = {}
+    for patient_id, kind, normalized, phonetic in PatientNameToken.objects.filter(
+        patient_id__in=[patient.pk for patient in candidates]
+    ).values_list("patient_id", "kind", "normalized", "phonetic"):
+        tokens.setdefault((patient_id, kind), []).append((normalized, phonetic))
+
+    ranked = []
+    for patient in candidates:
+        term_scores = []
+        for term in plan.ranking:
+            patient_tokens = [token for kind in term.kinds for token in tokens.get((patient.pk, kind), [])]
+            term_scores.append(
+                max(
+                    (sum(score_token(t, patient_tokens) for t in value) / len(value) for value in term.values),
+                    default=0.0,
+                )
+            )
+        ranked.append((patient, round(sum(term_scores) / len(term_scores), 4)))
+
+    ranked.sort(key=lambda item: (-item[1], item[0].pk))
+    return ranked[:limit]
+
+
+def conditional_search(criteria: str) -> QuerySet:
+    """Évalue les critères d'une création conditionnelle (`If-None-Exist`).
+
+    Les critères sont une chaîne de recherche (`identifier=...&birthdate=...`, éventuellement
+    préfixée par `Patient?`) évaluée en mode strict : seuls les paramètres connus sont
+    acceptés et au moins l'un d'eux doit être indexé.
+
+    Args:
+        criteria: Valeur de l'en-tête `If-None-Exist`
+
+    Returns
+    -------
+    QuerySet
+        Patients correspondant aux critères
+
+    Raises
+    ------
+    SearchError
+        Si les critères sont vides, invalides, inconnus ou non indexés
+    """
+    _, _, query = criteria.strip().rpartition("?")
+    query_params = QueryDict(query)
+    if not any(key.partition(":")[0] not in CONTROL_PARAMETERS for key in query_params):
+        raise SearchError("search criteria are required")
+    return PatientSearch(query_params, strict=True).plan().queryset
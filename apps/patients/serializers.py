@@ -5,8 +5,11 @@ from typing import Any, Dict, List, Optional
 from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.timezone import localtime, make_aware
 from drf_spectacular.utils import extend_schema_field
+from dwh_fhir.timing import timed
 from rest_framework import serializers
 
+from .fast_serializer import GEOLOCATION_URL
+from .geo import COORDINATE_LIMITS, parse_coordinate
 from .models import Patient
 
 
@@ -175,13 +178,13 @@ class PatientFHIRSerializer(serializers.ModelSerializer):
         }
 
         # Ajout des coordonnées géographiques si disponibles
-        if obj.residence_latitude and obj.residence_longitude:
+        if obj.residence_latitude is not None and obj.residence_longitude is not None:
             address["extension"] = [
                 {
                     "url": "http://hl7.org/fhir/StructureDefinition/geolocation",
                     "extension": [
-                        {"url": "latitude", "valueDecimal": float(obj.residence_latitude)},
-                        {"url": "longitude", "valueDecimal": float(obj.residence_longitude)},
+                        {"url": "latitude", "valueDecimal": obj.residence_latitude},
+                        {"url": "longitude", "valueDecimal": obj.residence_longitude},
                     ],
                 }
             ]
@@ -215,8 +218,8 @@ class PatientFHIRSerializer(serializers.ModelSerializer):
                     {
                         "url": "http://hl7.org/fhir/StructureDefinition/geolocation",
                         "extension": [
-                            {"url": "latitude", "valueDecimal": float(obj.birth_latitude)},
-                            {"url": "longitude", "valueDecimal": float(obj.birth_longitude)},
+                            {"url": "latitude", "valueDecimal": obj.birth_latitude},
+                            {"url": "longitude", "valueDecimal": obj.birth_longitude},
                         ],
                     }
                 ]
@@ -374,6 +377,7 @@ class PatientFHIRSerializer(serializers.ModelSerializer):
         """
         return []
 
+    @timed("serializer")
     def to_representation(self, instance: Patient) -> Dict[str, Any]:
         """Surcharge la méthode de sérialisation pour ajouter des métadonnées.
 
@@ -394,7 +398,7 @@ class PatientFHIRSerializer(serializers.ModelSerializer):
         else:
             last_updated_str = datetime.now().strftime("%d/%m/%Y à %H:%M")
 
-        representation["meta"] = {"versionId": "1", "lastUpdated": last_updated_str}
+        representation["meta"] = {"versionId": str(instance.version_id), "lastUpdated": last_updated_str}
 
         # Nettoyage des valeurs None
         def clean_data(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -458,6 +462,31 @@ class PatientFHIRSerializer(serializers.ModelSerializer):
         except (ValueError, TypeError, AttributeError):
             return None
 
+    def read_geolocation(self, extensions: List[Dict[str, Any]], prefix: str, internal_value: Dict[str, Any]) -> None:
+        """Lit les coordonnées d'une extension `geolocation` FHIR dans les colonnes `<prefix>_latitude/longitude`.
+
+        Args:
+            extensions: Extensions d'un élément FHIR, parmi lesquelles l'extension `geolocation`
+            prefix: Préfixe des colonnes (`residence` ou `birth`)
+            internal_value: Valeurs internes à compléter
+
+        Raises
+        ------
+        serializers.ValidationError
+            Si une coordonnée n'est pas un nombre, ou sort des bornes (±90° ou ±180°)
+        """
+        for extension in extensions:
+            if extension.get("url") != GEOLOCATION_URL:
+                continue
+            for coordinate in extension.get("extension", []):
+                if coordinate.get("url") not in ("latitude", "longitude"):
+                    continue
+                field = f"{prefix}_{coordinate['url']}"
+                try:
+                    internal_value[field] = parse_coordinate(coordinate.get("valueDecimal"), COORDINATE_LIMITS[field])
+                except (TypeError, ValueError) as exc:
+                    raise serializers.ValidationError({field: [str(exc)]})
+
     def extract_death_date(self, extensions: Optional[List[Dict[str, Any]]]) -> Optional[str]:
         """Extrait la date de décès des extensions FHIR.
 
@@ -532,17 +561,14 @@ class PatientFHIRSerializer(serializers.ModelSerializer):
                     "residence_country": address.get("country"),
                 }
             )
+            self.read_geolocation(address.get("extension", []), "residence", internal_value)
 
         # Traitement des extensions
         if data.get("extension"):
             for ext in data["extension"]:
-                # Coordonnées géographiques de résidence
-                if ext.get("url") == "http://hl7.org/fhir/StructureDefinition/geolocation":
-                    for sub_ext in ext.get("extension", []):
-                        if sub_ext.get("url") == "latitude":
-                            internal_value["residence_latitude"] = str(sub_ext.get("valueDecimal")).replace(",", ".")
-                        elif sub_ext.get("url") == "longitude":
-                            internal_value["residence_longitude"] = str(sub_ext.get("valueDecimal")).replace(",", ".")
+                # Coordonnées géographiques de résidence (extension de premier niveau des formulaires)
+                if ext.get("url") == GEOLOCATION_URL:
+                    self.read_geolocation([ext], "residence", internal_value)
 
                 # Lieu de naissance
                 elif ext.get("url") == "http://hl7.org/fhir/StructureDefinition/patient-birthPlace":
@@ -555,19 +581,9 @@ class PatientFHIRSerializer(serializers.ModelSerializer):
                         }
                     )
 
-                    # Coordonnées géographiques de naissance
-                    if "extension" in ext:
-                        for sub_ext in ext["extension"]:
-                            if sub_ext.get("url") == "http://hl7.org/fhir/StructureDefinition/geolocation":
-                                for geo_ext in sub_ext.get("extension", []):
-                                    if geo_ext.get("url") == "latitude":
-                                        internal_value["birth_latitude"] = str(geo_ext.get("valueDecimal")).replace(
-                                            ",", "."
-                                        )
-                                    elif geo_ext.get("url") == "longitude":
-                                        internal_value["birth_longitude"] = str(geo_ext.get("valueDecimal")).replace(
-                                            ",", "."
-                                        )
+                    # Coordonnées géographiques de naissance (extension du lieu ou de son adresse)
+                    self.read_geolocation(ext.get("extension", []), "birth", internal_value)
+                    self.read_geolocation(birth_place.get("extension", []), "birth", internal_value)
 
                 # Cause de décès
                 death_code_found = False
@@ -0,0 +1,92 @@
+# apps/patients/signals.py
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .fast_serializer import serialize_patient
+from .models import Patient, PatientHistory
+
+
+@receiver(pre_save, sender=Patient)
+def archive_unrecorded_version(sender: Any, instance: Patient, raw: bool, **kwargs: Any) -> None:
+    """Archive la version remplacée si elle n'a jamais été historisée (patient chargé avant l'historique).
+
+    Args
+    ----
+    sender : Any
+        Classe du modèle émetteur
+    instance : Patient
+        Patient sur le point d'être modifié (version déjà incrémentée)
+    raw : bool
+        True lors d'un chargement de fixture
+    **kwargs : Any
+        Arguments du signal
+    """
+    if raw or instance._state.adding:
+        return
+    previous_version = instance.version_id - 1
+    if PatientHistory.objects.filter(patient_id=instance.pk, version_id=previous_version).exists():
+        return
+    previous = Patient.objects.filter(pk=instance.pk, version_id=previous_version).first()
+    if previous is not None:
+        PatientHistory.objects.create(
+            patient_id=previous.pk,
+            version_id=previous_version,
+            method="POST" if previous_version == 1 else "PUT",
+            recorded_at=previous.update_date or timezone.now(),
+            resource=serialize_patient(previous),
+        )
+
+
+@receiver(post_save, sender=Patient)
+def record_patient_version(sender: Any, instance: Patient, created: bool, raw: bool, **kwargs: Any) -> None:
+    """Archive la version qui vient d'être enregistrée, dans la transaction de `Patient.save`.
+
+    La contrainte d'unicité (patient, version) fait échouer toute écriture concurrente
+    qui produirait deux fois la même version.
+
+    Args
+    ----
+    sender : Any
+        Classe du modèle émetteur
+    instance : Patient
+        Patient créé ou modifié
+    created : bool
+        True pour une création
+    raw : bool
+        True lors d'un chargement de fixture (aucun historique n'est enregistré)
+    **kwargs : Any
+        Arguments du signal
+    """
+    if raw:
+        return
+    PatientHistory.objects.create(
+        patient_id=instance.pk,
+        version_id=instance.version_id,
+        method="POST" if created else "PUT",
+        recorded_at=instance.update_date or timezone.now(),
+        resource=serialize_patient(instance),
+    )
+
+
+@receiver(post_delete, sender=Patient)
+def record_patient_deletion(sender: Any, instance: Patient, **kwargs: Any) -> None:
+    """Archive la suppression d'un patient comme une nouvelle version sans ressource.
+
+    Args
+    ----
+    sender : Any
+        Classe du modèle émetteur
+    instance : Patient
+        Patient supprimé
+    **kwargs : Any
+        Arguments du signal
+    """
+    PatientHistory.objects.create(
+        patient_id=instance.pk,
+        version_id=instance.version_id + 1,
+        method="DELETE",
+        recorded_at=timezone.now(),
+    )
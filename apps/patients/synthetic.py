@@ -0,0 +1,674 @@
+# apps/patients/synthetic.py
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from itertools import accumulate
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.db import connections, router, transaction
+from django.utils import timezone as django_timezone
+
+from .bulk import insert_values
+from .fast_serializer import IPP_SYSTEM
+from .geo import location_cell
+from .models import NAME_FIELDS, Patient, PatientNameToken
+from .phonetic import french_soundex, name_tokens
+
+# Patients générés par lot : un lot est une transaction, et la taille fixe rend la génération reproductible
+BATCH_SIZE = 20000
+# Adresses tirées une fois par graine, partagées par les patients d'une même ville (comme un immeuble)
+ADDRESS_BOOK_SIZE = 20000
+# Date de référence des âges : fixe, pour qu'une graine produise toujours les mêmes patients
+DEFAULT_AS_OF = date(2025, 1, 1)
+
+# Noms de famille les plus portés en France, pondérés par leur fréquence (milliers de porteurs)
+FAMILY_NAMES = (
+    ("Martin", 235),
+    ("Bernard", 105),
+    ("Thomas", 96),
+    ("Petit", 89),
+    ("Robert", 88),
+    ("Richard", 87),
+    ("Durand", 84),
+    ("Dubois", 84),
+    ("Moreau", 80),
+    ("Laurent", 77),
+    ("Simon", 76),
+    ("Michel", 75),
+    ("Lefèvre", 74),
+    ("Leroy", 70),
+    ("Roux", 64),
+    ("David", 63),
+    ("Bertrand", 62),
+    ("Morel", 62),
+    ("Fournier", 61),
+    ("Girard", 60),
+    ("Bonnet", 58),
+    ("Dupont", 58),
+    ("Lambert", 57),
+    ("Fontaine", 56),
+    ("Rousseau", 55),
+    ("Vincent", 55),
+    ("Muller", 54),
+    ("Lefebvre", 54),
+    ("Faure", 53),
+    ("André", 53),
+    ("Mercier", 52),
+    ("Blanc", 52),
+    ("Guérin", 51),
+    ("Boyer", 51),
+    ("Garnier", 50),
+    ("Chevalier", 50),
+    ("François", 49),
+    ("Legrand", 49),
+    ("Gauthier", 49),
+    ("Garcia", 48),
+    ("Perrin", 48),
+    ("Robin", 47),
+    ("Clément", 47),
+    ("Morin", 47),
+    ("Nicolas", 46),
+    ("Henry", 46),
+    ("Roussel", 45),
+    ("Mathieu", 45),
+    ("Gautier", 45),
+    ("Masson", 44),
+    ("Marchand", 44),
+    ("Duval", 43),
+    ("Denis", 43),
+    ("Dumont", 43),
+    ("Marie", 42),
+    ("Lemaire", 42),
+    ("Noël", 41),
+    ("Meyer", 41),
+    ("Dufour", 41),
+    ("Meunier", 40),
+    ("Brun", 40),
+    ("Blanchard", 40),
+    ("Giraud", 39),
+    ("Joly", 39),
+    ("Rivière", 39),
+    ("Lucas", 38),
+    ("Brunet", 38),
+    ("Gaillard", 38),
+    ("Barbier", 37),
+    ("Arnaud", 37),
+    ("Martinez", 37),
+    ("Gérard", 36),
+    ("Roche", 36),
+    ("Renard", 36),
+    ("Schmitt", 35),
+    ("Roy", 35),
+    ("Leroux", 35),
+    ("Colin", 34),
+    ("Vidal", 34),
+    ("Caron", 34),
+    ("Picard", 33),
+    ("Roger", 33),
+    ("Fabre", 33),
+    ("Aubert", 32),
+    ("Lemoine", 32),
+    ("Renaud", 32),
+    ("Dumas", 31),
+    ("Lacroix", 31),
+    ("Olivier", 31),
+    ("Philippe", 30),
+    ("Bourgeois", 30),
+    ("Pierre", 30),
+    ("Benoît", 29),
+    ("Rey", 29),
+    ("Leclerc", 29),
+    ("Payet", 28),
+    ("Rolland", 28),
+    ("Leclercq", 28),
+    ("Guillaume", 28),
+    ("Lecomte", 27),
+    ("Lopez", 27),
+    ("Jean", 27),
+    ("Dupuy", 26),
+    ("Guillot", 26),
+    ("Hubert", 26),
+    ("Berger", 26),
+    ("Carpentier", 25),
+    ("Sanchez", 25),
+    ("Dupuis", 25),
+    ("Moulin", 25),
+    ("Louis", 25),
+    ("Deschamps", 24),
+    ("Huet", 24),
+    ("Vasseur", 24),
+    ("Perez", 24),
+    ("Boucher", 23),
+    ("Fleury", 23),
+    ("Royer", 23),
+    ("Klein", 23),
+    ("Jacquet", 23),
+    ("Adam", 22),
+    ("Paris", 22),
+    ("Poirier", 22),
+    ("Marty", 22),
+    ("Aubry", 22),
+    ("Guyot", 22),
+    ("Carré", 21),
+    ("Charles", 21),
+    ("Renault", 21),
+    ("Charpentier", 21),
+    ("Ménard", 21),
+    ("Maillard", 21),
+    ("Baron", 20),
+    ("Bertin", 20),
+    ("Bailly", 20),
+    ("Hervé", 20),
+    ("Schneider", 20),
+    ("Fernandez", 20),
+    ("Le Gall", 19),
+    ("Collet", 19),
+    ("Léger", 19),
+    ("Bouvier", 19),
+    ("Julien", 19),
+    ("Prévost", 19),
+    ("Millet", 18),
+    ("Perrot", 18),
+    ("Daniel", 18),
+    ("Le Roux", 18),
+    ("Cousin", 18),
+    ("Germain", 18),
+)
+
+# Prénoms par sexe, pondérés pour mêler les générations présentes dans l'entrepôt
+MALE_GIVEN_NAMES = (
+    ("Jean", 60),
+    ("Pierre", 40),
+    ("Michel", 40),
+    ("André", 30),
+    ("Philippe", 30),
+    ("Alain", 28),
+    ("Jacques", 28),
+    ("Bernard", 26),
+    ("René", 20),
+    ("Louis", 22),
+    ("Daniel", 22),
+    ("Christian", 20),
+    ("Patrick", 22),
+    ("Nicolas", 22),
+    ("Christophe", 20),
+    ("Éric", 18),
+    ("Frédéric", 16),
+    ("Laurent", 18),
+    ("Stéphane", 16),
+    ("Julien", 16),
+    ("Sébastien", 14),
+    ("David", 14),
+    ("Thomas", 16),
+    ("Alexandre", 14),
+    ("Jean-Pierre", 14),
+    ("Jean-Claude", 10),
+    ("Jean-Marc", 8),
+    ("François", 16),
+    ("Gérard", 14),
+    ("Lucas", 14),
+    ("Hugo", 12),
+    ("Gabriel", 12),
+    ("Léo", 12),
+    ("Raphaël", 10),
+    ("Arthur", 10),
+    ("Louis", 10),
+    ("Jules", 10),
+    ("Maël", 6),
+    ("Noah", 6),
+    ("Adam", 8),
+    ("Mohamed", 8),
+    ("Enzo", 8),
+    ("Théo", 10),
+    ("Nathan", 10),
+    ("Mathis", 8),
+    ("Antoine", 12),
+    ("Maxime", 12),
+    ("Kevin", 8),
+)
+FEMALE_GIVEN_NAMES = (
+    ("Marie", 60),
+    ("Nathalie", 26),
+    ("Isabelle", 26),
+    ("Sylvie", 24),
+    ("Catherine", 24),
+    ("Françoise", 22),
+    ("Monique", 18),
+    ("Christine", 20),
+    ("Martine", 20),
+    ("Sophie", 18),
+    ("Valérie", 16),
+    ("Sandrine", 16),
+    ("Céline", 14),
+    ("Stéphanie", 14),
+    ("Véronique", 14),
+    ("Nicole", 16),
+    ("Jacqueline", 16),
+    ("Anne", 18),
+    ("Julie", 14),
+    ("Aurélie", 12),
+    ("Émilie", 12),
+    ("Laura", 10),
+    ("Camille", 14),
+    ("Emma", 12),
+    ("Jade", 12),
+    ("Louise", 12),
+    ("Alice", 10),
+    ("Chloé", 12),
+    ("Léa", 14),
+    ("Manon", 12),
+    ("Inès", 10),
+    ("Lina", 8),
+    ("Rose", 8),
+    ("Anna", 8),
+    ("Mila", 6),
+    ("Ambre", 6),
+    ("Sarah", 10),
+    ("Marie-Claire", 6),
+    ("Marie-Thérèse", 6),
+    ("Anne-Marie", 8),
+    ("Jeanne", 12),
+    ("Simone", 10),
+    ("Denise", 10),
+    ("Yvette", 8),
+    ("Hélène", 12),
+    ("Pauline", 10),
+    ("Margaux", 8),
+    ("Océane", 6),
+)
+# Répartition des sexes (`sex` : M, F, O)
+SEXES = (("M", 484), ("F", 515), ("O", 1))
+
+# Pyramide des âges par tranche de 5 ans (0-4, 5-9... 95-99), en pourcentage de la population
+AGE_BANDS = (5.3, 5.9, 6.2, 6.2, 5.6, 5.6, 6.0, 6.3, 6.3, 6.4, 6.7, 6.5, 6.2, 5.8, 5.4, 3.9, 3.0, 2.1, 1.0, 0.3)
+# Part des patients décédés dans chaque tranche d'âge (âge qu'ils auraient à la date de référence)
+DEATH_RATES = (
+    0.002,
+    0.001,
+    0.001,
+    0.002,
+    0.003,
+    0.004,
+    0.005,
+    0.007,
+    0.01,
+    0.015,
+    0.02,
+    0.03,
+    0.045,
+    0.065,
+    0.09,
+    0.13,
+    0.2,
+    0.3,
+    0.45,
+    0.6,
+)
+# Codes de cause de décès des extractions (`death_code`, présent si et seulement si `death_date` l'est)
+DEATH_CODES = (("A1", 3), ("B2", 1))
+# Part des femmes mariées (nom d'usage différent du nom de naissance) à partir de 25 ans
+MARRIED_RATE = 0.55
+
+# Villes : nom, codes postaux, latitude et longitude du centre, population (milliers d'habitants)
+CITIES = (
+    ("Paris", tuple(f"750{number:02d}" for number in range(1, 21)), 48.8566, 2.3522, 2100),
+    ("Marseille", tuple(f"130{number:02d}" for number in range(1, 17)), 43.2965, 5.3698, 870),
+    ("Lyon", tuple(f"6900{number}" for number in range(1, 10)), 45.7640, 4.8357, 520),
+    ("Toulouse", ("31000", "31100", "31200", "31300", "31400", "31500"), 43.6047, 1.4442, 500),
+    ("Nice", ("06000", "06100", "06200", "06300"), 43.7102, 7.2620, 340),
+    ("Nantes", ("44000", "44100", "44200", "44300"), 47.2184, -1.5536, 320),
+    ("Montpellier", ("34000", "34070", "34080", "34090"), 43.6108, 3.8767, 300),
+    ("Strasbourg", ("67000", "67100", "67200"), 48.5734, 7.7521, 290),
+    ("Bordeaux", ("33000", "33100", "33200", "33300", "33800"), 44.8378, -0.5792, 260),
+    ("Lille", ("59000", "59160", "59260", "59800"), 50.6292, 3.0573, 235),
+    ("Rennes", ("35000", "35200", "35700"), 48.1173, -1.6778, 225),
+    ("Reims", ("51100",), 49.2583, 4.0317, 180),
+    ("Toulon", ("83000", "83100", "83200"), 43.1242, 5.9280, 180),
+    ("Saint-Étienne", ("42000", "42100"), 45.4397, 4.3872, 175),
+    ("Le Havre", ("76600", "76610", "76620"), 49.4944, 0.1079, 165),
+    ("Grenoble", ("38000", "38100"), 45.1885, 5.7245, 160),
+    ("Dijon", ("21000",), 47.3220, 5.0415, 160),
+    ("Angers", ("49000", "49100"), 47.4784, -0.5632, 155),
+    ("Villeurbanne", ("69100",), 45.7719, 4.8902, 155),
+    ("Nîmes", ("30000", "30900"), 43.8367, 4.3601, 150),
+    ("Clermont-Ferrand", ("63000", "63100"), 45.7772, 3.0870, 147),
+    ("Aix-en-Provence", ("13090", "13100", "13290"), 43.5297, 5.4474, 145),
+    ("Le Mans", ("72000", "72100"), 48.0061, 0.1996, 145),
+    ("Brest", ("29200",), 48.3904, -4.4861, 140),
+    ("Tours", ("37000", "37100", "37200"), 47.3941, 0.6848, 137),
+    ("Amiens", ("80000", "80080", "80090"), 49.8941, 2.2958, 135),
+    ("Limoges", ("87000", "87100", "87280"), 45.8336, 1.2611, 130),
+    ("Annecy", ("74000", "74370", "74600", "74940"), 45.8992, 6.1294, 130),
+    ("Perpignan", ("66000", "66100"), 42.6887, 2.8948, 120),
+    ("Metz", ("57000", "57050", "57070"), 49.1193, 6.1757, 120),
+    ("Besançon", ("25000",), 47.2378, 6.0241, 120),
+    ("Orléans", ("45000", "45100"), 47.9030, 1.9093, 117),
+    ("Rouen", ("76000", "76100"), 49.4432, 1.0999, 114),
+    ("Mulhouse", ("68100", "68200"), 47.7508, 7.3359, 108),
+    ("Caen", ("14000",), 49.1829, -0.3707, 106),
+    ("Nancy", ("54000", "54100"), 48.6921, 6.1844, 105),
+    ("Argenteuil", ("95100",), 48.9472, 2.2467, 110),
+    ("Saint-Denis", ("93200", "93210"), 48.9362, 2.3574, 113),
+    ("Montreuil", ("93100",), 48.8638, 2.4485, 110),
+    ("Roubaix", ("59100",), 50.6942, 3.1746, 98),
+    ("Avignon", ("84000",), 43.9493, 4.8055, 91),
+    ("Poitiers", ("86000",), 46.5802, 0.3404, 89),
+    ("Pau", ("64000",), 43.2951, -0.3708, 76),
+    ("La Rochelle", ("17000",), 46.1603, -1.1511, 78),
+    ("Quimper", ("29000",), 47.9960, -4.1024, 63),
+    ("Ajaccio", ("20000", "20090"), 41.9192, 8.7386, 72),
+)
+# Pays de naissance hors de France : pays, ville, code INSEE du pays, latitude, longitude, poids
+BIRTH_ABROAD = (
+    ("Algérie", "Alger", "99352", 36.7538, 3.0588, 30),
+    ("Maroc", "Casablanca", "99350", 33.5731, -7.5898, 22),
+    ("Portugal", "Lisbonne", "99139", 38.7223, -9.1393, 14),
+    ("Tunisie", "Tunis", "99351", 36.8065, 10.1815, 10),
+    ("Italie", "Rome", "99127", 41.9028, 12.4964, 7),
+    ("Espagne", "Madrid", "99134", 40.4168, -3.7038, 6),
+    ("Turquie", "Istanbul", "99208", 41.0082, 28.9784, 6),
+    ("Royaume-Uni", "Londres", "99132", 51.5074, -0.1278, 4),
+    ("Sénégal", "Dakar", "99341", 14.7167, -17.4677, 4),
+    ("Belgique", "Bruxelles", "99131", 50.8503, 4.3517, 4),
+    ("Allemagne", "Berlin", "99109", 52.5200, 13.4050, 4),
+    ("Viêt Nam", "Hô Chi Minh-Ville", "99243", 10.8231, 106.6297, 2),
+)
+# Part des patients nés à l'étranger
+BORN_ABROAD_RATE = 0.12
+# Écart type de la position d'une adresse autour du centre de sa ville, en degrés (environ 2 km)
+ADDRESS_SPREAD = 0.02
+
+STREET_TYPES = (
+    ("rue", 60),
+    ("avenue", 15),
+    ("boulevard", 8),
+    ("place", 4),
+    ("allée", 5),
+    ("impasse", 5),
+    ("chemin", 3),
+)
+STREET_NAMES = (
+    "de la République",
+    "Victor Hugo",
+    "Jean Jaurès",
+    "de la Gare",
+    "Pasteur",
+    "du Général de Gaulle",
+    "des Écoles",
+    "de l'Église",
+    "du Moulin",
+    "Gambetta",
+    "Voltaire",
+    "Jules Ferry",
+    "de la Paix",
+    "des Lilas",
+    "du Château",
+    "de la Liberté",
+    "Émile Zola",
+    "Anatole France",
+    "des Tilleuls",
+    "du Stade",
+    "de Verdun",
+    "Jean Moulin",
+    "Carnot",
+    "de la Mairie",
+    "du Commerce",
+    "des Roses",
+    "Nationale",
+    "Saint-Martin",
+    "de Paris",
+    "Louis Pasteur",
+)
+
+
+class SeedError(ValueError):
+    """Erreur levée lorsque des patients ont déjà été générés avec la graine demandée."""
+
+
+class Address(NamedTuple):
+    """Adresse de résidence générée, avec sa position et sa cellule geohash."""
+
+    line: str
+    city: str
+    zip_code: str
+    latitude: float
+    longitude: float
+    geohash: Optional[str]
+
+
+def weighted(pool: Sequence[Tuple[Any, float]]) -> Tuple[List[Any], List[float]]:
+    """Valeurs d'une table pondérée et poids cumulés, pour `random.choices`.
+
+    Args:
+        pool: Couples (valeur, poids)
+
+    Returns
+    -------
+    Tuple[List[Any], List[float]]
+        Valeurs et poids cumulés
+    """
+    return [value for value, _ in pool], list(accumulate(weight for _, weight in pool))
+
+
+def address_book(rng: random.Random) -> List[List[Address]]:
+    """Tire les adresses de chaque ville, en nombre proportionnel à sa population.
+
+    La cellule geohash n'est ainsi calculée qu'une fois par adresse et non par patient.
+
+    Args:
+        rng: Générateur aléatoire
+
+    Returns
+    -------
+    List[List[Address]]
+        Adresses de chaque ville de `CITIES`, dans le même ordre
+    """
+    population = sum(city[4] for city in CITIES)
+    street_types, street_type_weights = weighted(STREET_TYPES)
+    book = []
+    for name, zip_codes, latitude, longitude, weight in CITIES:
+        addresses = []
+        for _ in range(max(int(ADDRESS_BOOK_SIZE * weight / population), 1)):
+            street_type = rng.choices(street_types, cum_weights=street_type_weights)[0]
+            line = f"{rng.randint(1, 180)} {street_type} {rng.choice(STREET_NAMES)}"
+            point_latitude = round(latitude + rng.gauss(0, ADDRESS_SPREAD), 6)
+            point_longitude = round(longitude + rng.gauss(0, ADDRESS_SPREAD), 6)
+            addresses.append(
+                Address(
+                    line,
+                    name,
+                    rng.choice(zip_codes),
+                    point_latitude,
+                    point_longitude,
+                    location_cell(point_latitude, point_longitude),
+                )
+            )
+        book.append(addresses)
+    return book
+
+
+def generate_columns(
+    rng: random.Random, book: List[List[Address]], ipps: List[str], as_of: date, now: datetime
+) -> Dict[str, List[Any]]:
+    """Génère un lot de patients colonne par colonne (un tirage `random.choices` par colonne).
+
+    Args:
+        rng: Générateur aléatoire
+        book: Adresses de chaque ville (`address_book`)
+        ipps: IPP des patients du lot
+        as_of: Date de référence des âges et des décès
+        now: Date de mise à jour enregistrée
+
+    Returns
+    -------
+    Dict[str, List[Any]]
+        Valeurs de chaque colonne de `dwh_patient` (hors clé primaire), par nom d'attribut
+    """
+    count = len(ipps)
+    reference = datetime.combine(as_of, time(), tzinfo=timezone.utc)
+
+    sex_values, sex_weights = weighted(SEXES)
+    sexes = rng.choices(sex_values, cum_weights=sex_weights, k=count)
+    male_names, male_weights = weighted(MALE_GIVEN_NAMES)
+    female_names, female_weights = weighted(FEMALE_GIVEN_NAMES)
+    male = rng.choices(male_names, cum_weights=male_weights, k=count)
+    female = rng.choices(female_names, cum_weights=female_weights, k=count)
+    family_names, family_weights = weighted(FAMILY_NAMES)
+    birth_names = rng.choices(family_names, cum_weights=family_weights, k=count)
+    spouse_names = rng.choices(family_names, cum_weights=family_weights, k=count)
+
+    bands = rng.choices(range(len(AGE_BANDS)), cum_weights=list(accumulate(AGE_BANDS)), k=count)
+    ages = [(band * 5 + rng.random() * 5) * 365.25 for band in bands]
+    birth_dates = [reference - timedelta(days=int(age)) for age in ages]
+    codes, code_weights = weighted(DEATH_CODES)
+    death_codes = rng.choices(codes, cum_weights=code_weights, k=count)
+
+    city_weights = list(accumulate(city[4] for city in CITIES))
+    addresses = [
+        rng.choice(book[index]) for index in rng.choices(range(len(CITIES)), cum_weights=city_weights, k=count)
+    ]
+    birth_cities = rng.choices(range(len(CITIES)), cum_weights=city_weights, k=count)
+    abroad, abroad_weights = weighted([(place, place[5]) for place in BIRTH_ABROAD])
+    birth_abroad = rng.choices(abroad, cum_weights=abroad_weights, k=count)
+
+    columns: Dict[str, List[Any]] = {field.attname: [] for field in Patient._meta.concrete_fields}
+    for index in range(count):
+        sex = sexes[index]
+        first_name = male[index] if sex == "M" or (sex == "O" and index % 2) else female[index]
+        married = sex == "F" and bands[index] >= 5 and rng.random() < MARRIED_RATE
+        if rng.random() < DEATH_RATES[bands[index]]:
+            # Décès survenu dans les 15 dernières années, après la naissance
+            start = max(birth_dates[index], reference - timedelta(days=15 * 365))
+            death_date = start + timedelta(seconds=int(rng.random() * (reference - start).total_seconds()))
+            death_code = death_codes[index]
+        else:
+            death_date = death_code = None
+        address = addresses[index]
+        if rng.random() < BORN_ABROAD_RATE:
+            birth_country, birth_city, birth_zip_code, birth_latitude, birth_longitude, _ = birth_abroad[index]
+        else:
+            birth_city, zip_codes, birth_latitude, birth_longitude, _ = CITIES[birth_cities[index]]
+            birth_country, birth_zip_code = "France", zip_codes[0]
+        phone = rng.randrange(10**8)
+
+        columns["ipp"].append(ipps[index])
+        columns["last_name"].append(spouse_names[index] if married else birth_names[index])
+        columns["first_name"].append(first_name)
+        columns["maiden_name"].append(birth_names[index] if married else None)
+        columns["birth_date"].append(birth_dates[index])
+        columns["sex"].append(sex)
+        columns["residence_address"].append(address.line)
+        columns["phone_number"].append(
+            f"0{6 + phone % 2} {phone // 10**6 % 100:02d} {phone // 10**4 % 100:02d} {phone // 100 % 100:02d} {phone % 100:02d}"
+        )
+        columns["residence_country"].append("France")
+        columns["residence_city"].append(address.city)
+        columns["residence_zip_code"].append(address.zip_code)
+        columns["residence_latitude"].append(address.latitude)
+        columns["residence_longitude"].append(address.longitude)
+        columns["residence_geohash"].append(address.geohash)
+        columns["coordinates"].append(f"{address.latitude:.6f}, {address.longitude:.6f}")
+        columns["death_code"].append(death_code)
+        columns["death_date"].append(death_date)
+        columns["birth_country"].append(birth_country)
+        columns["birth_city"].append(birth_city)
+        columns["birth_zip_code"].append(birth_zip_code)
+        columns["birth_latitude"].append(birth_latitude)
+        columns["birth_longitude"].append(birth_longitude)
+        columns["update_date"].append(now)
+        columns["version_id"].append(1)
+    return columns
+
+
+def generate_patients(
+    count: int, seed: int, as_of: date = DEFAULT_AS_OF, progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """Insère `count` patients synthétiques, identiques pour une même graine.
+
+    Les IPP (`SYN<graine>-<numéro>`) sont uniques pour une graine donnée ; les clés de
+    rapprochement des noms sont écrites avec les patients, calculées une fois par nom
+    distinct. La première version n'est pas archivée dans `PatientHistory`, comme pour
+    les patients antérieurs à l'historisation : elle l'est à leur première modification.
+
+    Args:
+        count: Nombre de patients
+        seed: Graine du générateur aléatoire
+        as_of: Date de référence des âges et des décès
+        progress: Appelée avec le nombre de patients insérés après chaque lot
+
+    Returns
+    -------
+    int
+        Nombre de patients insérés
+
+    Raises
+    ------
+    SeedError
+        Si des patients ont déjà été générés avec cette graine
+    """
+    prefix = f"SYN{seed}-"
+    if Patient.objects.filter(ipp__startswith=prefix).exists():
+        raise SeedError(f"Patients already generated with seed {seed}")
+    connection = connections[router.db_for_write(Patient)]
+    fields = [field for field in Patient._meta.concrete_fields if not field.primary_key]
+    datetime_fields = {field.attname for field in fields if field.get_internal_type() == "DateTimeField"}
+    token_fields = [(field, kind) for field, kind in NAME_FIELDS.items()]
+    token_columns = [PatientNameToken._meta.get_field(name) for name in ("patient", "kind", "normalized", "phonetic")]
+    tokens_by_name: Dict[str, List[Tuple[str, str]]] = {}
+    # Dates de naissance au jour près et date de mise à jour commune : converties une fois par valeur
+    adapt_datetime = lru_cache(maxsize=None)(connection.ops.adapt_datetimefield_value)
+
+    rng = random.Random(seed)
+    book = address_book(rng)
+    now = django_timezone.now()
+    inserted = 0
+    for start in range(0, count, BATCH_SIZE):
+        ipps = [f"{prefix}{index:09d}" for index in range(start, min(start + BATCH_SIZE, count))]
+        columns = generate_columns(rng, book, ipps, as_of, now)
+        for name in datetime_fields:
+            columns[name] = [adapt_datetime(value) for value in columns[name]]
+
+        with transaction.atomic(using=connection.alias):
+            insert_values(Patient, fields, list(zip(*(columns[field.attname] for field in fields))))
+            pks = dict(
+                Patient.objects.using(connection.alias)
+                .filter(ipp__gte=ipps[0], ipp__lte=ipps[-1])
+                .values_list("ipp", "pk")
+                .iterator()
+            )
+            tokens = []
+            for field, kind in token_fields:
+                for ipp, value in zip(ipps, columns[field]):
+                    if value is None:
+                        continue
+                    if value not in tokens_by_name:
+                        tokens_by_name[value] = [(token, french_soundex(token)) for token in name_tokens(value)]
+                    pk = pks[ipp]
+                    tokens.extend((pk, kind, normalized, phonetic) for normalized, phonetic in tokens_by_name[value])
+            insert_values(PatientNameToken, token_columns, tokens)
+        inserted += len(ipps)
+        if progress is not None:
+            progress(inserted)
+    return inserted
+
+
+def patient_resource(ipp: str, index: int) -> Dict[str, Any]:
+    """Construit une ressource Patient FHIR envoyée à l'API par les mesures et les tests.
+
+    Args:
+        ipp: IPP du patient
+        index: Numéro du patient, utilisé pour varier les noms
+
+    Returns
+    -------
+    Dict[str, Any]
+        Ressource Patient FHIR
+    """
+    return {
+        "resourceType": "Patient",
+        "identifier": [{"system": IPP_SYSTEM, "value": ipp}],
+        "name": [{"family": f"Bench{index}", "given": ["Camille"]}],
+        "gender": "female" if index % 2 else "male",
+        "birthDate": "1980-01-01",
+        "address": [{"line": [f"{index} rue de la Gare"], "city": "Lyon", "postalCode": "69001", "country": "France"}],
+    }
@@ -0,0 +1,51 @@
+# apps/patients/tests/conftest.py
+from datetime import datetime, timezone
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import caches
+
+from apps.patients.models import Patient
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix, tmp_path_factory):
+    """Place la base de test dans un fichier temporaire."""
+    # Base de test dans un fichier plutôt qu'en mémoire : le cache partagé de SQLite en mémoire
+    # verrouille des tables sans attendre, et les tests à plusieurs threads échoueraient
+    django_settings.DATABASES["default"].setdefault("TEST", {})
+    django_settings.DATABASES["default"]["TEST"]["NAME"] = str(tmp_path_factory.mktemp("db") / "test.sqlite3")
+
+
+@pytest.fixture(autouse=True)
+def static_files(settings):
+    """Sert les fichiers statiques sans collecte ni manifeste."""
+    # Fichiers statiques non collectés : ni répertoire `collectstatic` ni manifeste
+    settings.STATIC_ROOT = None
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Vide les caches avant chaque test."""
+    # Les caches en mémoire survivent au retour arrière des transactions de test : un même id
+    # de patient peut être réutilisé d'un test à l'autre
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def patient(db):
+    """Patient enregistré en base."""
+    return Patient.objects.create(
+        ipp="IPP-TEST-1",
+        last_name="Dupont",
+        first_name="Jean",
+        sex="M",
+        birth_date=datetime(1956, 3, 4, tzinfo=timezone.utc),
+        residence_city="Lyon",
+        residence_zip_code="69001",
+    )
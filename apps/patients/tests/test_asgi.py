@@ -0,0 +1,49 @@
+# apps/patients/tests/test_asgi.py
+import logging
+
+import pytest
+from asgiref.sync import iscoroutinefunction
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import resolve
+
+from apps.patients.models import Patient
+from apps.patients.synthetic import patient_resource
+
+
+def test_asgi_middleware_stack_runs_without_thread_hop(settings, caplog):
+    # Django ne journalise qu'en DEBUG l'adaptation d'un middleware synchrone, qui ferait
+    # passer chaque requête ASGI par un thread
+    settings.DEBUG = True
+    with caplog.at_level(logging.DEBUG, logger="django.request"):
+        ASGIHandler()
+    assert [record.getMessage() for record in caplog.records if "adapted for middleware" in record.getMessage()] == []
+
+
+@pytest.mark.parametrize(
+    "url", ["/api/patient/", "/api/patient/1/", "/api/patient/1/_history/", "/api/patient/1/_history/1/"]
+)
+def test_patient_reads_are_async_views(url):
+    assert iscoroutinefunction(resolve(url).func)
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_patient_endpoints_are_served_under_asgi(async_client):
+    created = await async_client.post(
+        "/api/patient/", patient_resource("IPP-ASGI-1", 1), content_type="application/json"
+    )
+    assert created.status_code == 201
+    pk = (await Patient.objects.aget(ipp="IPP-ASGI-1")).pk
+
+    search = (await async_client.get("/api/patient/?family=bench1&_total=accurate")).json()
+    assert search["total"] == 1
+    assert [entry["resource"]["id"] for entry in search["entry"]] == [str(pk)]
+    read = await async_client.get(f"/api/patient/{pk}/")
+    assert read.status_code == 200
+    assert (await async_client.get(f"/api/patient/{pk}/", headers={"If-None-Match": read["ETag"]})).status_code == 304
+    assert (await async_client.get("/api/patient/0/")).status_code == 404
+    assert (await async_client.get(f"/api/patient/{pk}/_history/1/")).status_code == 200
+
+    # Écritures synchrones, exécutées dans le thread des appels ORM
+    assert (await async_client.delete(f"/api/patient/{pk}/")).status_code == 204
+    history = (await async_client.get(f"/api/patient/{pk}/_history/")).json()
+    assert [entry["request"]["method"] for entry in history["entry"]] == ["DELETE", "POST"]
@@ -0,0 +1,91 @@
+# apps/patients/tests/test_bundle.py
+import pytest
+
+from apps.patients.fast_serializer import IPP_SYSTEM
+from apps.patients.models import Patient
+
+
+def bundle(bundle_type, *entries):
+    return {
+        "resourceType": "Bundle",
+        "type": bundle_type,
+        "entry": [
+            {
+                "resource": {
+                    "resourceType": "Patient",
+                    "identifier": [{"system": IPP_SYSTEM, "value": ipp}],
+                    "name": [{"family": "Dupont", "given": ["Paul"]}],
+                },
+                "request": {"method": "POST", "url": "Patient", **({"ifNoneExist": criteria} if criteria else {})},
+            }
+            for ipp, criteria in entries
+        ],
+    }
+
+
+def statuses(response):
+    return [entry["response"]["status"] for entry in response.json()["entry"]]
+
+
+@pytest.fixture
+def namesake(db):
+    return Patient.objects.create(ipp="IPP-TEST-2", last_name="Dupont", first_name="Marie", sex="F")
+
+
+def test_if_none_exist_returns_the_single_matching_patient(client, patient):
+    response = client.post(
+        "/api/",
+        bundle("batch", ("IPP-NEW-1", f"identifier={IPP_SYSTEM}|{patient.ipp}"), ("IPP-NEW-2", "identifier=IPP-NONE")),
+        content_type="application/json",
+    )
+
+    assert statuses(response) == ["200 OK", "201 Created"]
+    assert response.json()["entry"][0]["response"]["location"] == f"/api/patient/{patient.pk}/_history/1/"
+    assert not Patient.objects.filter(ipp="IPP-NEW-1").exists()
+
+
+def test_if_none_exist_returns_a_patient_without_update_date(client, patient):
+    # Patient chargé avant l'horodatage des écritures
+    Patient.objects.filter(pk=patient.pk).update(update_date=None)
+
+    response = client.post(
+        "/api/",
+        bundle("batch", ("IPP-NEW-1", f"identifier={IPP_SYSTEM}|{patient.ipp}"), ("IPP-NEW-2", None)),
+        content_type="application/json",
+    )
+
+    found, created = (entry["response"] for entry in response.json()["entry"])
+    assert (found["status"], created["status"]) == ("200 OK", "201 Created")
+    assert "lastModified" not in found
+    assert "lastModified" in created
+
+
+def test_if_none_exist_matching_several_patients_fails_with_412(client, patient, namesake):
+    response = client.post(
+        "/api/", bundle("batch", ("IPP-NEW-1", "family=Dupont"), ("IPP-NEW-2", None)), content_type="application/json"
+    )
+
+    assert statuses(response) == ["412 Precondition Failed", "201 Created"]
+
+
+def test_if_none_exist_matching_several_patients_rolls_back_a_transaction(client, patient, namesake):
+    response = client.post(
+        "/api/",
+        bundle("transaction", ("IPP-NEW-1", None), ("IPP-NEW-2", "family=Dupont")),
+        content_type="application/json",
+    )
+
+    assert response.status_code == 412
+    assert not Patient.objects.filter(ipp__startswith="IPP-NEW-").exists()
+
+
+def test_if_none_exist_without_match_still_refuses_an_existing_ipp(client, patient):
+    response = client.post("/api/", bundle("batch", (patient.ipp, "family=Martin")), content_type="application/json")
+
+    assert statuses(response) == ["409 Conflict"]
+
+
+def test_invalid_if_none_exist_is_refused(client, patient):
+    response = client.post("/api/", bundle("batch", ("IPP-NEW-1", "_count=1")), content_type="application/json")
+
+    assert statuses(response) == ["400 Bad Request"]
@@ -0,0 +1,54 @@
+# apps/patients/tests/test_cache.py
+from apps.patients.models import Patient
+
+
+def test_read_serves_the_version_written_by_another_worker(client, patient):
+    response = client.get(f"/api/patient/{patient.pk}/")
+    assert response["ETag"] == 'W/"1"'
+
+    # Écriture d'un autre processus : aucune invalidation du cache local n'a lieu
+    Patient.objects.filter(pk=patient.pk).update(last_name="Martin", version_id=2)
+
+    response = client.get(f"/api/patient/{patient.pk}/")
+    assert response["ETag"] == 'W/"2"'
+    assert response.json()["name"][0]["family"] == "Martin"
+    assert client.get(f"/api/patient/{patient.pk}/", headers={"If-None-Match": 'W/"1"'}).status_code == 200
+    assert client.get(f"/api/patient/{patient.pk}/", headers={"If-None-Match": 'W/"2"'}).status_code == 304
+
+
+def test_detail_page_serves_the_current_version(client, patient):
+    client.get(f"/patient/{patient.pk}/")
+    Patient.objects.filter(pk=patient.pk).update(last_name="Martin", version_id=2)
+
+    assert b"Martin" in client.get(f"/patient/{patient.pk}/").content
+
+
+def test_edit_form_is_read_from_the_database(client, patient):
+    client.get(f"/patient/{patient.pk}/")
+    Patient.objects.filter(pk=patient.pk).update(last_name="Martin", version_id=2)
+
+    response = client.get(f"/patient/{patient.pk}/edit/")
+    assert b'name="version_id" value="2"' in response.content
+    assert b"Martin" in response.content
+
+
+def test_edit_of_a_replaced_version_is_refused(client, patient):
+    form = {
+        "version_id": "1",
+        "identifier.0.value": patient.ipp,
+        "name.0.family": "Durand",
+        "name.0.given.0": "Jean",
+        "gender": "male",
+        "birthDate": "1956-03-04",
+    }
+    patient.last_name = "Martin"
+    patient.save()
+
+    response = client.post(f"/patient/{patient.pk}/update/", form)
+    assert response.status_code == 409
+    assert Patient.objects.get(pk=patient.pk).last_name == "Martin"
+
+    form["version_id"] = "2"
+    response = client.post(f"/patient/{patient.pk}/update/", form)
+    assert response.status_code == 302
+    assert Patient.objects.get(pk=patient.pk).last_name == "Durand"
@@ -0,0 +1,55 @@
+# apps/patients/tests/test_concurrent_create.py
+import threading
+from collections import Counter
+
+import pytest
+from django.db import connection
+from django.test import Client
+
+from apps.patients.fast_serializer import IPP_SYSTEM
+from apps.patients.models import Patient
+from apps.patients.synthetic import patient_resource
+
+THREADS = 8
+ROUNDS = 3
+
+
+def create_concurrently(ipp, conditional):
+    # Chaque thread envoie la même création au même moment, avec son client et sa connexion,
+    # comme un worker du serveur
+    headers = {"If-None-Exist": f"identifier={IPP_SYSTEM}|{ipp}"} if conditional else {}
+    barrier = threading.Barrier(THREADS)
+    responses = [None] * THREADS
+
+    def create(index):
+        try:
+            client = Client(raise_request_exception=False)
+            barrier.wait()
+            response = client.post(
+                "/api/patient/", patient_resource(ipp, index), content_type="application/json", headers=headers
+            )
+            responses[index] = (response.status_code, response.get("Location"))
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=create, args=(index,)) for index in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return responses
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("conditional, others", [(False, 409), (True, 200)])
+def test_concurrent_creations_of_an_ipp_create_a_single_patient(conditional, others):
+    for round_index in range(ROUNDS):
+        ipp = f"CONCURRENT-{int(conditional)}-{round_index}"
+        responses = create_concurrently(ipp, conditional)
+
+        # Une seule création réussit ; les autres sont refusées (409) ou renvoient le patient créé (200),
+        # jamais une erreur serveur sur la contrainte d'unicité
+        assert Counter(status for status, _ in responses) == {201: 1, others: THREADS - 1}
+        assert Patient.objects.filter(ipp=ipp).count() == 1
+        if conditional:
+            assert len({location for _, location in responses}) == 1
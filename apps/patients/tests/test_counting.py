@@ -0,0 +1,70 @@
+# apps/patients/tests/test_counting.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.patients.models import Patient
+
+
+@pytest.fixture
+def patients(db):
+    return [Patient.objects.create(ipp=f"IPP-COUNT-{index}", last_name="Martin") for index in range(3)]
+
+
+def test_total_is_omitted_by_default(client, patients):
+    assert "total" not in client.get("/api/patient/").json()
+
+
+@pytest.mark.parametrize("mode", ["estimate", "accurate"])
+def test_total_counts_the_search_results(client, patients, mode):
+    assert client.get(f"/api/patient/?_total={mode}").json()["total"] == 3
+    assert client.get(f"/api/patient/?family=martin&_total={mode}").json()["total"] == 3
+
+
+def test_invalid_total_is_refused(client, patients):
+    assert client.get("/api/patient/?_total=exact").status_code == 400
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        # Système d'identifiant étranger : `IN` vide, aucune requête SQL n'est générée
+        "identifier=http://other|123&_total=accurate",
+        "identifier=http://other|123&_total=estimate",
+        "identifier=http://other|123&_summary=count",
+        # Valeur sans caractère indexable
+        "family=-&_total=accurate",
+    ],
+)
+def test_total_of_a_search_without_possible_result_is_zero(client, patients, query):
+    response = client.get(f"/api/patient/?{query}")
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+
+
+def test_summary_count_returns_no_entry(client, patients):
+    bundle = client.get("/api/patient/?family=martin&_summary=count").json()
+
+    assert bundle["total"] == 3
+    assert "entry" not in bundle
+
+
+def test_accurate_total_is_cached_until_the_next_write(client, patients):
+    def counts():
+        with CaptureQueriesContext(connection) as queries:
+            total = client.get("/api/patient/?family=martin&_total=accurate").json()["total"]
+        return total, sum("COUNT(" in query["sql"] for query in queries.captured_queries)
+
+    assert counts() == (3, 1)
+    assert counts() == (3, 0)
+    Patient.objects.create(ipp="IPP-COUNT-NEW", last_name="Martin")
+    assert counts() == (4, 1)
+
+
+def test_patient_list_page_runs_no_count(client, patients):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/patient/")
+
+    assert response.status_code == 200
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
@@ -0,0 +1,71 @@
+# apps/patients/tests/test_date_search.py
+import re
+
+import pytest
+from django.db import connection, transaction
+from django.http import QueryDict
+
+from apps.patients.models import Patient
+from apps.patients.search import DATE_PREFIXES, PatientSearch
+
+PAGE_SIZE = 20
+# Une valeur par précision acceptée : année, mois, jour, minute et seconde avec fuseau
+DATE_VALUES = ("1956", "1956-03", "1956-03-04", "1956-03-04T10:30Z", "1956-03-04T10:30:15+02:00")
+# Chaque paramètre de date combiné à chaque préfixe et à chaque précision, puis plusieurs
+# valeurs combinées en OU et plusieurs paramètres combinés en ET
+DATE_QUERIES = [
+    f"{parameter}={prefix}{value}"
+    for parameter in PatientSearch.date_columns
+    for prefix in ("", *DATE_PREFIXES)
+    for value in DATE_VALUES
+] + [
+    "birthdate=lt1950,ge1960-06",
+    "birthdate=ge1950&birthdate=lt1960",
+    "birthdate=1956&death-date=gt2020",
+]
+
+
+def explain(query):
+    # Plan de la première page d'une recherche, lue comme par l'API (`ORDER BY id LIMIT`)
+    queryset = PatientSearch(QueryDict(query)).plan().queryset.order_by("id")[: PAGE_SIZE + 1]
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            # La taille de la table de test ne doit pas décider du plan
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", DATE_QUERIES)
+def test_date_search_is_read_by_index(query):
+    table = re.escape(Patient._meta.db_table)
+    full_scan = rf"Seq Scan on {table}\b" if connection.vendor == "postgresql" else rf"\bSCAN {table}\b"
+    assert not re.search(full_scan, explain(query))
+
+
+@pytest.mark.parametrize(
+    "value, matches",
+    [
+        ("ap0001-01-01", 0),
+        ("ap9999-12-31", 0),
+        ("9999", 0),
+        ("9999-12-31", 0),
+        ("gt9999-12-31", 0),
+        ("ne9999", 1),
+        ("9999-12-31T23:59-05:00", 0),
+        ("0001-01-01T00:00+02:00", 0),
+        ("lt0001", 0),
+    ],
+)
+def test_date_search_accepts_the_representable_limits(client, patient, value, matches):
+    response = client.get("/api/patient/", {"birthdate": value})
+
+    assert response.status_code == 200
+    assert len(response.json()["entry"]) == matches
+
+
+def test_approximate_date_search_keeps_its_margin(client, patient):
+    response = client.get("/api/patient/", {"birthdate": "ap1957"})
+
+    assert [entry["resource"]["id"] for entry in response.json()["entry"]] == [str(patient.pk)]
@@ -0,0 +1,54 @@
+# apps/patients/tests/test_export.py
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.patients.api_views import PatientExportAPIView
+from apps.patients.models import Patient
+
+
+@pytest.fixture
+def patients(db):
+    patients = [Patient.objects.create(ipp=f"IPP-EXPORT-{index}", last_name="Martin") for index in range(5)]
+    # Deux patients modifiés pour la dernière fois en 2020
+    Patient.objects.filter(pk__in=[patients[0].pk, patients[1].pk]).update(
+        update_date=datetime(2020, 1, 1, tzinfo=timezone.utc)
+    )
+    return patients
+
+
+def test_export_streams_the_api_resources_byte_for_byte(client, patients):
+    response = client.get("/api/patient/$export/")
+
+    assert response.streaming
+    assert response["Content-Type"] == "application/fhir+ndjson"
+    assert response["Content-Disposition"] == 'attachment; filename="Patient.ndjson"'
+    lines = b"".join(response.streaming_content).splitlines()
+    assert lines == [client.get(f"/api/patient/{patient.pk}/").content for patient in patients]
+
+
+@pytest.mark.parametrize(
+    "since, exported",
+    [("2021-01-01", 3), ("2019-12-31T23:00:00+00:00", 5), ("2020-01-01T02:00:00 02:00", 3)],
+)
+def test_export_filters_on_since(client, patients, since, exported):
+    response = client.get("/api/patient/$export/", {"_since": since})
+
+    assert len(b"".join(response.streaming_content).splitlines()) == exported
+
+
+@pytest.mark.parametrize("query", ["_since=yesterday", "_type=Observation", "_type=Patient,Encounter"])
+def test_export_refuses_unsupported_filters(client, patients, query):
+    assert client.get(f"/api/patient/$export/?{query}").status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_export_streams_keyset_blocks_under_asgi(async_client, monkeypatch):
+    monkeypatch.setattr(PatientExportAPIView, "async_chunk_size", 2)
+    pks = [(await Patient.objects.acreate(ipp=f"IPP-EXPORT-{index}")).pk for index in range(5)]
+
+    response = await async_client.get("/api/patient/$export/?_type=Patient")
+    content = b"".join([chunk async for chunk in response.streaming_content])
+
+    assert [json.loads(line)["id"] for line in content.splitlines()] == [str(pk) for pk in pks]
@@ -0,0 +1,67 @@
+# apps/patients/tests/test_fast_serializer.py
+from datetime import datetime, timezone
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from apps.patients.fast_serializer import serialize_patient
+from apps.patients.models import Patient
+from apps.patients.serializers import PatientFHIRSerializer
+
+WHEN = datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+
+# Patients (non enregistrés) couvrant les cas limites : champs vides, chaînes vides, coordonnées partielles...
+EDGE_CASES = [
+    Patient(pk=1, ipp="IPP-EMPTY"),
+    Patient(pk=2, ipp="", last_name="", first_name="", maiden_name="", sex="", phone_number=""),
+    Patient(pk=3, ipp="IPP-ADDR", residence_city="", residence_zip_code="75001"),
+    Patient(pk=4, ipp="IPP-GEO", residence_address="1 rue X", residence_latitude=48.1, residence_longitude=None),
+    Patient(pk=5, ipp="IPP-BIRTH", birth_country="France", birth_latitude=0.0, birth_longitude=0.0),
+    Patient(pk=6, ipp="IPP-BIRTH-GEO", birth_city="Lyon", birth_latitude=45.7, birth_longitude=None),
+    Patient(pk=7, ipp="IPP-DEATH", death_date=WHEN, death_code="B2", update_date=WHEN),
+    Patient(pk=8, ipp="IPP-CODE", death_code="A1", sex="X", birth_date=WHEN),
+    Patient(
+        pk=9,
+        ipp="IPP-FULL",
+        last_name="Dupont",
+        first_name="Jean",
+        maiden_name="Martin",
+        sex="M",
+        birth_date=WHEN,
+        phone_number="0102030405",
+        residence_address="1 rue de la Paix",
+        residence_city="Paris",
+        residence_zip_code="75002",
+        residence_country="France",
+        residence_latitude=48.86,
+        residence_longitude=2.33,
+        birth_city="Nantes",
+        birth_zip_code="44000",
+        birth_country="France",
+        birth_latitude=47.21,
+        birth_longitude=-1.55,
+        update_date=WHEN,
+    ),
+]
+
+
+def assert_same_json(patient):
+    # Valeurs et ordre des éléments identiques une fois rendus en JSON
+    renderer = JSONRenderer()
+    expected = renderer.render(PatientFHIRSerializer().to_representation(patient))
+    assert renderer.render(serialize_patient(patient)) == expected
+
+
+@pytest.mark.parametrize("patient", EDGE_CASES, ids=lambda patient: patient.ipp or "blank")
+def test_serialize_patient_matches_drf_serializer(patient):
+    assert_same_json(patient)
+
+
+@pytest.mark.django_db
+def test_serialize_patient_matches_drf_serializer_after_save():
+    # Valeurs relues en base : version, date de mise à jour et geohash renseignés par `Patient.save`
+    source = EDGE_CASES[-1]
+    fields = {field.attname: getattr(source, field.attname) for field in Patient._meta.concrete_fields}
+    del fields["id"]
+    patient = Patient.objects.create(**fields)
+    assert_same_json(Patient.objects.get(pk=patient.pk))
@@ -0,0 +1,119 @@
+# apps/patients/tests/test_formats.py
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from apps.patients import fhir_json
+from apps.patients.fast_serializer import IPP_SYSTEM
+
+DATA = {
+    "resourceType": "Patient",
+    "name": [{"family": "Lefèvre", "given": ["Zoé"]}],
+    "text": "ligne paragraphe ",
+    "meta": {"lastUpdated": datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)},
+    "latitude": Decimal("45.75"),
+    "counts": {1: "un"},
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """Encodage par orjson, puis par le module json de la bibliothèque standard."""
+    if request.param == "json":
+        monkeypatch.setattr(fhir_json, "orjson", None)
+    return request.param
+
+
+def test_dumps_matches_drf(backend):
+    assert fhir_json.dumps(DATA) == JSONRenderer().render(DATA)
+
+
+def test_loads(backend):
+    assert fhir_json.loads(b'{"name": "Lef\xc3\xa8vre", "n": [1, 2.5]}') == {"name": "Lefèvre", "n": [1, 2.5]}
+    assert fhir_json.loads('{"a": null}') == {"a": None}
+    for content in (b"{", b'{"a": NaN}', b"[Infinity]"):
+        with pytest.raises(ValueError):
+            fhir_json.loads(content)
+
+
+@pytest.mark.parametrize(
+    "query, headers, content_type",
+    [
+        ("", {}, "application/fhir+json"),
+        ("", {"Accept": "application/json"}, "application/json"),
+        ("", {"Accept": "application/fhir+json"}, "application/fhir+json"),
+        ("_format=json", {"Accept": "application/json"}, "application/fhir+json"),
+        ("_format=application/fhir%2Bjson", {"Accept": "application/json"}, "application/fhir+json"),
+        ("_format=application/fhir+json", {}, "application/fhir+json"),
+        ("_format=application/json", {"Accept": "application/fhir+json"}, "application/json"),
+    ],
+)
+def test_format_negotiation(client, patient, query, headers, content_type):
+    for url in (f"/api/patient/?{query}", f"/api/patient/{patient.pk}/?{query}"):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response["Content-Type"] == content_type
+        assert json.loads(response.content)["resourceType"] in ("Bundle", "Patient")
+
+
+def test_unsupported_format_is_not_acceptable(client, patient):
+    assert client.get("/api/patient/?_format=xml").status_code == 406
+    assert client.get(f"/api/patient/{patient.pk}/?_format=ndjson").status_code == 406
+
+
+def test_export_format(client, patient):
+    response = client.get("/api/patient/$export/?_format=ndjson")
+    assert response["Content-Type"] == "application/fhir+ndjson"
+    assert client.get("/api/patient/$export/", headers={"Accept": "application/json"}).status_code == 200
+
+
+def test_indented_output_is_rendered_by_drf(client, patient):
+    for url in ("/api/patient/", f"/api/patient/{patient.pk}/"):
+        # Deux fois : la seconde lecture du patient est servie par le cache de ressources
+        for _ in range(2):
+            response = client.get(url, headers={"Accept": "application/json; indent=2"})
+            assert response.content.startswith(b'{\n  "')
+
+
+@pytest.mark.parametrize("content_type", ["application/fhir+json", "application/json"])
+def test_create_parses_json(client, db, content_type):
+    resource = {
+        "resourceType": "Patient",
+        "identifier": [{"system": IPP_SYSTEM, "value": "IPP-JSON-1"}],
+        "name": [{"family": "Lefèvre", "given": ["Zoé"]}],
+        "gender": "female",
+    }
+    response = client.post(
+        "/api/patient/",
+        json.dumps(resource),
+        content_type=content_type,
+        headers={"Prefer": "return=representation"},
+    )
+    assert response.status_code == 201, response.content
+    assert response.json()["name"][0]["family"] == "Lefèvre"
+
+
+def test_create_rejects_invalid_json(client, db):
+    response = client.post("/api/patient/", b'{"resourceType": ', content_type="application/fhir+json")
+    assert response.status_code == 400
+    assert "JSON parse error" in response.json()["detail"]
+
+
+def test_create_decodes_other_charsets(client, db):
+    resource = {
+        "resourceType": "Patient",
+        "identifier": [{"system": IPP_SYSTEM, "value": "IPP-JSON-2"}],
+        "name": [{"family": "Lefèvre"}],
+    }
+    # Le client de test encode le corps dans le jeu de caractères annoncé
+    response = client.post(
+        "/api/patient/",
+        json.dumps(resource, ensure_ascii=False),
+        content_type="application/fhir+json; charset=iso-8859-1",
+        headers={"Prefer": "return=representation"},
+    )
+    assert response.status_code == 201, response.content
+    assert response.json()["name"][0]["family"] == "Lefèvre"
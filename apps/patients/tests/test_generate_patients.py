@@ -0,0 +1,27 @@
+# apps/patients/tests/test_generate_patients.py
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.patients import synthetic
+from apps.patients.models import Patient
+
+
+@pytest.mark.django_db
+def test_generate_patients_refuses_a_seed_already_used():
+    call_command("generate_patients", count=3, seed=42)
+
+    with pytest.raises(CommandError, match="graine 42"):
+        call_command("generate_patients", count=3, seed=42)
+    assert Patient.objects.filter(ipp__startswith="SYN42-").count() == 3
+
+
+@pytest.mark.django_db
+def test_generate_patients_does_not_mask_other_errors(monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError("invalid column")
+
+    monkeypatch.setattr(synthetic, "generate_columns", fail)
+
+    with pytest.raises(ValueError, match="invalid column"):
+        call_command("generate_patients", count=3, seed=43)
@@ -0,0 +1,73 @@
+# apps/patients/tests/test_importer.py
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework import serializers
+
+from apps.patients import importer
+from apps.patients.importer import parse_csv, parse_ndjson
+from apps.patients.models import Patient
+from apps.patients.synthetic import patient_resource
+
+
+def test_ndjson_lines_that_are_not_patients_are_rejected():
+    records, rejects = parse_ndjson([(1, "[1,2]"), (2, '"Patient"'), (3, "{"), (4, '{"resourceType": "Bundle"}')])
+
+    assert records == []
+    assert [number for number, _ in rejects] == [1, 2, 3, 4]
+    assert rejects[0] == (1, "resourceType must be 'Patient'")
+
+
+@pytest.mark.parametrize(
+    "detail, message",
+    [
+        ({"birthDate": ["Date invalide."]}, "birthDate: Date invalide."),
+        (["Ressource invalide."], "Ressource invalide."),
+        ("Ressource invalide.", "Ressource invalide."),
+        ({"name": {"family": ["Trop long."]}}, "name: family: Trop long."),
+    ],
+)
+def test_serializer_errors_are_recorded_per_line(monkeypatch, detail, message):
+    def refuse(resource):
+        raise serializers.ValidationError(detail)
+
+    # Sérialiseur partagé du processus, créé au premier lot
+    parse_ndjson([])
+    monkeypatch.setattr(importer._serializer, "to_internal_value", refuse)
+
+    assert parse_ndjson([(7, json.dumps(patient_resource("IPP-IMPORT-1", 1)))]) == ([], [(7, message)])
+
+
+def test_csv_rows_are_cleaned_with_the_model_fields():
+    records, rejects = parse_csv(
+        [
+            (1, {"ipp": "IPP-IMPORT-1", "last_name": "Martin", "residence_latitude": "45,76", "birth_date": ""}),
+            (2, {"ipp": "", "last_name": "Martin"}),
+            (3, {"ipp": "IPP-IMPORT-3", "residence_latitude": "123"}),
+        ]
+    )
+
+    assert records == [
+        (1, {"ipp": "IPP-IMPORT-1", "last_name": "Martin", "residence_latitude": 45.76, "birth_date": None})
+    ]
+    assert [number for number, _ in rejects] == [2, 3]
+
+
+@pytest.mark.django_db
+def test_import_inserts_then_updates_changed_patients(tmp_path):
+    extract = tmp_path / "patients.ndjson"
+    resources = [patient_resource(f"IPP-IMPORT-{index}", index) for index in range(3)]
+    extract.write_text("\n".join([*map(json.dumps, resources), "[1,2]"]) + "\n")
+
+    call_command("import_patients", str(extract), workers=0, chunk_size=2, rejects=str(tmp_path / "rejects.ndjson"))
+    assert Patient.objects.filter(ipp__startswith="IPP-IMPORT-").count() == 3
+    assert [json.loads(line)["record"] for line in (tmp_path / "rejects.ndjson").read_text().splitlines()] == [4]
+
+    resources[0]["name"][0]["family"] = "Durand"
+    extract.write_text("\n".join(map(json.dumps, resources)) + "\n")
+    call_command("import_patients", str(extract), workers=0, restart=True)
+
+    patient = Patient.objects.get(ipp="IPP-IMPORT-0")
+    assert (patient.last_name, patient.version_id) == ("Durand", 2)
+    assert Patient.objects.get(ipp="IPP-IMPORT-1").version_id == 1
@@ -0,0 +1,114 @@
+# apps/patients/tests/test_metrics.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from dwh_fhir import metrics
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, values
+from prometheus_client.parser import text_string_to_metric_families
+
+from apps.patients.cache import RESOURCE_CACHE_ALIAS
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {
+        (item.name, tuple(sorted(item.labels.items()))): item.value
+        for family in text_string_to_metric_families(response.content.decode())
+        for item in family.samples
+    }
+
+
+def test_metrics_endpoint(client, db):
+    response = client.get("/metrics")
+    assert response["Content-Type"] == metrics.CONTENT_TYPE_LATEST
+    assert "no-cache" in response["Cache-Control"]
+    assert client.post("/metrics").status_code == 405
+
+    client.get("/api/patient/")
+    samples = scrape(client)
+    assert samples[("http_requests_total", (("method", "GET"), ("route", "api-patient-list"), ("status", "200")))] >= 1
+    assert any(name == "db_query_duration_seconds_count" for name, _ in samples)
+
+
+def test_requests_are_counted_by_route(client, patient):
+    labels = {"route": "api-patient-detail", "method": "GET"}
+    requests = sample("http_requests_total", status="200", **labels)
+    not_found = sample("http_requests_total", route="api-patient-detail", method="GET", status="404")
+    durations = sample("http_request_duration_seconds_count", **labels)
+    queries = sample("http_request_queries_sum", route="api-patient-detail")
+    observed = sample("db_query_duration_seconds_count", alias="default")
+
+    with CaptureQueriesContext(connection) as captured:
+        client.get(f"/api/patient/{patient.pk}/")
+    client.get("/api/patient/999/")
+
+    assert sample("http_requests_total", status="200", **labels) == requests + 1
+    assert sample("http_requests_total", route="api-patient-detail", method="GET", status="404") == not_found + 1
+    assert sample("http_request_duration_seconds_count", **labels) == durations + 2
+    assert sample("http_request_queries_sum", route="api-patient-detail") >= queries + len(captured)
+    assert sample("db_query_duration_seconds_count", alias="default") >= observed + len(captured)
+
+
+def test_unresolved_urls_and_unknown_methods_have_bounded_labels(client, db):
+    unmatched = sample("http_requests_total", route=metrics.UNMATCHED_ROUTE, method="GET", status="404")
+    other = sample("http_requests_total", route="api-patient-list", method="other", status="405")
+
+    client.get("/no/such/page/")
+    client.generic("PROPFIND", "/api/patient/")
+
+    assert sample("http_requests_total", route=metrics.UNMATCHED_ROUTE, method="GET", status="404") == unmatched + 1
+    assert sample("http_requests_total", route="api-patient-list", method="other", status="405") == other + 1
+
+
+def test_resource_cache_lookups(client, patient):
+    hits = sample("cache_lookups_total", cache=RESOURCE_CACHE_ALIAS, result="hit")
+    misses = sample("cache_lookups_total", cache=RESOURCE_CACHE_ALIAS, result="miss")
+
+    client.get(f"/api/patient/{patient.pk}/")
+    client.get(f"/api/patient/{patient.pk}/")
+
+    assert sample("cache_lookups_total", cache=RESOURCE_CACHE_ALIAS, result="miss") == misses + 1
+    assert sample("cache_lookups_total", cache=RESOURCE_CACHE_ALIAS, result="hit") == hits + 1
+    assert ("cache_hit_ratio", (("cache", RESOURCE_CACHE_ALIAS),)) in scrape(client)
+
+
+def test_cache_hit_ratios():
+    registry = CollectorRegistry()
+    lookups = Counter("cache_lookups", "Lookups.", ["cache", "result"], registry=registry)
+    lookups.labels("resources", "hit").inc(3)
+    lookups.labels("resources", "miss").inc()
+    lookups.labels("counts", "miss").inc(2)
+    lookups.labels("unused", "hit").inc(0)
+
+    gauge = metrics.cache_hit_ratios(registry.collect())
+    assert {item.labels["cache"]: item.value for item in gauge.samples} == {"counts": 0.0, "resources": 0.75}
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Compteurs de deux processus de travail écrivant dans un répertoire multiprocessus."""
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "MULTIPROCESS_DIR", str(tmp_path))
+    counters = []
+    for pid in (1, 2):
+        monkeypatch.setattr(values, "ValueClass", values.MultiProcessValue(lambda pid=pid: pid))
+        counters.append(Counter("cache_lookups", "Lookups.", ["cache", "result"], registry=None))
+    yield counters
+    for cleanup in values._multi_process_cleanups:
+        cleanup()
+
+
+def test_scrape_aggregates_every_worker(client, db, workers):
+    first, second = workers
+    first.labels("resources", "hit").inc(3)
+    second.labels("resources", "miss").inc()
+
+    samples = scrape(client)
+    assert samples[("cache_lookups_total", (("cache", "resources"), ("result", "hit")))] == 3
+    assert samples[("cache_lookups_total", (("cache", "resources"), ("result", "miss")))] == 1
+    assert samples[("cache_hit_ratio", (("cache", "resources"),))] == 0.75
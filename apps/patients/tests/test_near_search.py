@@ -0,0 +1,185 @@
+# apps/patients/tests/test_near_search.py
+import math
+
+import pytest
+
+from apps.patients.geo import (
+    KM_PER_DEGREE,
+    MAX_NEAR_CELLS,
+    bounding_box,
+    covering_ranges,
+    distance_km,
+    geohash,
+    next_prefix,
+    parse_coordinate,
+)
+from apps.patients.models import Patient
+from apps.patients.pagination import DISTANCE_URL
+
+LYON = (45.7640, 4.8357)
+
+
+@pytest.fixture
+def patients(db):
+    places = {
+        "lyon": LYON,
+        "villeurbanne": (45.7719, 4.8902),
+        "vienne": (45.5255, 4.8740),
+        "paris": (48.8566, 2.3522),
+        "inconnu": (None, None),
+    }
+    return {
+        name: Patient.objects.create(
+            ipp=f"IPP-{name}", last_name=name.title(), residence_latitude=latitude, residence_longitude=longitude
+        )
+        for name, (latitude, longitude) in places.items()
+    }
+
+
+def near(client, value, **headers):
+    response = client.get(f"/api/patient/?near={value}", headers=headers)
+    assert response.status_code == 200, response.content
+    return response.json()["entry"]
+
+
+def names(entries):
+    return [
+        Patient.objects.get(pk=entry["resource"]["id"]).last_name
+        for entry in entries
+        if entry["search"]["mode"] == "match"
+    ]
+
+
+@pytest.mark.parametrize(
+    "value, latitude, limit, expected",
+    [
+        ("45.75", 90, None, 45.75),
+        (" 4,85 ", 180, None, 4.85),
+        (-180, 180, None, -180.0),
+        ("", 90, None, None),
+        (None, 90, None, None),
+        ("91", 90, ValueError, None),
+        ("nan", 90, ValueError, None),
+        ("abc", 90, ValueError, None),
+        (True, 90, ValueError, None),
+    ],
+)
+def test_parse_coordinate(value, latitude, limit, expected):
+    if limit is not None:
+        with pytest.raises(limit):
+            parse_coordinate(value, latitude)
+    else:
+        assert parse_coordinate(value, latitude) == expected
+
+
+def test_geohash():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash(*LYON) == geohash(*LYON, precision=9)[:7]
+
+
+def test_next_prefix():
+    assert next_prefix("u4p") == "u4q"
+    assert next_prefix("bz") == "c"
+    assert next_prefix("zz") == ""
+
+
+def test_distance_km():
+    assert distance_km(*LYON, *LYON) == 0
+    assert distance_km(*LYON, 48.8566, 2.3522) == pytest.approx(392, abs=2)
+
+
+def test_bounding_box_around_a_pole_spans_every_longitude():
+    south, north, west, east = bounding_box(89.9, 0, 50)
+    assert (north, west, east) == (90.0, -180.0, 180.0)
+    assert south == pytest.approx(89.9 - 50 / KM_PER_DEGREE)
+
+
+@pytest.mark.parametrize("distance", [0.1, 1, 10, 100, 1000])
+def test_covering_ranges_contain_the_whole_disc(distance):
+    ranges = covering_ranges(bounding_box(*LYON, distance))
+    assert 1 <= len(ranges) <= MAX_NEAR_CELLS
+    for bearing in range(0, 360, 15):
+        # Points juste à l'intérieur du cercle
+        latitude = LYON[0] + 0.99 * distance / KM_PER_DEGREE * math.cos(math.radians(bearing))
+        longitude = LYON[1] + 0.99 * distance / (KM_PER_DEGREE * math.cos(math.radians(latitude))) * math.sin(
+            math.radians(bearing)
+        )
+        cell = geohash(latitude, longitude)
+        assert any(start <= cell and (not end or cell < end) for start, end in ranges)
+
+
+def test_residence_cell_is_kept_up_to_date(patients):
+    patient = patients["lyon"]
+    assert patient.residence_geohash == geohash(*LYON)
+
+    patient.residence_latitude = None
+    patient.save(update_fields=["residence_latitude"])
+    assert Patient.objects.get(pk=patient.pk).residence_geohash is None
+
+
+def test_near_ranks_by_distance(client, patients):
+    entries = near(client, f"{LYON[0]}|{LYON[1]}|30|km")
+    assert names(entries) == ["Lyon", "Villeurbanne", "Vienne"]
+    distances = [entry["search"]["extension"][0]["valueDistance"]["value"] for entry in entries]
+    assert distances[0] == 0 and distances == sorted(distances)
+    assert distances[2] == pytest.approx(26.8, abs=0.5)
+    assert entries[0]["search"]["extension"][0]["url"] == DISTANCE_URL
+    assert entries[0]["search"]["extension"][0]["valueDistance"]["code"] == "km"
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (f"{LYON[0]}|{LYON[1]}", ["Lyon", "Villeurbanne"]),
+        (f"{LYON[0]}|{LYON[1]}|5", ["Lyon", "Villeurbanne"]),
+        (f"{LYON[0]}|{LYON[1]}|3000|m", ["Lyon"]),
+        (f"{LYON[0]}|{LYON[1]}|20|%5Bmi_i%5D", ["Lyon", "Villeurbanne", "Vienne"]),
+        ("48.85|2.35|1|km", ["Paris"]),
+        ("0|0|10|km", []),
+    ],
+)
+def test_near_radius_and_units(client, patients, value, expected):
+    assert names(near(client, value)) == expected
+
+
+def test_near_uses_count_as_limit(client, patients):
+    response = client.get(f"/api/patient/?near={LYON[0]}|{LYON[1]}|30|km&_count=2")
+    bundle = response.json()
+    assert names(bundle["entry"]) == ["Lyon", "Villeurbanne"]
+    assert [link["relation"] for link in bundle["link"]] == ["self"]
+
+
+def test_near_combined_with_another_parameter(client, patients):
+    assert names(near(client, f"{LYON[0]}|{LYON[1]}|30|km&family=vienne")) == ["Vienne"]
+
+
+def test_wide_near_search_is_not_indexed(client, patients):
+    entries = near(client, f"{LYON[0]}|{LYON[1]}|500|km")
+    assert names(entries) == ["Lyon", "Villeurbanne", "Vienne", "Paris"]
+    assert entries[-1]["search"] == {"mode": "outcome"}
+
+    response = client.get(f"/api/patient/?near={LYON[0]}|{LYON[1]}|500|km", headers={"Prefer": "handling=strict"})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "near=45.76",
+        "near=abc|4.83",
+        "near=95|4.83",
+        "near=|4.83|10|km",
+        "near=45.76|4.83|0|km",
+        "near=45.76|4.83|-1|km",
+        "near=45.76|4.83|ten|km",
+        "near=45.76|4.83|10|ft",
+        "near=45.76|4.83|10|km|extra",
+        "near=45.76|4.83,48.85|2.35",
+        "near=45.76|4.83&near=48.85|2.35",
+        "near:exact=45.76|4.83",
+    ],
+)
+def test_invalid_near(client, patients, query):
+    response = client.get(f"/api/patient/?{query}")
+    assert response.status_code == 400
+    assert "near" in response.json()["error"]
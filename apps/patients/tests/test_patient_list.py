@@ -0,0 +1,60 @@
+# apps/patients/tests/test_patient_list.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.patients.models import Patient
+
+
+@pytest.fixture
+def patients(db):
+    return [Patient.objects.create(ipp=f"IPP-LIST-{index}", last_name="Martin") for index in range(5)]
+
+
+def links(bundle):
+    return {link["relation"]: link["url"] for link in bundle["link"]}
+
+
+def ids(bundle):
+    return [entry["resource"]["id"] for entry in bundle["entry"]]
+
+
+def test_patient_list_is_a_searchset_bundle(client, patients):
+    bundle = client.get("/api/patient/").json()
+
+    assert (bundle["resourceType"], bundle["type"]) == ("Bundle", "searchset")
+    assert ids(bundle) == [str(patient.pk) for patient in patients]
+    entry = bundle["entry"][0]
+    assert entry["fullUrl"] == f"http://testserver/api/patient/{patients[0].pk}/"
+    assert entry["search"] == {"mode": "match"}
+    assert links(bundle) == {"self": "http://testserver/api/patient/"}
+
+
+def test_cursor_links_walk_through_every_patient_without_offset(client, patients):
+    seen = []
+    url = "/api/patient/?_count=2"
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            bundle = client.get(url).json()
+        assert not any("OFFSET" in query["sql"] for query in queries.captured_queries)
+        seen.extend(ids(bundle))
+        url = links(bundle).get("next")
+
+    assert seen == [str(patient.pk) for patient in patients]
+
+
+def test_previous_link_returns_the_previous_page(client, patients):
+    first = client.get("/api/patient/?_count=2").json()
+    second = client.get(links(first)["next"]).json()
+
+    assert "previous" not in links(first)
+    assert ids(client.get(links(second)["previous"]).json()) == ids(first)
+
+
+def test_page_size_is_bounded(client, patients):
+    assert len(client.get("/api/patient/?_count=1").json()["entry"]) == 1
+    assert len(client.get("/api/patient/?_count=5000").json()["entry"]) == 5
+
+
+def test_invalid_cursor_is_refused(client, patients):
+    assert client.get("/api/patient/?_cursor=invalid").status_code == 404
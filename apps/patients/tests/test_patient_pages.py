@@ -0,0 +1,102 @@
+# apps/patients/tests/test_patient_pages.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.patients.models import Patient
+from apps.patients.pagination import PATIENT_LIST_SORTS, KeysetPaginator
+from apps.patients.web_views import PATIENT_ROW_COLUMNS
+
+# Noms répétés et absents : le tri départage par `id` et place les NULL comme la base
+NAMES = ["Martin", "Dupont", None, "Bernard", "Dupont", "Petit", None, "Robert", "Martin", "Durand", "Leroy"]
+
+
+@pytest.fixture
+def patients(db):
+    return [
+        Patient.objects.create(ipp=f"IPP-{index}", last_name=name, first_name=f"Prénom{index % 4}")
+        for index, name in enumerate(NAMES * 3)
+    ]
+
+
+def expected_ids(sort):
+    field = sort.lstrip("-")
+    rows = sorted(
+        Patient.objects.values_list("id", field),
+        # SQLite place les NULL avant toute valeur en ordre croissant
+        key=lambda row: (row[1] is not None, row[1] or "", row[0]) if field != "id" else row[0],
+    )
+    ids = [pk for pk, _ in rows]
+    return ids[::-1] if sort.startswith("-") else ids
+
+
+def walk(paginator, direction):
+    # Parcours complet, de la première page vers la dernière ou l'inverse
+    if direction == "after":
+        page = paginator.get_page()
+        ids = [row.id for row in page.rows]
+        while page.next_cursor:
+            page = paginator.get_page(after=page.next_cursor)
+            ids += [row.id for row in page.rows]
+        return ids
+    page = paginator.get_page(last=True)
+    ids = [row.id for row in page.rows]
+    while page.previous_cursor:
+        page = paginator.get_page(before=page.previous_cursor)
+        ids = [row.id for row in page.rows] + ids
+    return ids
+
+
+@pytest.mark.parametrize("sort", PATIENT_LIST_SORTS)
+@pytest.mark.parametrize("direction", ["after", "before"])
+def test_keyset_walk_visits_every_row_once(patients, sort, direction):
+    paginator = KeysetPaginator(Patient.objects.values_list(*PATIENT_ROW_COLUMNS, named=True), sort, per_page=4)
+    assert walk(paginator, direction) == expected_ids(sort)
+
+
+def test_first_and_last_pages(patients):
+    paginator = KeysetPaginator(Patient.objects.values_list(*PATIENT_ROW_COLUMNS, named=True), "id", per_page=4)
+    first = paginator.get_page()
+    assert first.previous_cursor is None and first.next_cursor
+    last = paginator.get_page(last=True)
+    assert [row.id for row in last.rows] == expected_ids("id")[-4:]
+    assert last.next_cursor is None and last.previous_cursor
+
+
+def test_empty_table(db):
+    page = KeysetPaginator(Patient.objects.values_list(*PATIENT_ROW_COLUMNS, named=True)).get_page()
+    assert page == ([], None, None)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "WzEsMl0=", "eyJhIjogMX0="])
+def test_invalid_cursor_reads_the_first_page(patients, cursor):
+    paginator = KeysetPaginator(Patient.objects.values_list(*PATIENT_ROW_COLUMNS, named=True), "id", per_page=4)
+    assert paginator.get_page(after=cursor) == paginator.get_page()
+
+
+def test_list_page(client, patients):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/patient/?sort=-last_name")
+    assert response.status_code == 200
+    assert [row.id for row in response.context["patients"]] == expected_ids("-last_name")[:15]
+    assert response.context["sort"] == "-last_name"
+    # Ni OFFSET ni COUNT : le nombre de patients affiché est une estimation
+    assert not [query for query in queries if "OFFSET" in query["sql"] or "COUNT(" in query["sql"]]
+    # Seules les colonnes affichées sont lues
+    select = [query["sql"] for query in queries if 'FROM "dwh_patient"' in query["sql"]]
+    assert select and all('"residence_city"' not in sql for sql in select)
+
+    page = response.context["page"]
+    assert f"?sort=-last_name&amp;after={page.next_cursor}".encode() in response.content
+    response = client.get(f"/patient/?sort=-last_name&after={page.next_cursor}")
+    assert [row.id for row in response.context["patients"]] == expected_ids("-last_name")[15:30]
+
+    response = client.get("/patient/?sort=-last_name&last")
+    assert [row.id for row in response.context["patients"]] == expected_ids("-last_name")[-15:]
+    assert response.context["page"].next_cursor is None
+
+
+def test_list_page_ignores_an_unknown_sort(client, patients):
+    response = client.get("/patient/?sort=phone_number")
+    assert response.context["sort"] == "id"
+    assert [row.id for row in response.context["patients"]] == expected_ids("id")[:15]
@@ -0,0 +1,128 @@
+# apps/patients/tests/test_phonetic_search.py
+import pytest
+from django.core.management import call_command
+
+from apps.patients.models import Patient, PatientNameToken
+from apps.patients.phonetic import french_soundex, name_tokens, normalize_name
+
+
+@pytest.fixture
+def patients(db):
+    return {
+        "dupont": Patient.objects.create(ipp="IPP-1", last_name="Dupont", first_name="Jean-Pierre"),
+        "dupond": Patient.objects.create(ipp="IPP-2", last_name="Dupond", first_name="Hélène"),
+        "dûpont": Patient.objects.create(ipp="IPP-3", last_name="Dûpont-Léger", first_name="Éric"),
+        "martin": Patient.objects.create(ipp="IPP-4", last_name="Martin", first_name="Philippe", maiden_name="Durand"),
+    }
+
+
+def matches(client, query):
+    response = client.get(f"/api/patient/?{query}")
+    assert response.status_code == 200, response.content
+    return [
+        (Patient.objects.get(pk=entry["resource"]["id"]).ipp, entry["search"].get("score"))
+        for entry in response.json()["entry"]
+        if entry["search"]["mode"] == "match"
+    ]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, ""),
+        ("Dûpont-Léger", "dupont leger"),
+        ("d'Ormesson", "d ormesson"),
+        ("ŒUVRE", "oeuvre"),
+        ("  Lætitia  ", "laetitia"),
+    ],
+)
+def test_normalize_name(value, expected):
+    assert normalize_name(value) == expected
+
+
+@pytest.mark.parametrize(
+    "first, second", [("Dupont", "Dupond"), ("Durand", "Durant"), ("Philippe", "Filip"), ("Martin", "Marten")]
+)
+def test_french_soundex_groups_homophones(first, second):
+    assert french_soundex(first) == french_soundex(second)
+
+
+def test_french_soundex_without_letters():
+    assert french_soundex("123") == ""
+    assert french_soundex("Dupont") != french_soundex("Martin")
+
+
+def test_name_tokens_are_written_on_save(patients):
+    patient = patients["dûpont"]
+    tokens = sorted(patient.name_tokens.values_list("kind", "normalized", "phonetic"))
+    assert tokens == sorted([("family", "dupont", "DPN"), ("family", "leger", "LGR"), ("given", "eric", "ERC")])
+
+    patient.last_name = "Martin"
+    patient.save(update_fields=["last_name"])
+    assert sorted(patient.name_tokens.filter(kind="family").values_list("normalized", flat=True)) == ["martin"]
+
+    # Une écriture ne touchant pas au nom conserve les clés existantes
+    ids = set(patient.name_tokens.values_list("id", flat=True))
+    patient.sex = "M"
+    patient.save(update_fields=["sex"])
+    assert set(patient.name_tokens.values_list("id", flat=True)) == ids
+
+
+@pytest.mark.parametrize(
+    "query, ipps",
+    [
+        ("family=dupont", ["IPP-1", "IPP-3"]),
+        ("family=DÛPONT", ["IPP-1", "IPP-3"]),
+        ("family=leger", ["IPP-3"]),
+        ("given=helene", ["IPP-2"]),
+        ("given=ERIC", ["IPP-3"]),
+        ("name=durand", ["IPP-4"]),
+    ],
+)
+def test_string_search_ignores_accents_and_case(client, patients, query, ipps):
+    assert sorted(ipp for ipp, _ in matches(client, query)) == ipps
+
+
+def test_phonetic_search_ranks_by_score(client, patients):
+    results = matches(client, "family:phonetic=dupont")
+    assert [ipp for ipp, _ in results] == ["IPP-1", "IPP-3", "IPP-2"]
+    scores = [score for _, score in results]
+    assert scores[0] == scores[1] == 1.0
+    assert 0.5 < scores[2] < 1.0
+
+
+def test_phonetic_parameter_searches_all_name_parts(client, patients):
+    assert [ipp for ipp, _ in matches(client, "phonetic=durant")] == ["IPP-4"]
+    assert [ipp for ipp, _ in matches(client, "phonetic=filip")] == ["IPP-4"]
+    assert matches(client, "phonetic=zzz") == []
+
+
+def test_phonetic_search_combined_with_another_parameter(client, patients):
+    assert [ipp for ipp, _ in matches(client, "family:phonetic=dupon&given=jean")] == ["IPP-1"]
+
+
+def test_phonetic_search_uses_count_as_limit(client, patients):
+    response = client.get("/api/patient/?family:phonetic=dupont&_count=1")
+    bundle = response.json()
+    assert [Patient.objects.get(pk=entry["resource"]["id"]).ipp for entry in bundle["entry"]] == ["IPP-1"]
+    assert [link["relation"] for link in bundle["link"]] == ["self"]
+
+
+def test_phonetic_search_rejects_modifiers_and_near(client, patients):
+    assert client.get("/api/patient/?phonetic:exact=dupont").status_code == 400
+    assert client.get("/api/patient/?phonetic=dupont&near=45.75|4.85|10|km").status_code == 400
+
+
+def test_backfill_name_keys(patients, capsys):
+    PatientNameToken.objects.all().delete()
+    Patient.objects.filter(pk=patients["martin"].pk).update(last_name="Lefèvre")
+
+    call_command("backfill_name_keys", "--batch-size", "2")
+
+    assert "4 patients" in capsys.readouterr().out
+    assert PatientNameToken.objects.count() == sum(
+        len(name_tokens(getattr(patient, field)))
+        for patient in Patient.objects.all()
+        for field in ("last_name", "first_name", "maiden_name")
+    )
+    assert PatientNameToken.objects.filter(patient=patients["martin"], kind="family").get().normalized == "lefevre"
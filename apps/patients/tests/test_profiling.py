@@ -0,0 +1,65 @@
+# apps/patients/tests/test_profiling.py
+import threading
+import time
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory
+from dwh_fhir.profiling import ProfilerMiddleware, SamplingProfiler
+from dwh_fhir.utils import countsenv
+
+
+def test_profiler_routes_are_parsed(monkeypatch):
+    monkeypatch.setenv("DJANGO_PROFILER_ROUTES", "api-patient-list=1000,api-patient-detail=1")
+
+    assert countsenv("DJANGO_PROFILER_ROUTES") == {"api-patient-list": 1000, "api-patient-detail": 1}
+
+
+@pytest.mark.parametrize("value", ["api-patient-list", "api-patient-list=0", "api-patient-list=-2", "=3", "x=abc"])
+def test_invalid_profiler_routes_are_refused(monkeypatch, value):
+    monkeypatch.setenv("DJANGO_PROFILER_ROUTES", value)
+
+    with pytest.raises(ImproperlyConfigured):
+        countsenv("DJANGO_PROFILER_ROUTES")
+
+
+def profile_busy_loop(thread):
+    # Un autre thread (une autre requête du worker) attend pendant le profilage
+    release = threading.Event()
+    other = threading.Thread(target=release.wait, name="other-request")
+    other.start()
+    stopped = threading.Event()
+    profiler = SamplingProfiler(0.001, lambda profiler: stopped.set(), thread)
+    profiler.start()
+    deadline = time.monotonic() + 0.05
+    while time.monotonic() < deadline:
+        pass
+    profiler.stop()
+    stopped.wait()
+    release.set()
+    other.join()
+    assert profiler.samples > 0
+    return {stack.split(";")[0] for stack in profiler.stacks}
+
+
+def test_profiler_samples_only_the_profiled_thread():
+    assert profile_busy_loop(threading.get_ident()) == {threading.current_thread().name}
+
+
+def test_profiler_samples_every_thread_by_default():
+    assert {threading.current_thread().name, "other-request"} <= profile_busy_loop(None)
+
+
+def test_wsgi_request_profile_is_restricted_to_the_request_thread(settings, tmp_path):
+    settings.PROFILER_DIR = str(tmp_path)
+    middleware = ProfilerMiddleware(lambda request: HttpResponse())
+    request = RequestFactory().get("/api/patient/")
+    request.resolver_match = None
+
+    middleware.start(request, "test")
+    profiler = request._profile[0]
+    middleware.finish(request, HttpResponse())
+    profiler.join()
+
+    assert profiler.thread == threading.get_ident()
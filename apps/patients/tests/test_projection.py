@@ -0,0 +1,105 @@
+# apps/patients/tests/test_projection.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.patients.fast_serializer import SUBSETTED_TAG
+from apps.patients.models import Patient
+from apps.patients.projection import SUMMARY_ELEMENTS
+
+MANDATORY = {"resourceType", "id", "meta"}
+
+
+@pytest.fixture
+def born(patient):
+    """Patient dont le lieu de naissance est renseigné (extension hors résumé)."""
+    Patient.objects.filter(pk=patient.pk).update(birth_city="Lyon", phone_number="0102030405")
+    return Patient.objects.get(pk=patient.pk)
+
+
+def read(client, patient, query):
+    response = client.get(f"/api/patient/{patient.pk}/?{query}")
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def search(client, query):
+    response = client.get(f"/api/patient/?{query}")
+    assert response.status_code == 200, response.content
+    return response.json()["entry"]
+
+
+def test_elements_on_read(client, born):
+    # Lecture hors cache (colonnes utiles seulement), puis réduction de la ressource mise en cache
+    uncached = read(client, born, "_elements=name,gender")
+    read(client, born, "")
+    resource = read(client, born, "_elements=name,gender")
+    assert resource == uncached
+    assert set(resource) == MANDATORY | {"name", "gender"}
+    assert resource["meta"]["tag"] == [SUBSETTED_TAG]
+    assert resource["meta"]["versionId"] == "1"
+    assert resource["name"][0]["family"] == "Dupont"
+
+
+def test_elements_on_uncached_read(client, born):
+    with CaptureQueriesContext(connection) as queries:
+        resource = read(client, born, "_elements=gender")
+    assert set(resource) == MANDATORY | {"gender"}
+    select = [query["sql"] for query in queries if '"sex"' in query["sql"]]
+    assert select and all('"last_name"' not in sql and '"birth_city"' not in sql for sql in select)
+
+
+def test_elements_on_search_only_loads_the_needed_columns(client, born):
+    with CaptureQueriesContext(connection) as queries:
+        entries = search(client, "family=dupont&_elements=birthDate,deceased")
+    assert [set(entry["resource"]) for entry in entries] == [MANDATORY | {"birthDate"}]
+    assert entries[0]["resource"]["meta"]["tag"] == [SUBSETTED_TAG]
+    select = [query["sql"] for query in queries if '"birth_date"' in query["sql"] and "SELECT" in query["sql"]]
+    assert select and all('"phone_number"' not in sql for sql in select)
+
+
+def test_mandatory_elements_are_always_returned(client, born):
+    assert set(read(client, born, "_elements=id,meta")) == MANDATORY
+
+
+def test_unknown_element(client, born):
+    entries = search(client, "family=dupont&_elements=name,colour")
+    assert set(entries[0]["resource"]) == MANDATORY | {"name"}
+    assert entries[-1]["search"] == {"mode": "outcome"}
+    assert "colour" in entries[-1]["resource"]["issue"][0]["diagnostics"]
+
+    response = client.get("/api/patient/?family=dupont&_elements=colour", headers={"Prefer": "handling=strict"})
+    assert response.status_code == 400
+
+
+def test_summary_true(client, born):
+    full = read(client, born, "")
+    assert "extension" in full
+    resource = read(client, born, "_summary=true")
+    assert set(resource) - MANDATORY == set(full) & SUMMARY_ELEMENTS
+    assert resource["meta"]["tag"] == [SUBSETTED_TAG]
+
+
+@pytest.mark.parametrize("summary", ["data", "false"])
+def test_summary_data_returns_the_full_resource(client, born, summary):
+    assert read(client, born, f"_summary={summary}") == read(client, born, "")
+    assert search(client, f"family=dupont&_summary={summary}")[0]["resource"] == read(client, born, "")
+
+
+def test_summary_text(client, born):
+    assert set(read(client, born, "_summary=text")) == MANDATORY
+
+
+def test_summary_count(client, born):
+    bundle = client.get("/api/patient/?family=dupont&_summary=count").json()
+    assert bundle["total"] == 1
+    assert "entry" not in bundle
+
+    response = client.get(f"/api/patient/{born.pk}/?_summary=count")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("query", ["_summary=all", "_summary=true&_elements=name"])
+def test_invalid_projection(client, born, query):
+    assert client.get(f"/api/patient/?{query}").status_code == 400
+    assert client.get(f"/api/patient/{born.pk}/?{query}").status_code == 400
@@ -0,0 +1,36 @@
+# apps/patients/tests/test_query_budget.py
+import pytest
+from dwh_fhir.queryaudit import query_budget
+
+from apps.patients.models import Patient
+
+
+@pytest.mark.django_db
+def test_patient_list_runs_a_constant_number_of_queries(client):
+    for index in range(30):
+        Patient.objects.create(ipp=f"IPP-BUDGET-{index}", last_name="Martin")
+
+    # Dates de dernière écriture (patients, historique) et page : aucune requête par patient
+    with query_budget("api-patient-list", queries=3):
+        responses = [client.get("/api/patient/?_count=25"), client.get("/api/patient/?family=martin&_count=25")]
+    assert [len(response.json()["entry"]) for response in responses] == [25, 25]
+
+
+def test_patient_read_is_served_from_cache_after_the_version_check(client, patient):
+    with query_budget("api-patient-detail", queries=2):
+        client.get(f"/api/patient/{patient.pk}/")
+    # Ressource en cache : seule la version courante est lue
+    with query_budget("api-patient-detail", queries=1):
+        client.get(f"/api/patient/{patient.pk}/")
+
+
+def test_query_budget_fails_when_exceeded(client, patient):
+    with pytest.raises(AssertionError, match="Budget exceeded for api-patient-detail"):
+        with query_budget("api-patient-detail", queries=0):
+            client.get(f"/api/patient/{patient.pk}/")
+
+
+def test_query_budget_fails_when_no_request_is_checked(client, patient):
+    with pytest.raises(AssertionError, match="No request to api-patient-detail"):
+        with query_budget("api-patient-detail", queries=2):
+            client.get("/api/patient/")
@@ -0,0 +1,192 @@
+# apps/patients/tests/test_routers.py
+import pytest
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from dwh_fhir import routers
+from dwh_fhir.routers import PIN_COOKIE, PrimaryReplicaRouter, ReadYourWritesMiddleware, ReplicaHealth, RoutingState
+
+from apps.patients.models import Patient
+
+
+@pytest.fixture
+def router(settings):
+    """Routeur configuré avec deux réplicas, tous deux en bonne santé."""
+    settings.DATABASE_REPLICAS = ["replica1", "replica2"]
+    router = PrimaryReplicaRouter()
+    router.health.is_healthy = lambda alias: alias in router.healthy
+    router.healthy = {"replica1", "replica2"}
+    return router
+
+
+@pytest.fixture
+def state():
+    """État de routage d'une requête HTTP en cours."""
+    state = RoutingState()
+    token = routers.routing_state.set(state)
+    yield state
+    routers.routing_state.reset(token)
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        if self.connection.error:
+            raise self.connection.error
+        self.connection.queries.append(sql)
+
+    def fetchone(self):
+        return (self.connection.lag,)
+
+
+class FakeConnection:
+    # Connexion de réplica simulée : aucune base n'est configurée sous ces alias dans les tests
+    def __init__(self, vendor="sqlite", lag=None, error=None):
+        self.vendor = vendor
+        self.lag = lag
+        self.error = error
+        self.queries = []
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+def test_reads_stay_on_the_primary_outside_requests(router):
+    assert router.db_for_read(Patient) == "default"
+    assert router.db_for_write(Patient) == "default"
+
+
+def test_reads_go_to_a_healthy_replica(router, state):
+    assert {router.db_for_read(Patient) for _ in range(50)} == {"replica1", "replica2"}
+
+    router.healthy = {"replica2"}
+    assert {router.db_for_read(Patient) for _ in range(10)} == {"replica2"}
+    router.healthy = set()
+    assert router.db_for_read(Patient) == "default"
+
+
+def test_write_pins_the_rest_of_the_request(router, state):
+    assert router.db_for_write(Patient) == "default"
+    assert state.pinned and state.wrote
+    assert router.db_for_read(Patient) == "default"
+
+
+def test_reads_in_a_transaction_stay_on_the_primary(router, state, db):
+    # Les tests `db` s'exécutent déjà dans un bloc atomique
+    assert connections["default"].in_atomic_block
+    assert router.db_for_read(Patient) == "default"
+
+
+def test_without_replicas_everything_goes_to_the_primary(settings, state):
+    settings.DATABASE_REPLICAS = []
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Patient) == "default"
+
+
+def test_migrations_skip_replicas(router):
+    assert router.allow_migrate("replica1", "patients") is False
+    assert router.allow_migrate("default", "patients") is None
+    assert router.allow_relation(Patient(), Patient())
+
+
+def test_health_probe(monkeypatch):
+    replicas = {
+        "up": FakeConnection(),
+        "down": FakeConnection(error=OperationalError("unable to open database file")),
+        "standby": FakeConnection(vendor="postgresql", lag=0),
+        "late": FakeConnection(vendor="postgresql", lag=30),
+    }
+    monkeypatch.setattr(routers, "connections", replicas)
+    health = ReplicaHealth(interval=5, max_lag=5)
+
+    assert health.probe("up")
+    assert not health.probe("down")
+    assert replicas["down"].closed
+    assert health.probe("standby")
+    assert replicas["standby"].queries[-1] == routers.POSTGRESQL_LAG_QUERY
+    assert not health.probe("late")
+
+
+def test_health_status_is_cached_for_the_interval(monkeypatch):
+    now = [100.0]
+    probes = []
+    monkeypatch.setattr(routers.time, "monotonic", lambda: now[0])
+    health = ReplicaHealth(interval=5, max_lag=5)
+    health.probe = lambda alias: probes.append(alias) or len(probes) > 1
+
+    assert not health.is_healthy("replica1")
+    now[0] += 4
+    assert not health.is_healthy("replica1")
+    assert probes == ["replica1"]
+    now[0] += 1
+    assert health.is_healthy("replica1")
+    assert probes == ["replica1", "replica1"]
+
+
+def test_health_probe_of_the_primary(db):
+    assert ReplicaHealth(interval=5, max_lag=5).probe("default")
+
+
+def test_middleware_pins_clients_after_a_write(router, settings):
+    settings.DATABASE_READ_YOUR_WRITES_SECONDS = 7
+    reads = []
+
+    def view(request):
+        if request.method == "POST":
+            router.db_for_write(Patient)
+        reads.append(router.db_for_read(Patient))
+        return HttpResponse()
+
+    middleware = ReadYourWritesMiddleware(view)
+    factory = RequestFactory()
+
+    response = middleware(factory.get("/api/patient/"))
+    assert reads.pop() != "default"
+    assert PIN_COOKIE not in response.cookies
+
+    response = middleware(factory.post("/api/patient/"))
+    assert reads.pop() == "default"
+    assert response.cookies[PIN_COOKIE]["max-age"] == 7
+
+    request = factory.get("/api/patient/")
+    request.COOKIES[PIN_COOKIE] = "1"
+    response = middleware(request)
+    assert reads.pop() == "default"
+    assert PIN_COOKIE not in response.cookies
+
+    # Une requête non sûre lit la base primaire, même sans écrire
+    middleware(factory.delete("/api/patient/1/"))
+    assert reads.pop() == "default"
+
+
+async def test_async_middleware(router):
+    async def view(request):
+        router.db_for_write(Patient)
+        return HttpResponse()
+
+    middleware = ReadYourWritesMiddleware(view)
+    response = await middleware(RequestFactory().post("/api/patient/"))
+    assert PIN_COOKIE in response.cookies
+
+
+def test_routing_state_is_cleared_when_the_request_finishes(client, patient):
+    client.get(f"/api/patient/{patient.pk}/")
+    assert routers.routing_state.get() is None
+
+
+def test_client_writes_set_the_pin_cookie(client, db):
+    response = client.post("/patient/create/", {"identifier.0.value": "IPP-PIN", "name.0.family": "Martin"})
+    assert response.status_code == 302
+    assert PIN_COOKIE in response.cookies
@@ -0,0 +1,102 @@
+# apps/patients/tests/test_search.py
+import re
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+
+from apps.patients.fast_serializer import IPP_SYSTEM
+from apps.patients.models import Patient
+from apps.patients.search import PatientSearch
+
+
+@pytest.fixture
+def patients(db):
+    return {
+        "dupont": Patient.objects.create(
+            ipp="IPP-1", last_name="Dupont", first_name="Jean-Pierre", sex="M", residence_city="Lyon"
+        ),
+        "durand": Patient.objects.create(
+            ipp="IPP-2", last_name="Durand", first_name="Marie", maiden_name="Dupuis", sex="F", residence_city="Paris"
+        ),
+        "martin": Patient.objects.create(ipp="IPP-3", last_name="Martin", first_name="Paul", residence_city="Lyon"),
+    }
+
+
+def search(client, query, **headers):
+    response = client.get(f"/api/patient/?{query}", headers=headers)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def found(client, query):
+    # IPP des patients trouvés, sans l'OperationOutcome des avertissements
+    pks = [entry["resource"]["id"] for entry in search(client, query)["entry"] if entry["search"]["mode"] == "match"]
+    return sorted(Patient.objects.filter(pk__in=pks).values_list("ipp", flat=True))
+
+
+@pytest.mark.parametrize(
+    "query, ipps",
+    [
+        ("family=du", ["IPP-1", "IPP-2"]),
+        ("family=DUP", ["IPP-1"]),
+        ("family:exact=Dupont", ["IPP-1"]),
+        ("family:exact=dupont", []),
+        ("given=pierre", ["IPP-1"]),
+        ("given=jean pi", ["IPP-1"]),
+        ("name=dupuis", ["IPP-2"]),
+        ("name:exact=Dupuis", ["IPP-2"]),
+        ("family=dupont,martin", ["IPP-1", "IPP-3"]),
+        ("family=du&given=marie", ["IPP-2"]),
+        ("identifier=IPP-2", ["IPP-2"]),
+        (f"identifier={IPP_SYSTEM}|IPP-2", ["IPP-2"]),
+        ("identifier=|IPP-2,IPP-3", ["IPP-2", "IPP-3"]),
+        ("identifier=http://other|IPP-2", []),
+        ("family=du&gender=female", ["IPP-2"]),
+        ("family=martin&gender=unknown", ["IPP-3"]),
+        ("family=du&address-city=ly", ["IPP-1"]),
+        ("family=du&address-city:exact=Lyon", ["IPP-1"]),
+    ],
+)
+def test_search_parameters(client, patients, query, ipps):
+    assert found(client, query) == ipps
+
+
+def test_contains_is_not_indexed_and_is_reported(client, patients):
+    bundle = search(client, "family:contains=ran")
+
+    assert [entry["resource"]["id"] for entry in bundle["entry"][:-1]] == [str(patients["durand"].pk)]
+    outcome = bundle["entry"][-1]
+    assert outcome["search"] == {"mode": "outcome"}
+    assert outcome["resource"]["issue"][0]["diagnostics"] == (
+        "Search uses no indexed parameter and requires a full table scan"
+    )
+
+
+def test_unknown_parameter_is_reported(client, patients):
+    bundle = search(client, "family=du&colour=blue")
+
+    assert bundle["entry"][-1]["resource"]["issue"][0]["diagnostics"] == "Unknown search parameter 'colour'"
+
+
+@pytest.mark.parametrize("query", ["address-city=lyon", "family=du&colour=blue"])
+def test_strict_handling_refuses_unindexed_and_unknown_searches(client, patients, query):
+    assert client.get(f"/api/patient/?{query}", headers={"Prefer": "handling=strict"}).status_code == 400
+
+
+@pytest.mark.parametrize(
+    "query", ["family:phonetik=du", "identifier:exact=IPP-1", "identifier=http://other|", "gender=femme"]
+)
+def test_invalid_searches_are_refused(client, patients, query):
+    assert client.get(f"/api/patient/?{query}").status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query", ["family=dup", "given=jean pi", "name=dup,mar", "family:exact=Dupont", "identifier=1"]
+)
+def test_name_and_identifier_searches_are_read_by_index(query):
+    plan = PatientSearch(QueryDict(query)).plan().queryset.order_by("id")[:21].explain()
+    table = re.escape(Patient._meta.db_table)
+    full_scan = rf"Seq Scan on {table}\b" if connection.vendor == "postgresql" else rf"\bSCAN {table}\b"
+    assert not re.search(full_scan, plan)
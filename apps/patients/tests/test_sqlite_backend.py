@@ -0,0 +1,119 @@
+# apps/patients/tests/test_sqlite_backend.py
+import importlib
+import sqlite3
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.utils import ConnectionHandler
+from dwh_fhir.settings import databases
+
+ALIAS = "sqlite_backend_test"
+
+
+@pytest.fixture
+def wrapper(tmp_path, django_db_blocker):
+    """Fabrique de connexions au backend SQLite de production, sur une base temporaire."""
+    opened = []
+
+    def connect(**options):
+        database = {"ENGINE": "dwh_fhir.backends.sqlite3", "NAME": str(tmp_path / "db.sqlite3"), "OPTIONS": options}
+        connection = ConnectionHandler({"default": database, ALIAS: database})[ALIAS]
+        connections[ALIAS] = connection
+        opened.append(connection)
+        return connection
+
+    with django_db_blocker.unblock():
+        yield connect
+        for connection in opened:
+            connection.close()
+    if opened:
+        del connections[ALIAS]
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def write_lock_is_free(path):
+    # Connexion concurrente sans attente : échoue si une autre transaction détient le verrou d'écriture
+    other = sqlite3.connect(path, timeout=0, isolation_level=None)
+    try:
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+        return True
+    except sqlite3.OperationalError as exc:
+        assert "locked" in str(exc)
+        return False
+    finally:
+        other.close()
+
+
+def test_init_command_runs_on_every_connection(wrapper):
+    connection = wrapper(init_command="PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;PRAGMA busy_timeout=1234")
+    assert "init_command" not in connection.get_connection_params()
+
+    for _ in range(2):
+        assert pragma(connection, "journal_mode") == "wal"
+        assert pragma(connection, "synchronous") == 1
+        assert pragma(connection, "busy_timeout") == 1234
+        connection.close()
+
+
+def test_immediate_transactions_take_the_write_lock_up_front(wrapper):
+    connection = wrapper(transaction_mode="immediate")
+    assert "transaction_mode" not in connection.get_connection_params()
+    connection.ensure_connection()
+    path = connection.settings_dict["NAME"]
+
+    with transaction.atomic(using=ALIAS):
+        assert not write_lock_is_free(path)
+    assert write_lock_is_free(path)
+
+
+def test_deferred_transactions_by_default(wrapper):
+    connection = wrapper()
+    connection.ensure_connection()
+
+    with transaction.atomic(using=ALIAS):
+        connection.cursor().execute("SELECT 1")
+        assert write_lock_is_free(connection.settings_dict["NAME"])
+
+
+def test_invalid_transaction_mode(wrapper):
+    with pytest.raises(ImproperlyConfigured):
+        wrapper(transaction_mode="EXCLUSIVELY")
+
+
+@pytest.fixture
+def reload_databases(monkeypatch):
+    """Relit le module de configuration des bases avec les variables d'environnement du test."""
+
+    def reload(**environ):
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(databases)
+
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(databases)
+
+
+def test_production_settings(reload_databases):
+    assert reload_databases().DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3"
+
+    default = reload_databases(DJANGO_SQLITE_PRODUCTION="1", DJANGO_SQLITE_BUSY_TIMEOUT="250").DATABASES["default"]
+    assert default["ENGINE"] == "dwh_fhir.backends.sqlite3"
+    assert default["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+    assert "PRAGMA journal_mode=WAL" in default["OPTIONS"]["init_command"].split(";")
+    assert "PRAGMA busy_timeout=250" in default["OPTIONS"]["init_command"].split(";")
+
+
+def test_replicas_reuse_the_production_backend(reload_databases, tmp_path):
+    settings = reload_databases(DJANGO_SQLITE_PRODUCTION="1", DJANGO_DATABASE_REPLICAS=str(tmp_path / "replica.db"))
+    replica = settings.DATABASES["replica1"]
+    assert settings.DATABASE_REPLICAS == ["replica1"]
+    assert replica["ENGINE"] == "dwh_fhir.backends.sqlite3"
+    assert replica["NAME"] == f"file:{tmp_path / 'replica.db'}?mode=ro"
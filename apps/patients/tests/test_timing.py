@@ -0,0 +1,47 @@
+# apps/patients/tests/test_timing.py
+import logging
+import re
+
+import pytest
+
+
+def timings(response):
+    return dict(re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"]))
+
+
+@pytest.fixture
+def sampled(settings):
+    settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+
+
+def test_sampled_request_reports_its_phases(client, patient, sampled, caplog):
+    with caplog.at_level(logging.INFO, logger="dwh_fhir.timing"):
+        response = client.get(f"/api/patient/{patient.pk}/")
+
+    assert set(timings(response)) == {"mw", "db", "ser", "render", "total"}
+    assert 'desc="2 queries"' in response["Server-Timing"]
+    (record,) = caplog.records
+    assert (record.route, record.status, record.queries) == ("api-patient-detail", 200, 2)
+    assert record.serializer_ms > 0
+    assert record.total_ms >= record.db_ms
+
+
+def test_unsampled_request_has_no_server_timing(client, patient, settings):
+    settings.SERVER_TIMING_SAMPLE_RATE = 0
+
+    assert not client.get(f"/api/patient/{patient.pk}/").has_header("Server-Timing")
+
+
+def test_unknown_url_has_no_time_before_view(client, sampled):
+    response = client.get("/unknown/")
+
+    assert response.status_code == 404
+    assert set(timings(response)) == {"db", "ser", "render", "total"}
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_asgi_request_reports_the_time_before_the_view(async_client, sampled):
+    response = await async_client.get("/api/patient/")
+
+    assert response.status_code == 200
+    assert "mw" in timings(response)
@@ -0,0 +1,106 @@
+# apps/patients/tests/test_versioning.py
+from django.utils.http import http_date
+
+from apps.patients.models import Patient, PatientHistory
+
+
+def update(client, patient, family, **headers):
+    resource = client.get(f"/api/patient/{patient.pk}/").json()
+    resource["name"][0]["family"] = family
+    return client.put(f"/api/patient/{patient.pk}/", resource, content_type="application/json", headers=headers)
+
+
+def test_update_increments_the_version(client, patient):
+    response = update(client, patient, "Martin")
+    assert response.status_code == 200
+    assert response["ETag"] == 'W/"2"'
+    assert response.json()["meta"]["versionId"] == "2"
+    assert "Last-Modified" in response
+
+    assert Patient.objects.get(pk=patient.pk).version_id == 2
+    assert list(PatientHistory.objects.filter(patient_id=patient.pk).values_list("version_id", "method")) == [
+        (1, "POST"),
+        (2, "PUT"),
+    ]
+
+
+def test_update_with_if_match(client, patient):
+    response = update(client, patient, "Martin", **{"If-Match": 'W/"2"'})
+    assert response.status_code == 412
+    assert Patient.objects.get(pk=patient.pk).last_name == "Dupont"
+
+    response = update(client, patient, "Martin", **{"If-Match": 'W/"1"'})
+    assert response.status_code == 200
+    assert response["ETag"] == 'W/"2"'
+
+    # La version 1 a été remplacée : une seconde mise à jour fondée sur elle est refusée
+    assert update(client, patient, "Durand", **{"If-Match": 'W/"1"'}).status_code == 412
+    assert Patient.objects.get(pk=patient.pk).last_name == "Martin"
+
+
+def test_history_lists_versions_from_newest(client, patient):
+    update(client, patient, "Martin")
+    client.delete(f"/api/patient/{patient.pk}/")
+
+    bundle = client.get(f"/api/patient/{patient.pk}/_history/").json()
+    assert bundle["type"] == "history"
+    assert [entry["request"]["method"] for entry in bundle["entry"]] == ["DELETE", "PUT", "POST"]
+    assert [entry["response"]["etag"] for entry in bundle["entry"]] == ['W/"3"', 'W/"2"', 'W/"1"']
+    assert "resource" not in bundle["entry"][0]
+    assert bundle["entry"][1]["resource"]["name"][0]["family"] == "Martin"
+    assert bundle["entry"][2]["resource"]["name"][0]["family"] == "Dupont"
+
+
+def test_history_of_an_unknown_patient(client, db):
+    assert client.get("/api/patient/999/_history/").status_code == 404
+
+
+def test_history_of_a_patient_created_before_versioning(client, patient):
+    PatientHistory.objects.filter(patient_id=patient.pk).delete()
+
+    bundle = client.get(f"/api/patient/{patient.pk}/_history/").json()
+    assert [(entry["request"]["method"], entry["response"]["etag"]) for entry in bundle["entry"]] == [("POST", 'W/"1"')]
+    assert client.get(f"/api/patient/{patient.pk}/_history/1/").status_code == 200
+
+
+def test_vread(client, patient):
+    update(client, patient, "Martin")
+
+    response = client.get(f"/api/patient/{patient.pk}/_history/1/")
+    assert response.status_code == 200
+    assert response["ETag"] == 'W/"1"'
+    assert response.json()["name"][0]["family"] == "Dupont"
+    assert client.get(f"/api/patient/{patient.pk}/_history/2/").json()["name"][0]["family"] == "Martin"
+    assert client.get(f"/api/patient/{patient.pk}/_history/3/").status_code == 404
+    assert client.get(f"/api/patient/{patient.pk}/_history/1/", headers={"If-None-Match": 'W/"1"'}).status_code == 304
+
+
+def test_vread_of_a_deletion_is_gone(client, patient):
+    client.delete(f"/api/patient/{patient.pk}/")
+
+    response = client.get(f"/api/patient/{patient.pk}/_history/2/")
+    assert response.status_code == 410
+    assert response["ETag"] == 'W/"2"'
+    assert client.get(f"/api/patient/{patient.pk}/_history/1/").status_code == 200
+
+
+def test_read_if_modified_since(client, patient):
+    url = f"/api/patient/{patient.pk}/"
+    last_modified = client.get(url)["Last-Modified"]
+
+    response = client.get(url, headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    assert response["ETag"] == 'W/"1"'
+    before = http_date(patient.update_date.timestamp() - 60)
+    assert client.get(url, headers={"If-Modified-Since": before}).status_code == 200
+    # If-None-Match l'emporte sur If-Modified-Since
+    assert client.get(url, headers={"If-Modified-Since": last_modified, "If-None-Match": 'W/"0"'}).status_code == 200
+
+
+def test_search_if_modified_since(client, patient):
+    after = http_date(patient.update_date.timestamp() + 60)
+    assert client.get("/api/patient/", headers={"If-Modified-Since": after}).status_code == 304
+
+    update(client, patient, "Martin")
+    before = http_date(Patient.objects.get(pk=patient.pk).update_date.timestamp() - 60)
+    assert client.get("/api/patient/", headers={"If-Modified-Since": before}).status_code == 200
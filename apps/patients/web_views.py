@@ -1,13 +1,20 @@
 # apps/patients/web_views.py
 from django.contrib import messages
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from .cache import cache_resource, get_cached_resource
+from .counting import estimated_count
+from .fast_serializer import serialize_patient
 from .mixins import PatientMixin
 from .models import Patient
+from .pagination import PATIENT_LIST_SORTS, KeysetPaginator
 from .serializers import PatientFHIRSerializer
 
+# Colonnes affichées par la liste HTML des patients
+PATIENT_ROW_COLUMNS = ("id", "ipp", "last_name", "first_name", "sex", "birth_date")
+
 
 class PatientHTMLView(PatientMixin):
     """Endpoints API strictement conformes aux consignes FHIR pour la gestion des patients.
@@ -18,8 +25,12 @@ class PatientHTMLView(PatientMixin):
     def list_patients(self, request: HttpRequest) -> HttpResponse:
         """Liste paginée des patients.
 
+        Seules les colonnes affichées sont lues (lignes `values_list`, sans sérialisation FHIR)
+        et la navigation se fait par clé (`after`, `before`, `last`) : le coût d'une page ne
+        dépend pas de sa profondeur. Le nombre de patients affiché est une estimation.
+
         Args:
-            request: La requête HTTP contenant les paramètres de pagination.
+            request: La requête HTTP contenant le tri (`sort`) et la position (`after`, `before`, `last`).
 
         Returns
         -------
@@ -27,12 +38,18 @@ class PatientHTMLView(PatientMixin):
 
             - 200 OK avec la liste des patients
         """
-        patients = Patient.objects.all().order_by("id")
-        paginator = Paginator(patients, 15)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
-        serializer = PatientFHIRSerializer(page_obj, many=True)
-        return render(request, "patients/patient_list.html", {"patients": serializer.data, "page_obj": page_obj})
+        sort = request.GET.get("sort", "id")
+        if sort not in PATIENT_LIST_SORTS:
+            sort = "id"
+        rows = Patient.objects.values_list(*PATIENT_ROW_COLUMNS, named=True)
+        page = KeysetPaginator(rows, sort, per_page=15).get_page(
+            after=request.GET.get("after"), before=request.GET.get("before"), last="last" in request.GET
+        )
+        return render(
+            request,
+            "patients/patient_list.html",
+            {"patients": page.rows, "page": page, "sort": sort, "total": estimated_count(Patient)},
+        )
 
     def create_patient_form(self, request: HttpRequest) -> HttpResponse:
         """Affiche le formulaire de création d'un patient.
@@ -89,9 +106,9 @@ class PatientHTMLView(PatientMixin):
             - 200 OK avec les données du patient
             - 404 Not Found si patient non trouvé
         """
-        patient = get_object_or_404(Patient, pk=pk)
-        serializer = PatientFHIRSerializer(patient)
-        data = self.extract_patient_extensions(serializer.data)
+        version_id = get_object_or_404(Patient.objects.values_list("version_id", flat=True), pk=pk)
+        resource = get_cached_resource(pk, version_id) or cache_resource(get_object_or_404(Patient, pk=pk))
+        data = self.extract_patient_extensions(resource.data)
         return render(request, "patients/patient_detail.html", {"patient": data})
 
     def edit_patient_form(self, request: HttpRequest, pk: int) -> HttpResponse:
@@ -108,9 +125,8 @@ class PatientHTMLView(PatientMixin):
             - 200 OK avec le formulaire
             - 404 Not Found si patient non trouvé
         """
-        patient = get_object_or_404(Patient, pk=pk)
-        serializer = PatientFHIRSerializer(patient)
-        data = self.extract_patient_extensions(serializer.data)
+        # Toujours lu en base : la version affichée est celle que l'enregistrement remplacera
+        data = self.extract_patient_extensions(serialize_patient(get_object_or_404(Patient, pk=pk)))
         return render(request, "patients/patient_update.html", {"patient": data})
 
     def handle_edit_patient(self, request: HttpRequest, pk: int) -> HttpResponse:
@@ -127,15 +143,25 @@ class PatientHTMLView(PatientMixin):
             - 302 Redirect vers la page du patient si succès
             - 400 Bad Request avec les erreurs si échec
             - 404 Not Found si patient non trouvé
+            - 409 Conflict si le patient a été modifié depuis l'affichage du formulaire
         """
-        patient = get_object_or_404(Patient, pk=pk)
-        fhir_data = self.form_to_fhir(request.POST, patient.id)
-        serializer = PatientFHIRSerializer(patient, data=fhir_data)
-
-        if serializer.is_valid():
-            serializer.save()
-            messages.success(request, "Patient mis à jour avec succès")
-            return redirect(f"/patient/{pk}/")
+        with transaction.atomic():
+            # Le verrou de ligne rend la vérification de version et l'écriture indissociables
+            patient = get_object_or_404(Patient.objects.select_for_update(), pk=pk)
+            version_id = request.POST.get("version_id")
+            if version_id and version_id != str(patient.version_id):
+                messages.error(
+                    request, "Le patient a été modifié entre-temps : vérifiez la version actuelle avant d'enregistrer"
+                )
+                data = self.extract_patient_extensions(serialize_patient(patient))
+                return render(request, "patients/patient_update.html", {"patient": data}, status=409)
+
+            fhir_data = self.form_to_fhir(request.POST, patient.id)
+            serializer = PatientFHIRSerializer(patient, data=fhir_data)
+            if serializer.is_valid():
+                serializer.save()
+                messages.success(request, "Patient mis à jour avec succès")
+                return redirect(f"/patient/{pk}/")
 
         return render(
             request, "patients/patient_update.html", {"patient": patient, "errors": serializer.errors}, status=400
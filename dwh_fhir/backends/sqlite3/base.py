@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite backend accepting the `init_command` and `transaction_mode` options of Django 5.1.
+
+    `init_command` holds `;`-separated statements (typically PRAGMAs) run on every new
+    connection. `transaction_mode` sets how `atomic` blocks begin: with `IMMEDIATE`, a
+    transaction takes the write lock up front and waits for it (busy timeout) instead of
+    failing with `database is locked` when it later upgrades a read lock held by another writer.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Read and validate the extra options."""
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict["OPTIONS"]
+        self.init_command: Optional[str] = options.get("init_command")
+        self.transaction_mode: Optional[str] = options.get("transaction_mode")
+        if self.transaction_mode is not None and self.transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f"transaction_mode must be one of: {', '.join(TRANSACTION_MODES)}")
+
+    def get_connection_params(self) -> Dict[str, Any]:
+        """Return the `sqlite3.connect` arguments, without the extra options."""
+        kwargs = super().get_connection_params()
+        kwargs.pop("init_command", None)
+        kwargs.pop("transaction_mode", None)
+        return kwargs
+
+    def get_new_connection(self, conn_params: Dict[str, Any]) -> Any:
+        """Open a connection and run `init_command`."""
+        conn = super().get_new_connection(conn_params)
+        for statement in (self.init_command or "").split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self) -> None:
+        """Begin an `atomic` block in the configured transaction mode."""
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f"BEGIN {self.transaction_mode.upper()}")
@@ -0,0 +1,178 @@
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, DefaultDict, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.multiprocess import MultiProcessCollector
+
+# Directory shared by the worker processes, each writing its samples to its own files;
+# it must be emptied before the workers start. Without it, each process reports its own metrics.
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Label values bounded to known methods: any string could otherwise become a new series
+HTTP_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+# Route label of requests that did not resolve to a view
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter("http_requests", "HTTP requests by route, method and status code.", ["route", "method", "status"])
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and method (until the response starts).",
+    ["route", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_queries",
+    "SQL queries per HTTP request, by route.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL query latency by database alias.",
+    ["alias"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+CACHE_LOOKUPS = Counter("cache_lookups", "Cache lookups by cache and result (hit or miss).", ["cache", "result"])
+
+
+@dataclass
+class RequestMetrics:
+    """Measures of the current HTTP request that are only known once it is served."""
+
+    queries: int = 0
+
+
+# Set by `MetricsMiddleware`; None outside HTTP requests (commands, shell, background threads)
+request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup; `cache_hit_ratio` is derived from these counters at scrape time."""
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def observe_query(execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Any) -> Any:
+    """Record the latency of a query and count it in the current request."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        QUERY_DURATION.labels(context["connection"].alias).observe(time.perf_counter() - start)
+        state = request_metrics.get()
+        if state is not None:
+            state.queries += 1
+
+
+def _install_query_observer(connection: Any, **kwargs: Any) -> None:
+    # Inserted first because `connection.execute_wrapper()` removes the last wrapper on exit
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, observe_query)
+
+
+connection_created.connect(_install_query_observer)
+
+
+def cache_hit_ratios(metrics: Iterable[Metric]) -> GaugeMetricFamily:
+    """Hit ratio of each cache since the workers started, from the aggregated lookup counters."""
+    lookups: DefaultDict[str, Dict[str, float]] = defaultdict(lambda: {"hit": 0.0, "miss": 0.0})
+    for metric in metrics:
+        if metric.name == "cache_lookups":
+            for sample in metric.samples:
+                if sample.name == "cache_lookups_total":
+                    lookups[sample.labels["cache"]][sample.labels["result"]] += sample.value
+    gauge = GaugeMetricFamily("cache_hit_ratio", "Cache hit ratio since the workers started.", labels=["cache"])
+    for cache, results in sorted(lookups.items()):
+        total = results["hit"] + results["miss"]
+        if total:
+            gauge.add_metric([cache], results["hit"] / total)
+    return gauge
+
+
+class ScrapeCollector:
+    """Collect the metrics of every worker (or of this process) and add the cache hit ratios."""
+
+    def collect(self) -> Iterator[Metric]:
+        """Yield the collected metrics, then `cache_hit_ratio`."""
+        if MULTIPROCESS_DIR:
+            metrics: List[Metric] = list(MultiProcessCollector(None, MULTIPROCESS_DIR).collect())
+        else:
+            metrics = list(REGISTRY.collect())
+        yield from metrics
+        yield cache_hit_ratios(metrics)
+
+
+@never_cache
+@require_GET
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Expose the metrics in the Prometheus text format."""
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(ScrapeCollector())
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """Count each request and record its latency and query count under its named route.
+
+    The route label is the URL name of the view (`api-patient-list`, `patients:patient-list`...),
+    so that series stay bounded whatever the URLs requested. Place it first in `MIDDLEWARE`
+    so that the latency covers the whole middleware stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        """Store the next handler."""
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Measure the request, synchronously or asynchronously like the next handler."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_metrics.set(None)
+        return self.finish(request, state, start, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        """Measure an ASGI request."""
+        state, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_metrics.set(None)
+        return self.finish(request, state, start, response)
+
+    def start(self) -> Tuple[RequestMetrics, float]:
+        """Create the measures of a request."""
+        state = RequestMetrics()
+        request_metrics.set(state)
+        return state, time.perf_counter()
+
+    def finish(
+        self, request: HttpRequest, state: RequestMetrics, start: float, response: HttpResponseBase
+    ) -> HttpResponseBase:
+        """Record the measures of a request under its route."""
+        # The body of a streaming response is sent after this point and is not measured
+        duration = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match is not None else UNMATCHED_ROUTE
+        method = request.method if request.method in HTTP_METHODS else "other"
+        REQUESTS.labels(route, method, str(response.status_code)).inc()
+        REQUEST_DURATION.labels(route, method).observe(duration)
+        REQUEST_QUERIES.labels(route).observe(state.queries)
+        return response
@@ -0,0 +1,341 @@
+import functools
+import html
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from types import CodeType
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib import admin
+from django.http import FileResponse, Http404, HttpRequest, HttpResponseBase
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+# Staff switch: `X-Profile: 1` header or `_profile=1` query parameter
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAMETER = "_profile"
+PROFILE_ID = re.compile(r"\d{8}T\d{12}-\d+-\d+")
+# Frames narrower than this share of the samples are left out of the flame graph
+MIN_FRAME_SHARE = 0.001
+FRAME_HEIGHT = 17
+
+# Per-process counter of profile ids, shared by the middleware instances of the WSGI and ASGI handlers
+_profile_counter = itertools.count(1)
+
+
+@functools.lru_cache(maxsize=8192)
+def frame_label(code: CodeType) -> str:
+    """Label of a function in the collapsed stacks: qualified name and shortened location."""
+    filename = code.co_filename
+    for prefix in sorted((path for path in sys.path if path), key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1 :]
+            break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class SamplingProfiler(threading.Thread):
+    """Sample the stacks of one thread, or of every thread of the process, until stopped.
+
+    Under WSGI a request runs in a single thread, the only one sampled: the other requests
+    served by the worker threads stay out of its profile. Under ASGI a request runs in several
+    threads (event loop, `sync_to_async` thread), so all of them are sampled. Each stack starts
+    with its thread name. The profiled code is not instrumented: the cost is one stack walk per
+    sampled thread and per interval, in this thread.
+    """
+
+    def __init__(
+        self, interval: float, on_stop: Callable[["SamplingProfiler"], None], thread: Optional[int] = None
+    ) -> None:
+        """Prepare a profiler sampling every `interval` seconds the `thread` ident (None: all threads).
+
+        `on_stop` receives the profiler once stopped.
+        """
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.on_stop = on_stop
+        self.thread = thread
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        """Sample until stopped, then hand the profile over."""
+        own = threading.get_ident()
+        try:
+            while not self.stopped.wait(self.interval):
+                self.sample(own)
+        finally:
+            self.on_stop(self)
+
+    def sample(self, own: int) -> None:
+        """Add the current stack of the profiled thread, or of every other thread."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (self.thread is not None and ident != self.thread):
+                continue
+            labels = []
+            current: Any = frame
+            while current is not None:
+                labels.append(frame_label(current.f_code))
+                current = current.f_back
+            labels.append(names.get(ident, f"thread-{ident}").replace(";", ","))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def stop(self) -> None:
+        """Stop sampling; the profile is handed over by the profiler thread."""
+        self.stopped.set()
+
+
+def collapsed_stacks(stacks: Counter) -> str:
+    """Stacks in the collapsed format of `flamegraph.pl` and speedscope (`frame;frame count`)."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def frame_color(label: str) -> str:
+    """Warm colour, stable for a given function."""
+    value = zlib.crc32(label.encode())
+    return f"hsl({value % 50}, {70 + value % 20}%, {55 + value % 15}%)"
+
+
+def flame_graph(stacks: Counter, title: str) -> str:
+    """Self-contained HTML flame graph (no script): one box per function and calling stack."""
+    root: Dict[str, Any] = {"count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for label in stack.split(";"):
+            node = node["children"].setdefault(label, {"count": 0, "children": {}})
+            node["count"] += count
+    total = root["count"] or 1
+    boxes: List[str] = []
+    depth = 0
+
+    def walk(node: Dict[str, Any], left: int, level: int) -> None:
+        nonlocal depth
+        depth = max(depth, level + 1)
+        for label, child in sorted(node["children"].items()):
+            if child["count"] / total >= MIN_FRAME_SHARE:
+                share = child["count"] / total * 100
+                text = html.escape(label)
+                boxes.append(
+                    f'<div style="left:{left / total * 100:.4f}%;width:{share:.4f}%;bottom:{level * FRAME_HEIGHT}px;'
+                    f'background:{frame_color(label)}" title="{text} : {child["count"]} échantillons '
+                    f'({share:.1f} %)">{text}</div>'
+                )
+                walk(child, left, level + 1)
+            left += child["count"]
+
+    walk(root, 0, 0)
+    return (
+        f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>{html.escape(title)}</title><style>'
+        "body{font:12px sans-serif;margin:1em}#graph{position:relative;"
+        f"height:{depth * FRAME_HEIGHT}px}}#graph div{{position:absolute;height:{FRAME_HEIGHT - 1}px;overflow:hidden;"
+        "white-space:nowrap;box-sizing:border-box;padding:0 2px;border-right:1px solid #fff;cursor:default}"
+        f"</style></head><body><h1>{html.escape(title)}</h1><p>{root['count']} échantillons</p>"
+        f'<div id="graph">{"".join(boxes)}</div></body></html>'
+    )
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of profiles, shared by the worker processes.
+
+    Each profile is three files named after its id (time, process, counter): the collapsed
+    stacks, the HTML flame graph and its description (JSON, written last). Beyond
+    `max_profiles`, the oldest profiles are deleted.
+    """
+
+    def __init__(self, directory: str, max_profiles: int) -> None:
+        """Use `directory`, created on the first profile."""
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def new_id(self) -> str:
+        """Unique id of a new profile, in chronological order."""
+        return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{os.getpid()}-{next(_profile_counter)}"
+
+    def save(self, profile_id: str, description: Dict[str, Any], stacks: Counter) -> None:
+        """Write a profile, then delete the oldest ones beyond the limit."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        title = f"{description['method']} {description['path']} ({description['duration_ms']:.0f} ms)"
+        (self.directory / f"{profile_id}.collapsed").write_text(collapsed_stacks(stacks), encoding="utf-8")
+        (self.directory / f"{profile_id}.html").write_text(flame_graph(stacks, title), encoding="utf-8")
+        # The description is written last and atomically: a listed profile is complete
+        temporary = self.directory / f"{profile_id}.json.tmp"
+        temporary.write_text(json.dumps(description), encoding="utf-8")
+        os.replace(temporary, self.directory / f"{profile_id}.json")
+        self.trim()
+
+    def trim(self) -> None:
+        """Delete the oldest profiles beyond `max_profiles`."""
+        for profile_id in self.ids()[self.max_profiles :]:
+            for suffix in (".json", ".html", ".collapsed"):
+                try:
+                    (self.directory / f"{profile_id}{suffix}").unlink()
+                except FileNotFoundError:
+                    # Already deleted by another process
+                    pass
+
+    def ids(self) -> List[str]:
+        """Ids of the stored profiles, most recent first."""
+        if not self.directory.is_dir():
+            return []
+        return sorted((path.stem for path in self.directory.glob("*.json")), reverse=True)
+
+    def descriptions(self) -> Iterator[Dict[str, Any]]:
+        """Descriptions of the stored profiles, most recent first."""
+        for profile_id in self.ids():
+            try:
+                yield json.loads((self.directory / f"{profile_id}.json").read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                continue
+
+    def path(self, profile_id: str, suffix: str) -> Path:
+        """File of a stored profile; 404 for an unknown or malformed id."""
+        path = self.directory / f"{profile_id}{suffix}"
+        if not PROFILE_ID.fullmatch(profile_id) or not path.is_file():
+            raise Http404("Profil introuvable")
+        return path
+
+
+def get_store() -> ProfileStore:
+    """Profile store configured by the settings."""
+    return ProfileStore(getattr(settings, "PROFILER_DIR"), getattr(settings, "PROFILER_MAX_PROFILES", 100))
+
+
+def profile_list(request: HttpRequest) -> HttpResponseBase:
+    """Admin page listing the stored profiles."""
+    context = {
+        **admin.site.each_context(request),
+        "title": "Profils de requêtes",
+        "profiles": get_store().descriptions(),
+    }
+    return render(request, "admin/profiles.html", context)
+
+
+def profile_flame_graph(request: HttpRequest, profile_id: str) -> HttpResponseBase:
+    """Flame graph of a stored profile."""
+    return FileResponse(get_store().path(profile_id, ".html").open("rb"), content_type="text/html; charset=utf-8")
+
+
+def profile_stacks(request: HttpRequest, profile_id: str) -> HttpResponseBase:
+    """Collapsed stacks of a stored profile, as a download."""
+    path = get_store().path(profile_id, ".collapsed")
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name, content_type="text/plain")
+
+
+class ProfilerMiddleware:
+    """Profile a request on demand of a staff user, or one request in N of a route.
+
+    A staff user turns the profiler on with the `X-Profile: 1` header or the `_profile=1` query
+    parameter; `PROFILER_SAMPLE_ROUTES` maps route names to N. The profile covers the view,
+    rendering and the response phase of the middleware that follow this one. At most one request
+    is profiled at a time in each process; a profiled response carries its id (`X-Profile-Id`).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        """Store the next handler and the profiler settings."""
+        self.get_response = get_response
+        self.store = get_store()
+        self.interval = getattr(settings, "PROFILER_INTERVAL_MS", 5) / 1000
+        self.sample_routes: Dict[str, int] = getattr(settings, "PROFILER_SAMPLE_ROUTES", {})
+        self.route_counters = {route: itertools.count(1) for route in self.sample_routes}
+        self.busy = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django runs a synchronous `process_view` of an async middleware in a thread
+            self.process_view = self.aprocess_view  # type: ignore[method-assign]
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Serve the request, synchronously or asynchronously like the next handler."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.finish(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        """Serve an ASGI request."""
+        return self.finish(request, await self.get_response(request))
+
+    def process_view(self, request: HttpRequest, view_func: Any, view_args: Any, view_kwargs: Any) -> None:
+        """Start the profiler if the request asks for it (staff user) or is sampled."""
+        if self.requested(request) and request.user.is_staff:
+            self.start(request, f"staff:{request.user.get_username()}")
+        else:
+            self.sample(request)
+
+    async def aprocess_view(self, request: HttpRequest, view_func: Any, view_args: Any, view_kwargs: Any) -> None:
+        """Start the profiler of an ASGI request; the user is only loaded when profiling is asked for."""
+        if self.requested(request):
+            user = await request.auser()
+            if user.is_staff:
+                self.start(request, f"staff:{user.get_username()}")
+                return
+        self.sample(request)
+
+    def requested(self, request: HttpRequest) -> bool:
+        """Whether the request asks to be profiled."""
+        return request.headers.get(PROFILE_HEADER) == "1" or request.GET.get(PROFILE_PARAMETER) == "1"
+
+    def sample(self, request: HttpRequest) -> None:
+        """Profile one request in N of the routes listed in `PROFILER_SAMPLE_ROUTES`."""
+        route = request.resolver_match.view_name if request.resolver_match is not None else None
+        if route in self.route_counters and next(self.route_counters[route]) % self.sample_routes[route] == 0:
+            self.start(request, f"sample:1/{self.sample_routes[route]}")
+
+    def start(self, request: HttpRequest, trigger: str) -> None:
+        """Start profiling a request, unless another one is being profiled in this process."""
+        if not self.busy.acquire(blocking=False):
+            return
+        description = {
+            "id": self.store.new_id(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "route": request.resolver_match.view_name if request.resolver_match is not None else None,
+            "trigger": trigger,
+            "pid": os.getpid(),
+            "interval_ms": self.interval * 1000,
+        }
+
+        def save(profiler: SamplingProfiler) -> None:
+            try:
+                description["samples"] = profiler.samples
+                self.store.save(description["id"], description, profiler.stacks)
+            except Exception:
+                logger.exception("Could not save profile %s", description["id"])
+            finally:
+                self.busy.release()
+
+        # A WSGI request is served by the thread running `process_view`
+        thread = None if iscoroutinefunction(self) else threading.get_ident()
+        profiler = SamplingProfiler(self.interval, save, thread)
+        request._profile = (profiler, description, time.perf_counter())  # type: ignore[attr-defined]
+        profiler.start()
+
+    def finish(self, request: HttpRequest, response: HttpResponseBase) -> HttpResponseBase:
+        """Stop the profiler of a profiled request; the profile is saved by the profiler thread."""
+        profile = getattr(request, "_profile", None)
+        if profile is None:
+            return response
+        profiler, description, started = profile
+        description["duration_ms"] = (time.perf_counter() - started) * 1000
+        description["status"] = response.status_code
+        profiler.stop()
+        response["X-Profile-Id"] = description["id"]
+        return response
@@ -0,0 +1,278 @@
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponseBase
+
+logger = logging.getLogger(__name__)
+
+# Code of the applications, where a statement is attributed to (rather than to the ORM or middleware)
+APPS_DIR = str(Path(settings.BASE_DIR) / "apps")
+# Literals and placeholder lists that vary between executions of the same statement
+SHAPE_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s|\?"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+)
+
+
+@dataclass
+class RecordedQuery:
+    """A statement run while serving a request."""
+
+    alias: str
+    sql: str
+    params: Any
+    duration: float
+    source: Optional[str]
+
+
+@dataclass
+class RequestQueries:
+    """Statements run while serving the current request."""
+
+    queries: List[RecordedQuery] = field(default_factory=list)
+
+
+# Set by `QueryAuditMiddleware`; None outside HTTP requests
+request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def query_shape(sql: str) -> str:
+    """Statement with its literals and parameters replaced, so that an N+1 series shares one shape."""
+    for pattern, replacement in SHAPE_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def query_source() -> Optional[str]:
+    """Innermost frame of the applications that ran the statement (`file:line in function`).
+
+    None for the ORM calls of async views, run by `sync_to_async` in a thread whose stack
+    does not include the view.
+    """
+    frame: Any = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APPS_DIR):
+            return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def record_query(execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Any) -> Any:
+    """Record a statement run while serving a request."""
+    state = request_queries.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        state.queries.append(RecordedQuery(context["connection"].alias, sql, params, duration, query_source()))
+
+
+def _install_query_recorder(connection: Any, **kwargs: Any) -> None:
+    # Inserted first because `connection.execute_wrapper()` removes the last wrapper on exit
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+# Development and test mode only: otherwise no wrapper is added to the statements
+if getattr(settings, "QUERY_AUDIT", False):
+    connection_created.connect(_install_query_recorder)
+
+
+def explain(query: RecordedQuery) -> str:
+    """Execution plan of a recorded SELECT statement (not recorded itself)."""
+    if not query.sql.lstrip().upper().startswith("SELECT"):
+        return "(plan not available for this statement)"
+    connection = connections[query.alias]
+    token = request_queries.set(None)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {query.sql}", query.params)
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"(EXPLAIN failed: {exc})"
+    finally:
+        request_queries.reset(token)
+
+
+@dataclass
+class BudgetViolation:
+    """A request that exceeded a budget."""
+
+    route: Optional[str]
+    path: str
+    queries: int
+    duration_ms: float
+    statements: List[str]
+
+
+class query_budget(ContextDecorator):
+    """Fail a test when a request to `route` runs more than `queries` statements or lasts over `ms`.
+
+    Usable as a context manager or a decorator; the budget applies to each request served
+    inside it (every route when `route` is None) and the test fails on exit with an
+    `AssertionError` listing the statements of the offending requests, or when no request
+    to `route` was served (a budget that checked nothing would pass silently)::
+
+        @query_budget("api-patient-list", queries=3, ms=200)
+        def test_patient_list(client):
+            client.get("/api/patient/?family=martin")
+
+    Requires `QUERY_AUDIT` (on by default under pytest and in DEBUG).
+    """
+
+    def __init__(self, route: Optional[str] = None, queries: Optional[int] = None, ms: Optional[float] = None) -> None:
+        """Declare the budget of the requests to `route`."""
+        self.route = route
+        self.queries = queries
+        self.ms = ms
+        self.violations: List[BudgetViolation] = []
+        self.checked = 0
+        self.tokens: List[Token] = []
+
+    def __enter__(self) -> "query_budget":
+        """Start applying the budget."""
+        if not getattr(settings, "QUERY_AUDIT", False):
+            raise RuntimeError("query_budget requires QUERY_AUDIT (DJANGO_QUERY_AUDIT=1)")
+        self.violations, self.checked = [], 0
+        self.tokens.append(active_budgets.set(active_budgets.get() + (self,)))
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        """Stop applying the budget and fail if a request exceeded it or no request was checked."""
+        active_budgets.reset(self.tokens.pop())
+        if exc[0] is not None:
+            return
+        if self.checked == 0:
+            raise AssertionError(f"No request to {self.route or 'any route'} was served within the budget")
+        if self.violations:
+            raise AssertionError(self.report())
+
+    def check(self, route: Optional[str], path: str, state: RequestQueries, duration: float) -> None:
+        """Check a request served while the budget applies."""
+        if self.route is not None and route != self.route:
+            return
+        self.checked += 1
+        duration_ms = duration * 1000
+        if (self.queries is not None and len(state.queries) > self.queries) or (
+            self.ms is not None and duration_ms > self.ms
+        ):
+            statements = [query.sql for query in state.queries]
+            self.violations.append(BudgetViolation(route, path, len(state.queries), duration_ms, statements))
+
+    def report(self) -> str:
+        """Description of the requests over budget."""
+        lines = [f"Budget exceeded for {self.route or 'every route'} (queries={self.queries}, ms={self.ms}):"]
+        for violation in self.violations:
+            lines.append(f"  {violation.path}: {violation.queries} queries, {violation.duration_ms:.1f} ms")
+            lines.extend(f"    {sql}" for sql in violation.statements)
+        return "\n".join(lines)
+
+
+# Budgets entered by the current test
+active_budgets: ContextVar[Tuple[query_budget, ...]] = ContextVar("active_budgets", default=())
+
+
+class QueryAuditMiddleware:
+    """Record every statement of a request and report N+1 series and slow statements.
+
+    A statement shape (SQL without its literals) run `QUERY_AUDIT_REPEATS` times or more in
+    one request is reported as an N+1 series; a statement over `QUERY_AUDIT_SLOW_MS` as slow.
+    Both are logged as warnings on `dwh_fhir.queryaudit` with the project line that ran them
+    and their execution plan. Development and test mode only (`QUERY_AUDIT`): the middleware
+    removes itself otherwise.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        """Store the next handler and the thresholds."""
+        if not getattr(settings, "QUERY_AUDIT", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.repeats = getattr(settings, "QUERY_AUDIT_REPEATS", 5)
+        self.slow = getattr(settings, "QUERY_AUDIT_SLOW_MS", 100) / 1000
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Audit the request, synchronously or asynchronously like the next handler."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_queries.set(None)
+        self.finish(request, state, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        """Audit an ASGI request."""
+        state, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_queries.set(None)
+        # EXPLAIN runs on the connection of the thread that ran the ORM calls
+        await sync_to_async(self.finish)(request, state, time.perf_counter() - start)
+        return response
+
+    def start(self) -> Tuple[RequestQueries, float]:
+        """Start recording the statements of a request."""
+        state = RequestQueries()
+        request_queries.set(state)
+        return state, time.perf_counter()
+
+    def finish(self, request: HttpRequest, state: RequestQueries, duration: float) -> None:
+        """Report the N+1 series and slow statements, and check the budgets of the running test."""
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match is not None else None
+        path = request.get_full_path()
+        shapes: Dict[str, List[RecordedQuery]] = defaultdict(list)
+        for query in state.queries:
+            shapes[query_shape(query.sql)].append(query)
+        for shape, queries in shapes.items():
+            if len(queries) >= self.repeats:
+                sources = sorted({query.source or "?" for query in queries})
+                logger.warning(
+                    "N+1 on %s (%s): %d x %s\n  from %s\n  plan:\n%s",
+                    path,
+                    route,
+                    len(queries),
+                    shape,
+                    ", ".join(sources),
+                    explain(queries[0]),
+                )
+        for query in state.queries:
+            if query.duration >= self.slow:
+                logger.warning(
+                    "Slow statement on %s (%s): %.1f ms %s\n  from %s\n  plan:\n%s",
+                    path,
+                    route,
+                    query.duration * 1000,
+                    query.sql,
+                    query.source or "?",
+                    explain(query),
+                )
+        for budget in active_budgets.get():
+            budget.check(route, path, state, duration)
@@ -0,0 +1,182 @@
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import HttpRequest, HttpResponseBase
+
+logger = logging.getLogger(__name__)
+
+# Cookie pinning a client's reads to the primary for a short window after it wrote
+PIN_COOKIE = "db_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+# PostgreSQL replica lag in seconds (0 when every received WAL record has been replayed)
+POSTGRESQL_LAG_QUERY = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+@dataclass
+class RoutingState:
+    """Routing state of the current HTTP request.
+
+    Reads go to a replica only while `pinned` is false; any write pins the rest of the request
+    (and, through the cookie set by the middleware, the client's next requests) to the primary.
+    """
+
+    pinned: bool = False
+    wrote: bool = False
+
+
+# Set by `ReadYourWritesMiddleware`; None outside HTTP requests (commands, shell, background threads)
+routing_state: ContextVar[Optional[RoutingState]] = ContextVar("routing_state", default=None)
+
+
+class ReplicaHealth:
+    """Per-process health cache of the read replicas.
+
+    Each replica is probed at most once per `interval` seconds, by the first read that finds
+    its status outdated. A replica that cannot be queried, has not been migrated, or lags
+    behind the primary by more than `max_lag` seconds is left out until the next probe.
+    """
+
+    def __init__(self, interval: float, max_lag: float) -> None:
+        """Initialize an empty cache; every replica is probed on first use."""
+        self.interval = interval
+        self.max_lag = max_lag
+        self.status: Dict[str, Tuple[bool, float]] = {}
+        self.lock = threading.Lock()
+
+    def is_healthy(self, alias: str) -> bool:
+        """Return the cached status of a replica, probing it first if the status is outdated."""
+        healthy, checked_at = self.status.get(alias, (False, 0.0))
+        if time.monotonic() - checked_at < self.interval:
+            return healthy
+        with self.lock:
+            # Another thread may have probed the replica while this one was waiting
+            healthy, checked_at = self.status.get(alias, (False, 0.0))
+            if time.monotonic() - checked_at >= self.interval:
+                healthy = self.probe(alias)
+                self.status[alias] = (healthy, time.monotonic())
+        return healthy
+
+    def probe(self, alias: str) -> bool:
+        """Query a replica and measure its lag when the database reports it."""
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                # Fails on an unreachable replica and on a replica holding no schema yet
+                cursor.execute("SELECT 1 FROM django_migrations LIMIT 1")
+                if connection.vendor == "postgresql":
+                    cursor.execute(POSTGRESQL_LAG_QUERY)
+                    lag = cursor.fetchone()[0]
+                    if lag is not None and lag > self.max_lag:
+                        logger.warning("Replica %s lags %.1f s behind the primary", alias, lag)
+                        return False
+        except DatabaseError as exc:
+            logger.warning("Replica %s is unavailable: %s", alias, exc)
+            connection.close()
+            return False
+        return True
+
+
+class PrimaryReplicaRouter:
+    """Send writes to the primary (`default`) and HTTP reads to a healthy replica.
+
+    Reads stay on the primary outside HTTP requests, inside a transaction on the primary,
+    during write requests, and for `DATABASE_READ_YOUR_WRITES_SECONDS` after a client wrote
+    (so that a redirect following a creation never reads a replica that has not caught up).
+    Without `DATABASE_REPLICAS`, every query goes to the primary.
+    """
+
+    primary = DEFAULT_DB_ALIAS
+
+    def __init__(self) -> None:
+        """Read the replica aliases and health settings."""
+        self.replicas: List[str] = list(getattr(settings, "DATABASE_REPLICAS", []))
+        self.health = ReplicaHealth(
+            getattr(settings, "DATABASE_REPLICA_HEALTH_INTERVAL", 5), getattr(settings, "DATABASE_REPLICA_MAX_LAG", 5)
+        )
+
+    def db_for_read(self, model: Any, **hints: Any) -> str:
+        """Pick a healthy replica at random, or the primary when reads must see the latest writes."""
+        state = routing_state.get()
+        if state is None or state.pinned or not self.replicas or connections[self.primary].in_atomic_block:
+            return self.primary
+        healthy = [alias for alias in self.replicas if self.health.is_healthy(alias)]
+        return random.choice(healthy) if healthy else self.primary
+
+    def db_for_write(self, model: Any, **hints: Any) -> str:
+        """Write to the primary and pin the rest of the request to it."""
+        state = routing_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return self.primary
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> bool:
+        """Allow relations between objects of any alias: replicas hold the same data as the primary."""
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any) -> Optional[bool]:
+        """Migrate the primary only; replicas receive the schema through replication."""
+        return False if db in self.replicas else None
+
+
+def _clear_routing_state(**kwargs: Any) -> None:
+    # The state outlives the view for streaming responses, which read while being sent
+    routing_state.set(None)
+
+
+request_finished.connect(_clear_routing_state)
+
+
+class ReadYourWritesMiddleware:
+    """Set up the routing state of each request and pin clients to the primary after they wrote.
+
+    Write requests (unsafe methods) and requests carrying the pin cookie read from the primary.
+    A request that wrote sets the cookie for `DATABASE_READ_YOUR_WRITES_SECONDS`.
+    Place it before `SessionMiddleware` so that session writes are seen.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        """Store the next handler and the read-your-writes window."""
+        self.get_response = get_response
+        self.window = getattr(settings, "DATABASE_READ_YOUR_WRITES_SECONDS", 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Route the request, synchronously or asynchronously like the next handler."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        return self.finish(state, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        """Route an ASGI request."""
+        state = self.start(request)
+        return self.finish(state, await self.get_response(request))
+
+    def start(self, request: HttpRequest) -> RoutingState:
+        """Create the routing state of a request."""
+        state = RoutingState(pinned=request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES)
+        routing_state.set(state)
+        return state
+
+    def finish(self, state: RoutingState, response: HttpResponseBase) -> HttpResponseBase:
+        """Set the pin cookie on the response of a request that wrote."""
+        if state.wrote:
+            response.set_cookie(PIN_COOKIE, "1", max_age=self.window, httponly=True, samesite="Lax")
+        return response
@@ -1,18 +1,59 @@
 import os
 
+from dwh_fhir.utils import boolenv, intenv
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Database routers
 # https://docs.djangoproject.com/en/dev/topics/db/multi-db/#automatic-database-routing
-DATABASE_ROUTERS = []
+# Writes go to `default` (the primary); reads made while serving HTTP requests go to a healthy
+# replica, except for a client's requests during DATABASE_READ_YOUR_WRITES_SECONDS after it wrote.
+DATABASE_ROUTERS = ["dwh_fhir.routers.PrimaryReplicaRouter"]
+DATABASE_READ_YOUR_WRITES_SECONDS = intenv("DJANGO_READ_YOUR_WRITES_SECONDS", 5)
+DATABASE_REPLICA_HEALTH_INTERVAL = intenv("DJANGO_REPLICA_HEALTH_INTERVAL", 5)
+# Replicas lagging further behind than the read-your-writes window are left out
+DATABASE_REPLICA_MAX_LAG = intenv("DJANGO_REPLICA_MAX_LAG", DATABASE_READ_YOUR_WRITES_SECONDS)
 
 # Database
 # https://docs.djangoproject.com/en/dev//ref/settings/#databases
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(os.path.dirname(os.path.abspath(__file__)), "db.sqlite3"),
+        "NAME": os.getenv("DJANGO_SQLITE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "db.sqlite3")),
     }
 }
+
+# Production SQLite mode (opt-in, DJANGO_SQLITE_PRODUCTION): WAL journal so that readers never
+# block the writer, `synchronous=NORMAL` (durable at checkpoints, safe in WAL mode), memory-mapped
+# reads and a larger page cache, a busy timeout, and `atomic` blocks that take the write lock
+# up front (`BEGIN IMMEDIATE`) so that concurrent writers queue instead of failing.
+if boolenv("DJANGO_SQLITE_PRODUCTION", False):
+    DATABASES["default"]["ENGINE"] = "dwh_fhir.backends.sqlite3"
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": ";".join(
+            (
+                "PRAGMA journal_mode=WAL",
+                "PRAGMA synchronous=NORMAL",
+                f"PRAGMA mmap_size={intenv('DJANGO_SQLITE_MMAP_SIZE', 256 * 2**20)}",
+                # Negative value: size in KiB rather than in pages
+                f"PRAGMA cache_size=-{intenv('DJANGO_SQLITE_CACHE_SIZE', 64 * 1024)}",
+                f"PRAGMA busy_timeout={intenv('DJANGO_SQLITE_BUSY_TIMEOUT', 5000)}",
+            )
+        ),
+        "transaction_mode": "IMMEDIATE",
+    }
+
+# Read replicas: comma-separated DJANGO_DATABASE_REPLICAS. Each replica reuses the `default`
+# settings and only changes its location: a SQLite file, opened read-only (copies of the
+# primary refreshed by `manage.py sync_replicas` locally), or the host of a PostgreSQL standby.
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.getenv("DJANGO_DATABASE_REPLICAS", "").split(","))):
+    replica = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if replica["ENGINE"].endswith(".sqlite3"):
+        replica["NAME"] = f"file:{os.path.abspath(location)}?mode=ro"
+    else:
+        replica["HOST"] = location
+    DATABASES[f"replica{index + 1}"] = replica
+    DATABASE_REPLICAS.append(f"replica{index + 1}")
@@ -12,8 +12,9 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
 import os
+import tempfile
 
-from dwh_fhir.utils import boolenv
+from dwh_fhir.utils import boolenv, countsenv, floatenv, intenv
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -52,9 +53,19 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + PROJECT_APPS
 
 # Middlewares
 MIDDLEWARE = [
+    # En premier : les durées mesurées couvrent toute la pile
+    "dwh_fhir.metrics.MetricsMiddleware",
+    "dwh_fhir.timing.ServerTimingMiddleware",
+    # Développement et tests seulement (QUERY_AUDIT), retiré de la pile sinon
+    "dwh_fhir.queryaudit.QueryAuditMiddleware",
     "django.contrib.admindocs.middleware.XViewMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise, asynchrone sous ASGI : aucun middleware de la pile ne force un passage par un thread
+    "dwh_fhir.staticfiles.StaticFilesMiddleware",
+    # Avant les sessions, dont l'enregistrement est une écriture
+    "dwh_fhir.routers.ReadYourWritesMiddleware",
+    # Profilage à la demande : la réponse des middlewares suivants est incluse dans le profil
+    "dwh_fhir.profiling.ProfilerMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -63,12 +74,15 @@ MIDDLEWARE = [
 ]
 
 # Configuration WhiteNoise
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
 
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [os.path.join(BASE_DIR, "dwh_fhir", "templates")],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -107,6 +121,27 @@ TIME_ZONE = os.getenv("DJANGO_TIMEZONE", "UTC")
 USE_I18N = True
 USE_TZ = True
 
+# Caches
+# https://docs.djangoproject.com/en/dev/topics/cache/
+# `fhir_resources` holds rendered Patient resources (LRU, bounded), keyed by id and version:
+# it is local to each worker process, but a write made by another worker changes the version
+# read before each lookup, so no stale entry is served. Old versions expire after
+# DJANGO_RESOURCE_CACHE_TIMEOUT seconds.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "fhir_resources": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fhir-resources",
+        "TIMEOUT": intenv("DJANGO_RESOURCE_CACHE_TIMEOUT", 300),
+        "OPTIONS": {
+            "MAX_ENTRIES": intenv("DJANGO_RESOURCE_CACHE_MAX_ENTRIES", 10000),
+            "CULL_FREQUENCY": 10,
+        },
+    },
+}
+
 # Logging
 # https://docs.djangoproject.com/en/4.0/topics/logging/#configuring-logging
 LOGGING = {
@@ -141,30 +176,43 @@ LOGGING = {
         },
     },
     "loggers": {
+        "dwh_fhir": {"handlers": ["console", "debug_console"], "level": "INFO"},
         **{app: {"handlers": ["console", "debug_console"], "level": "DEBUG"} for app in PROJECT_APPS},
     },
 }
 
+# Mesures Server-Timing : part des requêtes mesurées (0 à 1), toutes en développement
+SERVER_TIMING_SAMPLE_RATE = floatenv("DJANGO_SERVER_TIMING_SAMPLE_RATE", 1.0 if DEBUG else 0.01)
+
+# Profilage des requêtes : anneau borné de profils sur disque, partagé par les workers
+PROFILER_DIR = os.getenv("DJANGO_PROFILER_DIR", os.path.join(tempfile.gettempdir(), "dwh_fhir_profiles"))
+PROFILER_MAX_PROFILES = intenv("DJANGO_PROFILER_MAX_PROFILES", 100)
+PROFILER_INTERVAL_MS = intenv("DJANGO_PROFILER_INTERVAL_MS", 5)
+# Routes profilées automatiquement, une requête sur N par processus ("api-patient-list=1000,...")
+PROFILER_SAMPLE_ROUTES = countsenv("DJANGO_PROFILER_ROUTES")
+
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = "/static/"
 
 # En production seulement (DEBUG=False)
 if not DEBUG:
     STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
-    STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
+        "apps.patients.renderers.FHIRJSONRenderer",
+        "apps.patients.renderers.FastJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "apps.patients.parsers.FHIRJSONParser",
+        "apps.patients.parsers.FastJSONParser",
     ],
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS": "apps.patients.negotiation.FHIRContentNegotiation",
 }
 
+# L'API navigable n'est proposée qu'en développement, après les renderers JSON
 if DEBUG:
     REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append("rest_framework.renderers.BrowsableAPIRenderer")
 
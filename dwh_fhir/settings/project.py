@@ -4,6 +4,7 @@ import sys
 from pathlib import Path
 
 from django.db.models import options
+from dwh_fhir.utils import boolenv, intenv
 
 VERSION = os.getenv("DJANGO_VERSION", "dev")
 
@@ -15,6 +16,12 @@ APP_DIR = BASE_DIR / "apps"
 # Running 'manage.py test' or 'pytest'
 TESTING = (len(sys.argv) > 1 and sys.argv[1] == "test" in sys.argv) or "pytest" in sys.modules
 
+# Journal des requêtes SQL de chaque requête HTTP (séries N+1, requêtes lentes et leurs plans, budgets
+# des tests) : actif en développement et sous pytest, désactivé par défaut en production
+QUERY_AUDIT = boolenv("DJANGO_QUERY_AUDIT", TESTING or boolenv("DJANGO_DEBUG", False))
+QUERY_AUDIT_REPEATS = intenv("DJANGO_QUERY_AUDIT_REPEATS", 5)
+QUERY_AUDIT_SLOW_MS = intenv("DJANGO_QUERY_AUDIT_SLOW_MS", 100)
+
 # Base URLs
 BASE_URL = os.getenv("DJANGO_BASE_URL", "")
 
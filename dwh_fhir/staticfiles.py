@@ -0,0 +1,42 @@
+from typing import Any, Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponseBase
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise middleware that keeps the middleware stack asynchronous under ASGI.
+
+    `WhiteNoiseMiddleware` is sync-only: Django then runs it, and every middleware and view
+    below it, through `sync_to_async`, so each ASGI request goes through a thread even when
+    its view is asynchronous. Here only the lookup (in DEBUG) and the serving of a static
+    file run in a thread; other requests are passed on to the next handler directly.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any], settings: Any = settings) -> None:
+        """Index the static files and store the next handler."""
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Serve a static file or pass the request on, synchronously or asynchronously like the next handler."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        """Serve a static file or pass an ASGI request on."""
+        if self.autorefresh:
+            # Looks the file up on disk
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
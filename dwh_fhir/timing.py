@@ -0,0 +1,199 @@
+import functools
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, TypeVar, cast
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponseBase
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class RequestTimings:
+    """Time spent by a sampled HTTP request in each phase, in seconds.
+
+    Phases overlap: queries run while serializing count in both `db` and `serializer`.
+    `middleware` is the time spent before the view (middleware, URL resolution); it stays None
+    when no view is reached (unknown URL, response returned by a middleware).
+    """
+
+    started: float
+    queries: int = 0
+    db: float = 0.0
+    middleware: Optional[float] = None
+    serializer: float = 0.0
+    render: float = 0.0
+    # Phase being measured by `timed`, so that nested calls are not counted twice
+    phase: Optional[str] = None
+
+
+# Set by `ServerTimingMiddleware` for sampled requests; None otherwise (and while streaming a response)
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def timed(phase: str) -> Callable[[F], F]:
+    """Add the duration of the decorated function to the `phase` of the sampled request, if any."""
+
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            timings = request_timings.get()
+            if timings is None or timings.phase is not None:
+                return function(*args, **kwargs)
+            timings.phase = phase
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                setattr(timings, phase, getattr(timings, phase) + time.perf_counter() - start)
+                timings.phase = None
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def record_query(execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Any) -> Any:
+    """Count a query and its duration in the sampled request, if any."""
+    timings = request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def _install_query_timer(connection: Any, **kwargs: Any) -> None:
+    # Every connection of every thread: async views query from `sync_to_async` threads.
+    # Inserted first because `connection.execute_wrapper()` removes the last wrapper on exit.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+connection_created.connect(_install_query_timer)
+
+
+class ServerTimingMiddleware:
+    """Measure a sample of requests and report their timings.
+
+    A sampled request (`SERVER_TIMING_SAMPLE_RATE`) gets a `Server-Timing` header (time before
+    the view, queries and DB time, serializer, render and total time) and an INFO record on the
+    `dwh_fhir.timing` logger, whose `extra` fields hold the same measures in milliseconds.
+    Place it first in `MIDDLEWARE` so that the total covers the whole middleware stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        """Store the next handler and the sampling rate."""
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 1.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django runs a synchronous `process_view` of an async middleware in a thread
+            self.process_view = self.aprocess_view  # type: ignore[method-assign]
+
+    def __call__(self, request: HttpRequest) -> Any:
+        """Measure the request, synchronously or asynchronously like the next handler."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = self.start()
+        if timings is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timings.set(None)
+        return self.finish(request, timings, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        """Measure an ASGI request."""
+        timings = self.start()
+        if timings is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_timings.set(None)
+        return self.finish(request, timings, response)
+
+    def process_view(self, request: HttpRequest, view_func: Any, view_args: Any, view_kwargs: Any) -> None:
+        """Record the time spent before the view."""
+        self.view_reached()
+
+    async def aprocess_view(self, request: HttpRequest, view_func: Any, view_args: Any, view_kwargs: Any) -> None:
+        """Record the time spent before the view of an ASGI request."""
+        # Not `self.process_view`, which is this method on an async instance
+        self.view_reached()
+
+    def view_reached(self) -> None:
+        """Record the time spent before the view of the sampled request, if any."""
+        timings = request_timings.get()
+        if timings is not None:
+            timings.middleware = time.perf_counter() - timings.started
+
+    def start(self) -> Optional[RequestTimings]:
+        """Start measuring the request if it is sampled."""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return None
+        timings = RequestTimings(started=time.perf_counter())
+        request_timings.set(timings)
+        return timings
+
+    def finish(self, request: HttpRequest, timings: RequestTimings, response: HttpResponseBase) -> HttpResponseBase:
+        """Add the `Server-Timing` header and log the measures."""
+        # The body of a streaming response is produced after this point and is not measured
+        total = time.perf_counter() - timings.started
+        metrics: List[str] = [
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+            f'ser;dur={timings.serializer * 1000:.1f};desc="Serializer"',
+            f'render;dur={timings.render * 1000:.1f};desc="Render"',
+            f"total;dur={total * 1000:.1f}",
+        ]
+        if timings.middleware is not None:
+            metrics.insert(0, f'mw;dur={timings.middleware * 1000:.1f};desc="Before view"')
+        if response.has_header("Server-Timing"):
+            metrics.insert(0, response["Server-Timing"])
+        response["Server-Timing"] = ", ".join(metrics)
+
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match is not None else None
+        extra = {
+            "route": route,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": timings.queries,
+            "db_ms": round(timings.db * 1000, 3),
+            "middleware_ms": None if timings.middleware is None else round(timings.middleware * 1000, 3),
+            "serializer_ms": round(timings.serializer * 1000, 3),
+            "render_ms": round(timings.render * 1000, 3),
+            "total_ms": round(total * 1000, 3),
+        }
+        logger.info(
+            "%s %s (%s) %s: %d queries, db %.1f ms, before view %s ms, serializer %.1f ms, render %.1f ms, "
+            "total %.1f ms",
+            request.method,
+            request.path,
+            route or "-",
+            response.status_code,
+            timings.queries,
+            extra["db_ms"],
+            "-" if timings.middleware is None else f"{extra['middleware_ms']:.1f}",
+            extra["serializer_ms"],
+            extra["render_ms"],
+            extra["total_ms"],
+            extra=extra,
+        )
+        return response
@@ -10,18 +10,40 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import RedirectView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from dwh_fhir.metrics import metrics_view
+from dwh_fhir.profiling import profile_flame_graph, profile_list, profile_stacks
 
-from apps.patients.api_views import PatientListCreateAPIView, PatientRetrieveUpdateDestroyAPIView
+from apps.patients.api_views import (
+    BundleAPIView,
+    PatientExportAPIView,
+    PatientHistoryAPIView,
+    PatientListCreateAPIView,
+    PatientRetrieveUpdateDestroyAPIView,
+    PatientVersionAPIView,
+)
 
 urlpatterns = [
+    path("admin/profiles/", admin.site.admin_view(profile_list), name="admin-profiles"),
+    path("admin/profiles/<str:profile_id>/", admin.site.admin_view(profile_flame_graph), name="admin-profile"),
+    path(
+        "admin/profiles/<str:profile_id>/stacks/",
+        admin.site.admin_view(profile_stacks),
+        name="admin-profile-stacks",
+    ),
     path("admin/", admin.site.urls),
     # Web interface
     path("patient/", include("apps.patients.urls")),
     # API endpoints
+    path("api/", BundleAPIView.as_view(), name="api-bundle"),
     path("api/patient/", PatientListCreateAPIView.as_view(), name="api-patient-list"),
+    path("api/patient/$export/", PatientExportAPIView.as_view(), name="api-patient-export"),
     path("api/patient/<int:pk>/", PatientRetrieveUpdateDestroyAPIView.as_view(), name="api-patient-detail"),
+    path("api/patient/<int:pk>/_history/", PatientHistoryAPIView.as_view(), name="api-patient-history"),
+    path("api/patient/<int:pk>/_history/<int:vid>/", PatientVersionAPIView.as_view(), name="api-patient-vread"),
     # Documentation
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
+    # Monitoring
+    path("metrics", metrics_view, name="metrics"),
     path("", RedirectView.as_view(url="/patient/", permanent=False)),
 ]
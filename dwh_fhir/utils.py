@@ -1,6 +1,6 @@
 import datetime
 import os
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from dateutil import parser
 from django.core.exceptions import ImproperlyConfigured
@@ -51,3 +51,40 @@ def intenv(var_name: str, default: Any) -> Optional[int]:
         return int(value)
     except ValueError:
         raise ImproperlyConfigured(f"Invalid integer: '{value}'")
+
+
+def floatenv(var_name: str, default: Any) -> Optional[float]:
+    """Ensure the environment variable value is a valid number.
+
+    Return `None` if the environment variable is not defined and `default` is
+    `None`.
+    """
+    value = os.getenv(var_name, default)
+
+    if value is None:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        raise ImproperlyConfigured(f"Invalid number: '{value}'")
+
+
+def countsenv(var_name: str) -> Dict[str, int]:
+    """Parse a `name=N,name=N` environment variable into a mapping of positive integers.
+
+    Return an empty mapping if the environment variable is not defined.
+    """
+    counts = {}
+    for item in os.getenv(var_name, "").split(","):
+        if not item:
+            continue
+        name, _, value = item.partition("=")
+        try:
+            count = int(value)
+        except ValueError:
+            raise ImproperlyConfigured(f"Invalid {var_name} item: '{item}' (expected name=N)")
+        if not name or count < 1:
+            raise ImproperlyConfigured(f"Invalid {var_name} item: '{item}' (expected name=N with N >= 1)")
+        counts[name] = count
+    return counts